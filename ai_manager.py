@@ -1,6 +1,21 @@
+import os
+import time
+import hashlib
+import threading
 import streamlit as st
-import google.generativeai as genai
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cache_registry
+import profiler
+
+# [NEW] 동일한 (모델, 프롬프트, 컨텍스트) 리포트 캐시 유효 시간 (초)
+REPORT_CACHE_TTL = int(os.getenv("AI_REPORT_CACHE_TTL", "21600"))
+# 보관할 최대 리포트 수 (초과 시 가장 오래 사용하지 않은 리포트부터 제거)
+REPORT_CACHE_SIZE = int(os.getenv("AI_REPORT_CACHE_SIZE", "64"))
+
+# [NEW] 포트폴리오 리포트 1회 호출당 입력 토큰 예산 (초과 시 map-reduce로 분할)
+PORTFOLIO_TOKEN_BUDGET = int(os.getenv("AI_PORTFOLIO_TOKEN_BUDGET", "6000"))
 
 # 투자 분석을 위한 시스템 프롬프트 템플릿
 INVESTMENT_REPORT_PROMPT_TEMPLATE = """
@@ -19,27 +34,243 @@ INVESTMENT_REPORT_PROMPT_TEMPLATE = """
 마크다운 형식으로 가독성 있게 작성해주세요.
 """
 
-@st.cache_data(ttl=3600)
+# [NEW] 포트폴리오 전체 분석 프롬프트 (자산별 한 줄 수치 요약을 입력으로 받음)
+PORTFOLIO_REPORT_PROMPT_TEMPLATE = """
+당신은 금융 및 부동산 투자 전문가입니다. 아래는 한 투자자의 대시보드에 있는 전체 자산의 수치 요약입니다.
+각 줄은 '자산명|유형|항목=값|...' 형식이며, 수익률과 변동성은 % 단위입니다.
+
+[포트폴리오 데이터]
+{context_text}
+
+[요청 사항]
+1. 포트폴리오 전체의 현재 시장 상황 요약
+2. 자산군(코인/주식/환율/부동산)별 강점과 약점
+3. 자산별 한 줄 의견 (매수/매도/관망)
+4. 분산 투자 관점의 리스크와 리밸런싱 제안
+
+마크다운 형식으로 가독성 있게 작성해주세요.
+"""
+
+# [NEW] 자산 수가 많을 때 일부 자산만 먼저 요약하는 map 단계 프롬프트
+PORTFOLIO_CHUNK_PROMPT_TEMPLATE = """
+아래 자산 수치 요약을 분석하여 자산별로 핵심 판단(추세, 변동성, 매수/매도/관망 의견)을 한 줄씩만 작성하세요.
+형식: '자산명: 판단' (설명 생략)
+
+{context_text}
+"""
+
+class GeminiClient:
+    """API 키별 Gemini 클라이언트
+
+    google.generativeai는 불러오는 데 오래 걸리므로 AI 기능을 처음 사용할 때 불러옵니다.
+    [FIX] genai.configure는 프로세스 전역 설정이라, 여러 세션(작업 스레드)이 서로 다른 키를 쓰면
+    모델이 나중에 기본 클라이언트를 만들 때 다른 사용자의 키로 요청이 나갈 수 있습니다.
+    전역 설정 대신 키마다 전용 클라이언트를 만들어 목록 조회/모델에 직접 넘깁니다.
+    """
+
+    def __init__(self, api_key: str):
+        import google.generativeai as genai
+        import google.ai.generativelanguage as glm
+        self.genai = genai
+        self.api_key = api_key
+        options = {"api_key": api_key}
+        self._model_client = glm.ModelServiceClient(client_options=options)
+        self._generative_client = glm.GenerativeServiceClient(client_options=options)
+
+    def list_models(self):
+        return self.genai.list_models(client=self._model_client)
+
+    def model(self, model_name: str):
+        model = self.genai.GenerativeModel(model_name)
+        # 지정하지 않으면 generate_content 시점에 전역 기본 클라이언트를 사용하므로 미리 설정
+        # (내부 속성이므로 requirements.txt에서 0.8.x로 고정하고, 구조가 바뀌면 전역 클라이언트로 넘어가지 않게 중단)
+        if not hasattr(model, "_client"):
+            raise RuntimeError("지원하지 않는 google-generativeai 버전입니다. 0.8.x를 설치해주세요.")
+        model._client = self._generative_client
+        return model
+
+@st.cache_resource(max_entries=16)
+def get_gemini_client(api_key: str) -> GeminiClient:
+    return GeminiClient(api_key)
+
+@cache_registry.cache_data(ttl=3600)
 def get_available_gemini_models(api_key: str) -> List[str]:
     try:
-        genai.configure(api_key=api_key)
         models = []
-        for m in genai.list_models():
+        for m in get_gemini_client(api_key).list_models():
             if 'generateContent' in m.supported_generation_methods:
                 models.append(m.name)
         return models
     except Exception:
         return []
 
+def report_cache_key(model_name: str, prompt_template: str, context_text: str) -> str:
+    """모델명, 프롬프트 템플릿, 컨텍스트 내용으로 리포트 캐시 키(SHA-256)를 만듭니다."""
+    h = hashlib.sha256()
+    for part in (model_name, prompt_template, context_text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+class ReportCache:
+    """내용 기반 키로 완성된 리포트를 보관하는 TTL + LRU 캐시 (세션 간 공유)"""
+
+    def __init__(self, ttl: float = REPORT_CACHE_TTL, max_entries: int = REPORT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._items: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if time.time() - item[0] > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, text: str) -> None:
+        now = time.time()
+        with self._lock:
+            # 만료된 리포트는 다시 조회되지 않아도 정리
+            for old_key in [k for k, (created, _) in self._items.items() if now - created > self.ttl]:
+                del self._items[old_key]
+            self._items[key] = (now, text)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+class GeminiBackend:
+    """Gemini 스트리밍 호출 백엔드"""
+
+    def __init__(self, api_key: str):
+        self.client = get_gemini_client(api_key)
+
+    def stream(self, model_name: str, prompt: str) -> Iterator[str]:
+        model = self.client.model(model_name)
+        with profiler.upstream("gemini", model_name) as call:
+            for chunk in model.generate_content(prompt, stream=True):
+                if chunk.text:
+                    call.nbytes += len(chunk.text.encode("utf-8"))
+                    yield chunk.text
+
+class StubBackend:
+    """네트워크 없이 테스트하기 위한 로컬 스텁 백엔드 (AI_BACKEND=stub)"""
+
+    def __init__(self, response: Optional[str] = None, chunk_size: int = 40):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def stream(self, model_name: str, prompt: str) -> Iterator[str]:
+        self.calls += 1
+        text = self.response or f"## 스텁 리포트\n\n- 모델: {model_name}\n- 프롬프트 길이: {len(prompt)}자\n"
+        for i in range(0, len(text), self.chunk_size):
+            yield text[i:i + self.chunk_size]
+
+def get_backend(api_key: str):
+    """환경 변수 AI_BACKEND에 따라 리포트 생성 백엔드를 선택합니다."""
+    if os.getenv("AI_BACKEND", "gemini").lower() == "stub":
+        return StubBackend()
+    return GeminiBackend(api_key)
+
+@st.cache_resource
+def get_report_cache() -> ReportCache:
+    return ReportCache()
+
+def stream_investment_report(api_key: str, model_name: str, context_text: str,
+                             backend=None, cache: Optional[ReportCache] = None) -> Iterator[str]:
+    """투자 분석 리포트를 조각 단위로 생성합니다.
+
+    같은 모델/프롬프트/컨텍스트의 리포트가 캐시에 있으면 모델 호출 없이 한 번에 반환하고,
+    없으면 스트리밍으로 받은 뒤 정상 완료된 경우에만 캐시에 저장합니다.
+    """
+    cache = cache if cache is not None else get_report_cache()
+    key = report_cache_key(model_name, INVESTMENT_REPORT_PROMPT_TEMPLATE, context_text)
+
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    # 모델 호출 중 오류는 호출자(리포트 작업 큐)가 실패로 기록하도록 그대로 전달
+    parts = []
+    backend = backend or get_backend(api_key)
+    prompt = INVESTMENT_REPORT_PROMPT_TEMPLATE.format(context_text=context_text)
+    for text in backend.stream(model_name, prompt):
+        parts.append(text)
+        yield text
+
+    cache.set(key, "".join(parts))
+
 def generate_investment_report(api_key: str, model_name: str, context_text: str) -> str:
     """Gemini를 사용하여 투자 분석 리포트를 생성합니다."""
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name)
-        
-        prompt = INVESTMENT_REPORT_PROMPT_TEMPLATE.format(context_text=context_text)
-        
-        response = model.generate_content(prompt)
-        return response.text
+        return "".join(stream_investment_report(api_key, model_name, context_text))
     except Exception as e:
         return f"리포트 생성 중 오류가 발생했습니다: {e}"
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수를 대략적으로 추정합니다. (한글 비중이 높아 문자 2개당 1토큰으로 보수적으로 계산)"""
+    return len(text) // 2 + 1
+
+def chunk_lines(lines: List[str], token_budget: int) -> List[List[str]]:
+    """요약 줄들을 각 묶음이 토큰 예산을 넘지 않도록 나눕니다."""
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line)
+        if current and used + cost > token_budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(line)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _generate(backend, model_name: str, prompt: str) -> str:
+    return "".join(backend.stream(model_name, prompt))
+
+def stream_portfolio_report(api_key: str, model_name: str, summaries: List[str],
+                            token_budget: int = PORTFOLIO_TOKEN_BUDGET,
+                            backend=None, cache: Optional[ReportCache] = None) -> Iterator[str]:
+    """대시보드 전체 자산을 한 번의 모델 호출로 분석하는 포트폴리오 리포트를 생성합니다.
+
+    요약이 토큰 예산을 넘으면 묶음별 map 호출을 동시에 실행한 뒤 결과를 모아 한 번 더 호출합니다(reduce).
+    """
+    cache = cache if cache is not None else get_report_cache()
+    context_text = "\n".join(summaries)
+    key = report_cache_key(model_name, PORTFOLIO_REPORT_PROMPT_TEMPLATE, context_text)
+
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    backend = backend or get_backend(api_key)
+    template_cost = estimate_tokens(PORTFOLIO_REPORT_PROMPT_TEMPLATE)
+    chunks = chunk_lines(summaries, max(1, token_budget - template_cost))
+
+    if len(chunks) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        prompts = [PORTFOLIO_CHUNK_PROMPT_TEMPLATE.format(context_text="\n".join(c)) for c in chunks]
+        with ThreadPoolExecutor(max_workers=min(4, len(prompts))) as executor:
+            partials = list(executor.map(lambda p: _generate(backend, model_name, p), prompts))
+        reduce_context = "\n".join(partials)
+    else:
+        reduce_context = context_text
+
+    prompt = PORTFOLIO_REPORT_PROMPT_TEMPLATE.format(context_text=reduce_context)
+    for text in backend.stream(model_name, prompt):
+        parts.append(text)
+        yield text
+
+    cache.set(key, "".join(parts))
@@ -0,0 +1,238 @@
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+import data_manager
+import utils
+
+# 지역 전체 실거래 이상 거래 스캐너
+#
+# 상세 차트의 추세 밴드(charts.trade_scatter_figure: 계약일 기준 최대 3차 다항 회귀 + 잔차 표준편차 1.5배)를
+# 지역의 모든 (단지, 전용면적) 그룹에 한 번에 적합합니다. 그룹별 정규방정식을 세그먼트 합(np.add.reduceat)으로
+# 만들어 (그룹 수, 4, 4) 배치로 풀고, 밴드를 벗어난 거래를 z-score(잔차 / 잔차 표준편차)로 표시합니다.
+# 새 달이 들어오면 바뀐 달(과 기간에서 빠진 달)에 거래가 있는 그룹만 다시 적합합니다.
+
+BAND_K = 1.5        # 밴드 폭 (잔차 표준편차 배수) - 상세 차트와 동일
+MAX_DEGREE = 3
+MIN_DEALS = 5       # 거래가 이보다 적은 그룹은 추세가 불안정하므로 판정에서 제외
+# 상세 차트와 같은 기준으로 묶어야 표의 이상 거래가 차트 밴드 밖의 점과 일치
+GROUP_KEYS = ["아파트", "전용면적"]
+DISPLAY_COLUMNS = ["법정동", "아파트", "전용면적", "계약일", "층", "거래금액"]
+# 정렬 기준 이름 -> (컬럼, 내림차순 여부)
+SORT_KEYS = {
+    "|z| 큰 순": ("abs_z", True),
+    "고가 이탈": ("z", True),
+    "저가 이탈": ("z", False),
+    "최근 거래": ("계약일", True),
+}
+# 바뀐 달이 이 비율을 넘으면 그룹별 재적합 대신 전체 재계산
+FULL_REBUILD_RATIO = 0.5
+
+_COEF = np.arange(MAX_DEGREE + 1)
+
+def _month_signature(df: pd.DataFrame) -> tuple:
+    if df.empty:
+        return (0,)
+    return (len(df), int(df['거래금액'].sum()), df['계약일'].iloc[0], df['계약일'].iloc[-1])
+
+def fit_bands(codes: np.ndarray, t: np.ndarray, y: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+    """그룹 번호(codes)별로 y ~ t 다항 추세와 잔차 표준편차를 배치로 적합합니다.
+
+    그룹 안에서 t를 [-1, 1]로 옮긴 뒤 정규방정식을 풀며, 차수는 np.polyfit을 쓰는 상세 차트와 같이
+    min(3, 거래 수 - 1)입니다(같은 날 거래만 있으면 서로 다른 계약일 수 - 1로 낮춤).
+    반환값: 그룹별 center/scale/coef(그룹 수, 4)/std/count 배열 (거래가 없는 그룹은 count 0, std NaN)
+    """
+    params = {
+        "center": np.zeros(n_groups), "scale": np.ones(n_groups),
+        "coef": np.zeros((n_groups, MAX_DEGREE + 1)), "std": np.full(n_groups, np.nan),
+        "count": np.zeros(n_groups, dtype=np.int64),
+    }
+    if len(codes) == 0:
+        return params
+    order = np.lexsort((t, codes))
+    c, t, y = codes[order], t[order], y[order]
+    new_group = np.r_[True, c[1:] != c[:-1]]
+    starts = np.flatnonzero(new_group)
+    ends = np.r_[starts[1:], len(c)]
+    count = ends - starts
+    groups = c[starts]
+    distinct = np.add.reduceat((new_group | np.r_[True, t[1:] != t[:-1]]).astype(np.int64), starts)
+    degree = np.minimum(MAX_DEGREE, distinct - 1)
+
+    t_min, t_max = t[starts], t[ends - 1]
+    center = (t_min + t_max) / 2
+    scale = np.where(t_max > t_min, (t_max - t_min) / 2, 1.0)
+    gid = np.repeat(np.arange(len(starts)), count)
+    x = (t - center[gid]) / scale[gid]
+
+    powers = np.vander(x, 2 * MAX_DEGREE + 1, increasing=True)
+    sums = np.add.reduceat(powers, starts, axis=0)
+    a = sums[:, _COEF[:, None] + _COEF[None, :]]
+    b = np.add.reduceat(powers[:, :MAX_DEGREE + 1] * y[:, None], starts, axis=0)
+    # 그룹 차수보다 높은 항은 단위 행/열로 채워 계수 0이 되게 함 (차수가 달라도 한 번에 풂)
+    unused = _COEF[None, :] > degree[:, None]
+    a[unused[:, :, None] | unused[:, None, :]] = 0.0
+    a[:, _COEF, _COEF] = np.where(unused, 1.0, a[:, _COEF, _COEF])
+    b[unused] = 0.0
+    coef = np.linalg.solve(a, b[:, :, None])[:, :, 0]
+
+    resid = y - np.einsum("ij,ij->i", powers[:, :MAX_DEGREE + 1], coef[gid])
+    ss = np.add.reduceat(resid ** 2, starts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.where(count > 1, np.sqrt(ss / (count - 1)), np.nan)
+
+    params["center"][groups] = center
+    params["scale"][groups] = scale
+    params["coef"][groups] = coef
+    params["std"][groups] = std
+    params["count"][groups] = count
+    return params
+
+def evaluate(codes: np.ndarray, t: np.ndarray, y: np.ndarray, params: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """거래별 (추세가, z-score). 거래 수가 MIN_DEALS 미만이거나 잔차가 없는 그룹은 z NaN"""
+    x = (t - params["center"][codes]) / params["scale"][codes]
+    trend = np.einsum("ij,ij->i", np.vander(x, MAX_DEGREE + 1, increasing=True), params["coef"][codes])
+    std = params["std"][codes]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where((params["count"][codes] >= MIN_DEALS) & (std > 1e-9 * np.abs(trend)), (y - trend) / std, np.nan)
+    return trend, z
+
+def record_highs(codes: np.ndarray, t: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """그룹 안에서 이전 계약일의 모든 거래보다 비싼 거래(기간 내 신고가, 그룹 첫 거래 제외)"""
+    out = np.zeros(len(codes), dtype=bool)
+    if len(codes) == 0:
+        return out
+    order = np.lexsort((t, codes))
+    c, v = codes[order], y[order]
+    # 그룹 번호만큼 값을 띄워 전체 누적 최댓값 한 번으로 그룹별 누적 최댓값을 구함
+    offset = c * (np.abs(v).max() * 2 + 1)
+    running = np.maximum.accumulate(v + offset) - offset
+    first = np.r_[True, c[1:] != c[:-1]]
+    out[order] = ~first & (v > np.r_[-np.inf, running[:-1]])
+    return out
+
+class AnomalyScanner:
+    """한 지역의 월별 실거래를 받아 그룹별 밴드를 유지하고 밴드 밖 거래를 찾습니다.
+
+    세션에 보관하여 update()마다 바뀐 달만 다시 읽고, 그 달과 관련된 그룹만 재적합합니다.
+    """
+
+    def __init__(self):
+        self._months: Dict[str, tuple] = {}     # 계약년월 -> (서명, 표시용 DataFrame, codes, t, y)
+        self._groups: Dict[tuple, int] = {}     # (아파트, 전용면적) -> 그룹 번호
+        self._params = fit_bands(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0), 0)
+        self._frame = pd.DataFrame(columns=DISPLAY_COLUMNS)
+        self._codes = np.empty(0, dtype=np.int64)
+        self._t = self._y = np.empty(0)
+        self._result = None
+        self._lock = threading.Lock()
+        self.hits = self.incremental = self.full = 0
+        self.refit_groups = 0
+
+    def update(self, months: Dict[str, pd.DataFrame]) -> str:
+        """{계약년월: 그 달 실거래}를 반영하고 처리 방식('hits'/'incremental'/'full')을 반환합니다."""
+        with self._lock:
+            kind = self._update(months)
+            setattr(self, kind, getattr(self, kind) + 1)
+            return kind
+
+    def _update(self, months: Dict[str, pd.DataFrame]) -> str:
+        signatures = {ym: _month_signature(df) for ym, df in months.items()}
+        changed = [ym for ym, sig in signatures.items() if ym not in self._months or self._months[ym][0] != sig]
+        removed = [ym for ym in self._months if ym not in months]
+        if not changed and not removed:
+            return "hits"
+
+        full = not self._months or len(changed) + len(removed) > len(months) * FULL_REBUILD_RATIO
+        if full:
+            # 그룹 번호도 새로 매기므로 모든 달을 다시 변환
+            self._months.clear()
+            self._groups.clear()
+            changed, removed = list(months), []
+        stale = [self._months[ym][2] for ym in changed + removed if ym in self._months]
+        for ym in removed:
+            del self._months[ym]
+        for ym in changed:
+            self._months[ym] = (signatures[ym], *self._prepare(months[ym]))
+
+        entries = [self._months[ym] for ym in sorted(self._months)]
+        self._frame = pd.concat([e[1] for e in entries], ignore_index=True) if entries else pd.DataFrame(columns=DISPLAY_COLUMNS)
+        self._codes = np.concatenate([e[2] for e in entries]) if entries else np.empty(0, dtype=np.int64)
+        self._t = np.concatenate([e[3] for e in entries]) if entries else np.empty(0)
+        self._y = np.concatenate([e[4] for e in entries]) if entries else np.empty(0)
+        self._result = None
+
+        n_groups = len(self._groups)
+        if full:
+            self._params = fit_bands(self._codes, self._t, self._y, n_groups)
+            self.refit_groups = n_groups
+            return "full"
+
+        # 바뀐 달의 이전/새 거래가 속한 그룹만 다시 적합
+        affected = np.zeros(n_groups, dtype=bool)
+        for codes in stale + [self._months[ym][2] for ym in changed]:
+            affected[codes] = True
+        rows = affected[self._codes]
+        refit = fit_bands(self._codes[rows], self._t[rows], self._y[rows], n_groups)
+        for name, values in self._params.items():
+            grown = refit[name].copy()
+            grown[:len(values)] = values
+            grown[affected] = refit[name][affected]
+            self._params[name] = grown
+        self.refit_groups = int(affected.sum())
+        return "incremental"
+
+    def _prepare(self, df: pd.DataFrame) -> tuple:
+        """한 달 거래를 (표시용 DataFrame, 그룹 번호, 계약일(일 단위), 거래금액) 배열로 변환"""
+        if df.empty or '거래금액' not in df.columns:
+            return pd.DataFrame(columns=DISPLAY_COLUMNS), np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        dates = pd.to_datetime(df['계약일'], format="%Y-%m-%d", errors="coerce")
+        valid = (df['거래금액'] > 0) & (df['전용면적'] > 0) & dates.notna()
+        df, dates = df[valid], dates[valid]
+        groups = self._groups
+        codes = np.fromiter((groups.setdefault(key, len(groups)) for key in zip(*(df[k].to_numpy() for k in GROUP_KEYS))),
+                            dtype=np.int64, count=len(df))
+        t = dates.to_numpy("datetime64[D]").astype(np.int64).astype(float)
+        frame = df.reindex(columns=DISPLAY_COLUMNS).reset_index(drop=True)
+        frame['계약일'] = dates.to_numpy()
+        return frame, codes, t, df['거래금액'].to_numpy(float)
+
+    def result(self) -> pd.DataFrame:
+        """전체 거래 + 추세가/괴리율/z-score/신고가 여부 (거래금액·추세가는 만원)"""
+        if self._result is None:
+            trend, z = evaluate(self._codes, self._t, self._y, self._params)
+            out = self._frame.copy()
+            out['추세가'] = trend
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out['괴리율'] = (self._y / trend - 1) * 100
+            out['z'] = z
+            out['abs_z'] = np.abs(z)
+            out['그룹거래수'] = self._params["count"][self._codes]
+            out['신고가'] = record_highs(self._codes, self._t, self._y)
+            self._result = out
+        return self._result
+
+    def flagged(self, min_abs_z: float = BAND_K, by: str = "|z| 큰 순") -> pd.DataFrame:
+        """|z|가 min_abs_z 이상인(밴드 밖) 거래를 정렬 기준에 따라 정렬하여 반환합니다."""
+        df = self.result()
+        column, descending = SORT_KEYS[by]
+        return df[df['abs_z'].to_numpy() >= min_abs_z].sort_values(column, ascending=not descending, kind="stable")
+
+    def stats(self) -> Dict:
+        return {
+            "months": len(self._months), "deals": len(self._codes), "groups": int((self._params["count"] > 0).sum()),
+            "refit_groups": self.refit_groups, "hits": self.hits, "incremental": self.incremental, "full": self.full,
+        }
+
+def load_months(service_key: str, lawd_cd: str, months: int, cache_ts: float = 0) -> Dict[str, pd.DataFrame]:
+    """최근 months개월 실거래를 달별로 불러옵니다 (get_period_apt_data와 같은 월별 캐시 사용)."""
+    today = pd.Timestamp.today()
+    yms = [(today - pd.DateOffset(months=i)).strftime("%Y%m") for i in range(months)]
+    frames = utils.run_concurrently([
+        lambda ym=ym: data_manager.fetch_apt_trade_data_cached(service_key, lawd_cd, ym, cache_ts=cache_ts) for ym in yms
+    ])
+    # 조회에 실패한 달은 AptFetchError로 캐시되지 않고 None으로 돌아오므로 빼서 다음 실행 때 다시 조회
+    # (거래가 없는 달은 빈 DataFrame으로 그대로 포함)
+    return {ym: df for ym, df in zip(yms, frames) if df is not None}
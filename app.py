@@ -1,12 +1,7 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-import requests
-import plotly.express as px
 import datetime
 import os
-import numpy as np
-import plotly.graph_objects as go
 import time
 import uuid
 import urllib.parse
@@ -15,23 +10,41 @@ import urllib.parse
 import utils
 import data_manager
 import ai_manager
-
-from dotenv import load_dotenv
-from real_estate_loader import get_apt_trade_data, get_district_codes
+import news_manager
+import context_builder
+import report_jobs
+import frame_cache
+import cache_registry
+import portfolio
+import indicators
+import risk
+import screener
+import anomaly_scanner
+import charts
+import profiler
+
+from real_estate_loader import get_apt_trade_data, get_district_codes, get_district_name
 
 try:
     from streamlit_sortables import sort_items
 except ImportError:
     sort_items = None
 
-load_dotenv() # .env 파일 로드
+utils.load_env() # .env 파일 로드 (프로세스당 1회)
 
 # 앱 버전 정보
 __version__ = "1.3.3"   
 
+# [NEW] 실시간 요약 타일 자동 갱신 주기 (초)
+TILE_REFRESH_SEC = 10
+
 # 1. 페이지 설정은 반드시 스크립트 최상단에 위치해야 합니다.
 st.set_page_config(page_title=f"통합 자산 모니터링 v{__version__}", page_icon="💰", layout="wide")
 
+# [NEW] 단계별 성능 계측 (DASHBOARD_PROFILE=1 일 때만 동작)
+run_profile = profiler.begin_run()
+profiler.serve_metrics()
+
 # [NEW] 앱 시작 시 설정 불러오기
 if 'init_done' not in st.session_state:
     config = utils.load_config()
@@ -43,6 +56,7 @@ if 'init_done' not in st.session_state:
         if 'selected_stocks' in config: st.session_state['selected_stocks_state'] = config['selected_stocks']
         if 'custom_stock' in config: st.session_state['custom_stock_state'] = config['custom_stock']
         if 'selected_ai_model' in config: st.session_state['selected_ai_model'] = config['selected_ai_model']
+        if 'holdings' in config: st.session_state['holdings'] = config['holdings']
     
     # [FIX] 세션 상태 초기화 (Config에 없거나 로드 실패 시 기본값 설정)
     if 'selected_stocks_state' not in st.session_state:
@@ -78,13 +92,19 @@ if 'selected_asset' not in st.session_state:
 if 'dashboard_order' not in st.session_state:
     st.session_state['dashboard_order'] = []
 
+# [NEW] 보유 자산 (타일 키 -> 수량/평균 매입가)
+if 'holdings' not in st.session_state:
+    st.session_state['holdings'] = {}
+
 # [NEW] 선택적 캐시 삭제를 위한 타임스탬프
 if 'cache_invalidation_ts' not in st.session_state:
     st.session_state['cache_invalidation_ts'] = {}
 
-# [NEW] 아파트 목록 조회 데이터 캐시 (UI용)
+# [NEW] 아파트 목록 조회 데이터 캐시 (UI용, 메모리 예산 내 LRU)
 if 'fetched_apt_data' not in st.session_state:
-    st.session_state['fetched_apt_data'] = {}
+    st.session_state['fetched_apt_data'] = frame_cache.new_session_cache()
+
+profiler.checkpoint("init")
 
 # 2. 사이드바 설정 (입력값 받기)
 with st.sidebar:
@@ -179,7 +199,14 @@ with st.sidebar:
                 if trigger_fetch:
                     ts = st.session_state.get('cache_invalidation_ts', {}).get(target_lawd, 0)
                     with st.spinner(f"{current_search_dt.strftime('%Y년 %m월')} 거래 데이터 조회 중..."):
-                        df_temp = data_manager.fetch_apt_trade_data_cached(service_key, target_lawd, deal_ymd, _cache_ts=ts)
+                        try:
+                            df_temp = data_manager.fetch_apt_trade_data_cached(service_key, target_lawd, deal_ymd, cache_ts=ts)
+                        except data_manager.AptFetchError:
+                            # [FIX] 조회 실패는 거래 없음과 구분하고, 같은 달을 다시 조회할 수 있도록 이동하지 않음
+                            df_temp = None
+                            st.toast("거래 데이터 조회에 실패했습니다. 잠시 후 다시 시도해주세요.", icon="⚠️")
+
+                    if df_temp is not None:
                         st.session_state['fetched_apt_data'][cache_key] = df_temp
                         df_current = df_temp
                         
@@ -195,13 +222,39 @@ with st.sidebar:
                         prev_month = current_search_dt.replace(day=1) - datetime.timedelta(days=1)
                         st.session_state['apt_search_date'] = prev_month
                 
+                # [NEW] 단지명 검색 (접두어/자모/초성 일치, 전국 검색 가능)
+                apt_query = st.text_input("단지명 검색", placeholder="예: 만촌, 만ㅊ, ㅁㅊ", key="apt_search_query")
+                search_nationwide = st.checkbox("전국 검색", key="apt_search_nationwide", help="저장된 전체 지역의 단지 목록에서 검색합니다.")
+
+                apt_options = saved_apt_list
+                if apt_query and search_nationwide:
+                    apt_options = []
+                    nationwide_hits = utils.search_apts(apt_query)
+                    hit_labels = {f"{name} ({get_district_name(cd)})": (cd, name) for cd, name in nationwide_hits}
+                    selected_hit = st.selectbox("검색 결과 (전국)", list(hit_labels.keys()), index=None, placeholder=f"{len(hit_labels)}개 단지 검색됨")
+                    if selected_hit and st.button("관심 단지 추가 ➕", key="btn_add_nationwide"):
+                        hit_cd, hit_name = hit_labels[selected_hit]
+                        if any(fav['lawd_cd'] == hit_cd and fav['apt_name'] == hit_name for fav in st.session_state['favorite_apts']):
+                            st.warning("이미 목록에 있습니다.")
+                        else:
+                            st.session_state['favorite_apts'].append({
+                                "id": str(uuid.uuid4()),
+                                "lawd_cd": hit_cd,
+                                "region_name": get_district_name(hit_cd),
+                                "apt_name": hit_name
+                            })
+                            utils.save_config()
+                            st.success(f"'{hit_name}' 추가됨")
+                elif apt_query:
+                    apt_options = [name for _, name in utils.search_apts(apt_query, lawd_cd=target_lawd, limit=500)]
+
                 # 아파트 선택 창 (저장된 목록 사용)
                 selected_apt = st.selectbox(
                     "아파트 단지 선택", 
-                    saved_apt_list, 
+                    apt_options, 
                     index=None, 
-                    placeholder="아파트 이름을 검색하세요" if saved_apt_list else "목록 조회를 눌러주세요",
-                    disabled=not saved_apt_list
+                    placeholder="아파트 이름을 검색하세요" if apt_options else "목록 조회를 눌러주세요",
+                    disabled=not apt_options
                 )
                 
                 if selected_apt:
@@ -209,11 +262,16 @@ with st.sidebar:
                     if df_current is None:
                         with st.spinner("상세 데이터 불러오는 중..."):
                             ts = st.session_state.get('cache_invalidation_ts', {}).get(target_lawd, 0)
-                            df_temp = data_manager.fetch_apt_trade_data_cached(service_key, target_lawd, deal_ymd, _cache_ts=ts)
-                            st.session_state['fetched_apt_data'][cache_key] = df_temp
-                            df_current = df_temp
+                            try:
+                                df_temp = data_manager.fetch_apt_trade_data_cached(service_key, target_lawd, deal_ymd, cache_ts=ts)
+                            except data_manager.AptFetchError:
+                                df_temp = None
+                                st.warning("거래 데이터 조회에 실패했습니다. 잠시 후 다시 시도해주세요.")
+                            if df_temp is not None:
+                                st.session_state['fetched_apt_data'][cache_key] = df_temp
+                                df_current = df_temp
                             # 로드한 김에 목록 업데이트
-                            if not df_temp.empty:
+                            if df_temp is not None and not df_temp.empty:
                                 new_apts = df_temp['아파트'].unique().tolist()
                                 utils.update_apt_list(target_lawd, new_apts)
 
@@ -375,7 +433,8 @@ with st.sidebar:
                 "real_estate:c8bcc6e0-17d7-40ae-bef1-fd47f9316567"
             ]
             st.session_state['custom_stock_state'] = ""
-            st.session_state['fetched_apt_data'] = {}
+            st.session_state['holdings'] = {}
+            st.session_state['fetched_apt_data'].clear()
             utils.save_config()
 
         if st.button("모든 설정 초기화 (Factory Reset)", type="primary", on_click=reset_callback):
@@ -388,144 +447,172 @@ with st.sidebar:
         st.caption(f"✅ 설정 저장됨 (최근 수정: {last_mod})")
     else:
         st.caption("ℹ️ 기본 설정 사용 중 (저장된 파일 없음)")
+    # 조회 데이터 캐시 점유 현황
+    frame_stats = st.session_state['fetched_apt_data'].stats()
+    global_stats = frame_cache.get_global_budget().stats()
+    st.caption(
+        f"🗂️ 조회 캐시: {frame_stats['entries']}개, {frame_stats['bytes'] / 1048576:.1f}/{frame_stats['max_bytes'] / 1048576:.0f}MB "
+        f"(전체 {global_stats['bytes'] / 1048576:.1f}/{global_stats['max_bytes'] / 1048576:.0f}MB, 제거 {frame_stats['evictions']}회)"
+    )
+
+    # [NEW] 데이터 캐시(st.cache_data) 함수별 적중률/메모리 현황
+    with st.expander("🧮 데이터 캐시 현황", expanded=False):
+        cache_stats = [c for c in cache_registry.stats() if c['hits'] or c['misses']]
+        if cache_stats:
+            st.dataframe(pd.DataFrame([{
+                "함수": c['function'].split('.')[-1],
+                "적중률": f"{c['hit_rate'] * 100:.0f}%",
+                "적중/미스": f"{c['hits']}/{c['misses']}",
+                "항목": c['entries'],
+                "크기(KB)": round(c['bytes'] / 1024, 1),
+                "최고 경과(분)": round(c['oldest_sec'] / 60, 1),
+                "대체 제거": c['superseded'],
+            } for c in cache_stats]), hide_index=True, width="stretch")
+            total_mb = sum(c['bytes'] for c in cache_stats) / 1048576
+            st.caption(f"추정 사용량 {total_mb:.1f}MB · '대체 제거'는 새로고침으로 바로 정리된 이전 항목 수")
+        else:
+            st.caption("아직 캐시된 조회가 없습니다.")
 
-    st.divider()
-    if st.button("데이터 새로고침"):
-        st.rerun()
+profiler.checkpoint("sidebar")
 
 # 5. 메인 대시보드 UI 구성
 st.title("📊 통합 자산 모니터링 대시보드")
 
 st.subheader("📍 실시간 요약")
 
-# [NEW] 환율 정보 가져오기 및 표시
-usd_to_krw_rate, usd_change = data_manager.get_exchange_rate("USD", "KRW")
-if usd_to_krw_rate:
-    st.caption(f"현재 환율: 1 USD ≈ {usd_to_krw_rate:,.2f} KRW")
-
-# 표시할 모든 메트릭 데이터를 수집
-metrics_data = []
+def format_stock_value(price, currency, fx_rates):
+    """통화에 따라 주식 가격 문자열을 포맷팅합니다."""
+    if currency == "KRW":
+        return f"{price:,.0f} KRW"
+    value_fmt = f"${price:,.2f}" if currency == "USD" else f"{price:,.2f} {currency}"
+    # [CHANGED] USD 외 통화도 원화 환산 가격 추가 (GBp 등 보조 단위 포함)
+    base, unit = portfolio.normalize_currency(currency)
+    rate = fx_rates.get(base)
+    if rate:
+        value_fmt += f" (≈ {price * unit * rate:,.0f} 원)"
+    return value_fmt
+
+def collect_quote_metric(spec, usd_to_krw_rate, usd_change):
+    """시세 타일 정의(spec)에 현재 시세를 채워 메트릭 데이터를 만듭니다.
+
+    주식은 통화별 환율을 한 번에 조회한 뒤 표시값을 만들기 위해 price/currency만 채웁니다.
+    """
+    metric = dict(spec)
+    if spec['type'] == "exchange":
+        if not usd_to_krw_rate:
+            return None
+        metric["value"] = f"{usd_to_krw_rate:,.2f} KRW"
+        metric["delta"] = f"{usd_change:.2f}%"
+    elif spec['type'] == "coin":
+        price, change = data_manager.get_crypto_price(spec['ticker'])
+        metric.update(price=price, currency="KRW")
+        metric["value"] = f"{price:,.0f} KRW"
+        metric["delta"] = f"{change:.2f}%"
+    else:
+        price, change, currency = data_manager.get_stock_price(spec['ticker'])
+        metric.update(price=price, currency=currency)
+        metric["delta"] = f"{change:.2f}%"
+    return metric
+
+def get_portfolio_book(tiles):
+    """보유 내역이 있는 타일로 세션의 평가 장부를 반환합니다. (보유 내역이 바뀔 때만 새로 만듦)"""
+    positions = portfolio.build_positions(st.session_state['holdings'], tiles)
+    if not positions:
+        return None
+    signature = portfolio.book_signature(positions)
+    cached = st.session_state.get('portfolio_book')
+    if cached is None or cached[0] != signature:
+        cached = (signature, portfolio.PortfolioBook(positions))
+        st.session_state['portfolio_book'] = cached
+    return cached[1]
+
+def render_portfolio_summary(book):
+    summary = book.summary()
+    if not summary['total_value']:
+        return
+    allocation = " · ".join(
+        f"{name} {summary['allocation'][t] * 100:.0f}%"
+        for t, name in (("coin", "코인"), ("stock", "주식"), ("real_estate", "부동산")) if summary['allocation'][t]
+    )
+    col_value, col_pnl, col_alloc = st.columns(3)
+    col_value.metric("💼 총 평가액", f"{summary['total_value']:,.0f} 원")
+    col_pnl.metric("평가 손익", f"{summary['pnl']:+,.0f} 원", f"{summary['pnl_pct']:+.2f}%")
+    col_alloc.metric("자산 비중", allocation or "-")
+    if book.missing_currencies():
+        st.caption(f"⚠️ 환율을 확인하지 못한 통화는 평가에서 제외됨: {', '.join(book.missing_currencies())}")
+
+# [CHANGED] 시세 타일은 라벨/키만 먼저 구성하고, 실제 시세 조회는 프래그먼트에서 수행
+quote_specs = []
 
 # [NEW] 환율 정보 추가
-if usd_to_krw_rate:
-    metrics_data.append({
-        "label": "💵 달러 환율",
-        "value": f"{usd_to_krw_rate:,.2f} KRW",
-        "delta": f"{usd_change:.2f}%",
-        "type": "exchange",
-        "id": "KRW=X",
-        "key": "exchange:USD/KRW"
-    })
-
-# 1. 코인 데이터 수집
+quote_specs.append({
+    "label": "💵 달러 환율",
+    "type": "exchange",
+    "id": "KRW=X",
+    "key": "exchange:USD/KRW",
+    "ticker": "KRW=X"
+})
+
+# 1. 코인 타일
 for name in selected_coins:
     ticker = coin_market_dict.get(name)
     if ticker:
-        price, change = data_manager.get_crypto_price(ticker)
-        metrics_data.append({
+        quote_specs.append({
             "label": f"🪙 {name}",
-            "value": f"{price:,.0f} KRW",
-            "delta": f"{change:.2f}%",
             "type": "coin",
             "id": name,
-            "key": f"coin:{name}"
+            "key": f"coin:{name}",
+            "ticker": ticker
         })
 
-# 2. 주식 데이터 수집
+# 2. 주식 타일
 for name in selected_stocks:
     ticker = utils.STOCK_RECOMMENDATIONS.get(name)
     if ticker:
-        price, change, currency = data_manager.get_stock_price(ticker)
-        
-        # 통화에 따른 포맷팅
-        if currency == "USD":
-            value_fmt = f"${price:,.2f}"
-            # [NEW] 원화 환산 가격 추가
-            if usd_to_krw_rate:
-                krw_price = price * usd_to_krw_rate
-                value_fmt += f" (≈ {krw_price:,.0f} 원)"
-        elif currency == "KRW":
-            value_fmt = f"{price:,.0f} KRW"
-        else:
-            value_fmt = f"{price:,.2f} {currency}"
-            
-        metrics_data.append({
+        quote_specs.append({
             "label": f"📈 {name}",
-            "value": value_fmt,
-            "delta": f"{change:.2f}%",
             "type": "stock_rec",
             "id": name,
-            "key": f"stock_rec:{name}"
+            "key": f"stock_rec:{name}",
+            "ticker": ticker
         })
 
 if custom_stock_input:
     custom_tickers = [t.strip() for t in custom_stock_input.split(',') if t.strip()]
     for ticker in custom_tickers:
-        price, change, currency = data_manager.get_stock_price(ticker)
-        
-        # 통화에 따른 포맷팅
-        if currency == "USD":
-            value_fmt = f"${price:,.2f}"
-            # [NEW] 원화 환산 가격 추가
-            if usd_to_krw_rate:
-                krw_price = price * usd_to_krw_rate
-                value_fmt += f" (≈ {krw_price:,.0f} 원)"
-        elif currency == "KRW":
-            value_fmt = f"{price:,.0f} KRW"
-        else:
-            value_fmt = f"{price:,.2f} {currency}"
-            
-        metrics_data.append({
+        quote_specs.append({
             "label": f"📈 {ticker}",
-            "value": value_fmt,
-            "delta": f"{change:.2f}%",
             "type": "stock_custom",
             "id": ticker,
-            "key": f"stock_custom:{ticker}"
+            "key": f"stock_custom:{ticker}",
+            "ticker": ticker
         })
 
-# 3. 부동산 데이터 수집
+def news_ticker_for(metric):
+    """Yahoo Finance 뉴스를 함께 가져올 티커 (주식 항목만 해당)"""
+    return metric.get('ticker') if metric['type'] in ['stock_rec', 'stock_custom'] else None
+
+# [NEW] 대시보드 전체 자산의 뉴스를 백그라운드에서 미리 가져오기 (상세 데이터 탭에서 즉시 표시)
+news_manager.get_news_service().prefetch(
+    [(utils.get_news_query(spec), news_ticker_for(spec)) for spec in quote_specs]
+)
+
+profiler.checkpoint("quote_specs")
+
+# 3. 부동산 데이터 수집 (시세 타일 외의 메트릭)
+metrics_data = []
 df_display = pd.DataFrame() # 상세 데이터 탭을 위한 통합 데이터프레임
 
 if use_real_estate:
     if st.session_state['favorite_apts']:
         with st.spinner("부동산 데이터 업데이트 중..."):
-            for idx, item in enumerate(st.session_state['favorite_apts']):
+            for item in st.session_state['favorite_apts']:
                 # 기존 데이터에 ID가 없는 경우 호환성 처리
                 if 'id' not in item: item['id'] = str(uuid.uuid4())
-                
-                # 각 관심 단지별 데이터 로드
-                # [IMPROVE] 최근 3개월 데이터를 조회하여 가장 최신 거래 정보를 표시 (거래 절벽 대응)
-                ts = st.session_state.get('cache_invalidation_ts', {}).get(item['lawd_cd'], 0)
-                df = data_manager.get_period_apt_data(service_key, item['lawd_cd'], months=3, _cache_ts=ts)
-                
-                if not df.empty:
-                    # 해당 아파트만 필터링 및 최신순 정렬
-                    apt_df = df[df['아파트'] == item['apt_name']].sort_values(by='계약일', ascending=False)
-                    
-                    if not apt_df.empty:
-                        # 상세 데이터 병합 (대시보드 전체 분석용)
-                        df_display = pd.concat([df_display, apt_df], ignore_index=True)
-                        
-                        # 메트릭(요약) 추가 - 가장 최신 거래 1건
-                        recent = apt_df.iloc[0]
-                        
-                        # 계약일 포맷팅 (YYYY-MM-DD -> MM-DD)
-                        deal_date = str(recent['계약일'])
-                        if len(deal_date) >= 10: deal_date = deal_date[5:]
-                        
-                        metrics_data.append({
-                            "label": f"🏠 {item['apt_name']}",
-                            "value": f"{recent['거래금액']:,} 만원",
-                            "delta": f"{deal_date} | {recent['층']}층 ({recent['전용면적']}㎡)",
-                            "type": "real_estate",
-                            "id": idx,
-                            "key": f"real_estate:{item['id']}"
-                        })
-                    else:
-                        metrics_data.append({"label": f"🏠 {item['apt_name']}", "value": "최근 3개월 거래 없음", "delta": "-", "type": "real_estate", "id": idx, "key": f"real_estate:{item['id']}"})
-                else:
-                    metrics_data.append({"label": f"🏠 {item['apt_name']}", "value": "데이터 없음", "delta": "API 확인", "type": "real_estate", "id": idx, "key": f"real_estate:{item['id']}"})
+            # [IMPROVE] 최근 3개월 데이터를 조회하여 가장 최신 거래 정보를 표시 (거래 절벽 대응)
+            metrics_data, df_display = data_manager.build_real_estate_metrics(
+                st.session_state['favorite_apts'], service_key, st.session_state.get('cache_invalidation_ts', {})
+            )
     else:
         metrics_data.append({
             "label": "🏠 부동산",
@@ -536,9 +623,12 @@ if use_real_estate:
             "key": "info:real_estate"
         })
 
+profiler.checkpoint("real_estate_metrics")
+
 # [NEW] 순서 동기화 및 정렬
 # 1. 현재 존재하는 모든 키 수집
-current_keys = [m['key'] for m in metrics_data]
+all_tiles = quote_specs + metrics_data
+current_keys = [m['key'] for m in all_tiles]
 
 # 2. 세션에 저장된 순서 리스트 업데이트 (삭제된 항목 제거)
 st.session_state['dashboard_order'] = [k for k in st.session_state['dashboard_order'] if k in current_keys]
@@ -548,26 +638,23 @@ for k in current_keys:
     if k not in st.session_state['dashboard_order']:
         st.session_state['dashboard_order'].append(k)
 
-# 4. 저장된 순서대로 metrics_data 정렬
-metrics_map = {m['key']: m for m in metrics_data}
-ordered_metrics = []
-for k in st.session_state['dashboard_order']:
-    if k in metrics_map:
-        ordered_metrics.append(metrics_map[k])
+# 4. 저장된 순서대로 타일 정렬 (순서 변경 위젯용)
+tiles_map = {m['key']: m for m in all_tiles}
+ordered_tiles = [tiles_map[k] for k in st.session_state['dashboard_order'] if k in tiles_map]
 
 # [NEW] 사이드바에 드래그 앤 드롭 순서 변경 위젯 추가
 with st.sidebar:
     st.divider()
     st.subheader("⇅ 순서 변경")
-    if sort_items and ordered_metrics:
+    if sort_items and ordered_tiles:
         # 현재 표시된 라벨 목록 생성
-        labels = [m['label'] for m in ordered_metrics]
+        labels = [m['label'] for m in ordered_tiles]
         # 드래그 앤 드롭 위젯 표시
         sorted_labels = sort_items(labels)
         
         # 순서가 변경되었다면 세션 상태 업데이트
         if sorted_labels != labels:
-            label_to_key = {m['label']: m['key'] for m in ordered_metrics}
+            label_to_key = {m['label']: m['key'] for m in ordered_tiles}
             new_order = [label_to_key[lbl] for lbl in sorted_labels if lbl in label_to_key]
             st.session_state['dashboard_order'] = new_order
             utils.save_config() # 순서 변경 저장
@@ -575,25 +662,274 @@ with st.sidebar:
     elif not sort_items:
         st.warning("'streamlit-sortables' 라이브러리가 필요합니다.")
 
-# 동적 그리드 레이아웃 (3열)
-if ordered_metrics:
-    cols = st.columns(3)
-    for i, metric in enumerate(ordered_metrics):
-        with cols[i % 3]:
-            # 정보성 메시지인 경우 (삭제/차트 기능 없음)
-            if metric.get("type") == "info":
-                with st.container(border=True):
-                    st.metric(label=metric["label"], value=metric["value"], delta=metric["delta"])
+# [NEW] 실시간 요약 타일 프래그먼트
+# run_every 주기마다 이 함수만 다시 실행되어 시세만 갱신합니다.
+# (사이드바, 부동산 조회, 차트/AI 탭은 다시 실행되지 않음)
+@st.fragment(run_every=TILE_REFRESH_SEC)
+@profiler.timed("summary_tiles")
+def render_summary_tiles(quote_specs, static_metrics):
+    # [NEW] 환율 정보 가져오기 및 표시
+    usd_to_krw_rate, usd_change = data_manager.get_exchange_rate("USD", "KRW")
+
+    col_caption, col_refresh = st.columns([0.85, 0.15])
+    with col_caption:
+        if usd_to_krw_rate:
+            st.caption(f"현재 환율: 1 USD ≈ {usd_to_krw_rate:,.2f} KRW")
+    with col_refresh:
+        # 시세 타일만 즉시 갱신 (전체 스크립트 재실행 없음)
+        if st.button("데이터 새로고침", key="btn_refresh_tiles"):
+            st.rerun(scope="fragment")
+
+    # 시세 수집 (부동산 등 정적 메트릭은 전체 실행 시 계산된 값을 재사용)
+    metrics_map = {m['key']: m for m in static_metrics}
+    quotes = [m for m in (collect_quote_metric(spec, usd_to_krw_rate, usd_change) for spec in quote_specs) if m]
+
+    # [NEW] 필요한 통화의 원화 환율을 한 번에 조회 (주식 표시값 + 포트폴리오 평가)
+    book = get_portfolio_book(quote_specs + static_metrics)
+    for m in quotes + static_metrics:
+        if book is not None and m.get('price'):
+            book.update_price(m['key'], m['price'], m.get('currency'))
+    currencies = {portfolio.normalize_currency(m['currency'])[0] for m in quotes if m.get('currency')}
+    fx_rates = data_manager.get_fx_rates(currencies | set(book.currencies if book is not None else []))
+    for m in quotes:
+        if 'value' not in m:
+            m['value'] = format_stock_value(m['price'], m['currency'], fx_rates)
+        metrics_map[m['key']] = m
+
+    # [NEW] 보유 자산 평가 (시세/환율이 바뀐 포지션만 다시 계산)
+    if book is not None:
+        book.update_fx(fx_rates)
+        render_portfolio_summary(book)
+
+    ordered_metrics = [metrics_map[k] for k in st.session_state['dashboard_order'] if k in metrics_map]
+
+    # 동적 그리드 레이아웃 (3열)
+    if ordered_metrics:
+        cols = st.columns(3)
+        for i, metric in enumerate(ordered_metrics):
+            with cols[i % 3]:
+                # 정보성 메시지인 경우 (삭제/차트 기능 없음)
+                if metric.get("type") == "info":
+                    with st.container(border=True):
+                        st.metric(label=metric["label"], value=metric["value"], delta=metric["delta"])
+                else:
+                    # 상호작용 가능한 아이템: 버튼으로 변경 (클릭 시 차트 자동 선택)
+                    # 버튼 라벨에 주요 정보 표시 (줄바꿈으로 구분)
+                    btn_label = f"{metric['label']}\n{metric['value']}"
+                    
+                    if st.button(btn_label, key=f"btn_{i}", width="stretch"):
+                        st.session_state['selected_asset'] = metric
+                        # 차트/상세/AI 탭 갱신을 위해 전체 앱 재실행
+                        st.rerun()
+    else:
+        st.info("👈 사이드바에서 모니터링할 자산을 설정해주세요.")
+
+profiler.checkpoint("order_sync")
+render_summary_tiles(quote_specs, metrics_data)
+
+# [NEW] 보유 자산(수량/평균 매입가) 편집
+holding_tiles = [t for t in quote_specs + metrics_data if t['type'] not in ('exchange', 'info')]
+if holding_tiles:
+    with st.expander("💼 보유 자산 편집 (포트폴리오 평가)", expanded=False):
+        holdings = st.session_state['holdings']
+        editor_df = pd.DataFrame([{
+            "key": t['key'],
+            "자산": t['label'],
+            "수량": float(holdings.get(t['key'], {}).get('quantity', 0.0)),
+            "평균 매입가": float(holdings.get(t['key'], {}).get('cost', 0.0)),
+        } for t in holding_tiles])
+        edited_df = st.data_editor(
+            editor_df, hide_index=True, width="stretch", key="holdings_editor",
+            column_config={
+                "key": None,
+                "자산": st.column_config.TextColumn(disabled=True),
+                "수량": st.column_config.NumberColumn(min_value=0.0, format="%.8g"),
+                "평균 매입가": st.column_config.NumberColumn(min_value=0.0, format="%.8g", help="자산 통화 기준 1단위 가격 (부동산은 원)"),
+            },
+        )
+        st.caption("수량을 입력한 자산만 평가에 포함됩니다. 해외 주식은 현지 통화로 입력하면 원화로 환산합니다.")
+        shown_keys = set(editor_df['key'])
+        new_holdings = {k: v for k, v in holdings.items() if k not in shown_keys}
+        for row in edited_df.to_dict('records'):
+            if pd.notna(row['수량']) and row['수량'] > 0:
+                cost = row['평균 매입가']
+                new_holdings[row['key']] = {"quantity": float(row['수량']), "cost": float(cost) if pd.notna(cost) else 0.0}
+        if new_holdings != holdings:
+            st.session_state['holdings'] = new_holdings
+            utils.save_config()
+            st.rerun()
+
+# [NEW] 자산 간 상관관계·리스크 (코인/주식/환율 + KOSPI·S&P500, 원화 기준 일간 수익률)
+risk_tiles = [t for t in quote_specs if t['type'] in ('coin', 'stock_rec', 'stock_custom', 'exchange')]
+if risk_tiles:
+    with st.expander("📐 리스크 분석 (상관관계·베타·VaR)", expanded=False):
+        col_window, col_toggle = st.columns([0.7, 0.3])
+        with col_window:
+            risk_window = st.radio("분석 기간", list(risk.WINDOWS), horizontal=True, key="risk_window", label_visibility="collapsed")
+        with col_toggle:
+            # 장기 가격 이력을 조회하므로 필요할 때만 계산
+            risk_enabled = st.toggle("계산하기", key="risk_enabled")
+        if risk_enabled:
+            with profiler.stage("risk"), st.spinner("가격 이력 정렬 및 공분산 계산 중..."):
+                risk_series, risk_labels = risk.load_prices(risk_tiles, risk_window)
+                # 분석 기간별 모델을 세션에 보관하여 새 봉이 들어온 자산만 다시 계산
+                risk_model = st.session_state.setdefault('risk_models', {}).setdefault(
+                    risk_window, risk.RiskModel(risk.WINDOWS[risk_window][0])
+                )
+                risk_model.update(risk_series)
+            if len(risk_model.names) < 2:
+                st.info("분석할 가격 이력이 부족합니다.")
             else:
-                # 상호작용 가능한 아이템: 버튼으로 변경 (클릭 시 차트 자동 선택)
-                # 버튼 라벨에 주요 정보 표시 (줄바꿈으로 구분)
-                btn_label = f"{metric['label']}\n{metric['value']}"
-                
-                if st.button(btn_label, key=f"btn_{i}", width="stretch"):
-                    st.session_state['selected_asset'] = metric
-                    st.rerun()
-else:
-    st.info("👈 사이드바에서 모니터링할 자산을 설정해주세요.")
+                corr_df = risk_model.correlation_frame(risk_labels)
+                fig = charts.get_figure_cache().get_or_build(
+                    ("risk_corr", risk_window, charts.data_version(corr_df)),
+                    lambda: charts.correlation_heatmap(corr_df, f"자산 간 상관계수 (최근 {risk_window}, 원화 기준 일간 수익률)")
+                )
+                st.plotly_chart(fig, width="stretch")
+
+                betas = {
+                    name: risk_model.rolling_beta(risk.benchmark_key(name)).ffill().iloc[-1]   # 자산별 최근 값
+                    for name in risk.BENCHMARKS if risk.benchmark_key(name) in risk_model.names
+                }
+                st.dataframe(pd.DataFrame([{
+                    "자산": risk_labels.get(key, key),
+                    "연변동성(%)": round(vol * 100, 1),
+                    **{f"베타 {name} ({risk.BETA_WINDOW}일)": round(b[key], 2) for name, b in betas.items()},
+                } for key, vol in zip(risk_model.names, risk_model.volatility()) if not key.startswith("benchmark:")]),
+                    hide_index=True, width="stretch")
+
+                book_entry = st.session_state.get('portfolio_book')
+                if book_entry is not None:
+                    book = book_entry[1]
+                    result = risk_model.portfolio_risk(dict(zip(book.keys, book.value)))
+                    if result:
+                        col_vol, col_var95, col_var99 = st.columns(3)
+                        col_vol.metric("포트폴리오 연변동성", f"{result['annual_vol'] * 100:.1f}%")
+                        col_var95.metric("1일 VaR 95%", f"{result['var'][0.95]['parametric']:,.0f} 원",
+                                         f"역사적 {result['var'][0.95]['historical']:,.0f} 원", delta_color="off")
+                        col_var99.metric("1일 VaR 99%", f"{result['var'][0.99]['parametric']:,.0f} 원",
+                                         f"역사적 {result['var'][0.99]['historical']:,.0f} 원", delta_color="off")
+                        if book.total_value and result['total'] < book.total_value:
+                            st.caption(f"평가액의 {result['total'] / book.total_value * 100:.0f}%만 반영됨 (부동산 등 일별 시세가 없는 자산 제외)")
+                stats = risk_model.stats()
+                st.caption(
+                    f"주말/휴장일은 평일 달력에 맞춰 직전 종가를 사용하고, 외화 자산은 일별 환율로 원화 환산합니다. "
+                    f"· {stats['assets']}개 시계열 × {stats['rows']}일 (증분 {stats['incremental']}회, 전체 {stats['full']}회)"
+                )
+
+def format_coin_price(price):
+    return f"{price:,.0f}" if price >= 100 else f"{price:,.4g}"
+
+# [NEW] 업비트 전체 KRW 마켓 스크리너
+# 요약 타일과 같은 주기로 이 프래그먼트만 다시 실행되며, 시세 스냅샷은 같은 주기의 모든 세션이 공유합니다.
+@st.fragment(run_every=TILE_REFRESH_SEC)
+@profiler.timed("screener")
+def render_screener():
+    col_sort, col_limit, col_min = st.columns([0.55, 0.15, 0.3])
+    with col_sort:
+        sort_by = st.radio("정렬 기준", list(screener.SORT_KEYS), horizontal=True, key="screener_sort", label_visibility="collapsed")
+    with col_limit:
+        limit = st.selectbox("표시 개수", [10, 20, 30], key="screener_limit", label_visibility="collapsed")
+    with col_min:
+        min_value = st.number_input("최소 거래대금 (24h, 억 원)", min_value=0, value=screener.DEFAULT_MIN_VALUE_EOK,
+                                    step=10, key="screener_min_value")
+
+    market_dict = data_manager.get_upbit_markets()
+    snapshot = data_manager.get_upbit_snapshot()
+    if snapshot.empty:
+        st.warning("업비트 시세를 불러올 수 없습니다.")
+        return
+    names = {market: name for name, market in market_dict.items()}
+    ranked = screener.top(screener.enrich(snapshot, names), sort_by, limit, min_value * 1e8)
+    if ranked.empty:
+        st.info("조건에 맞는 마켓이 없습니다. 최소 거래대금을 낮춰보세요.")
+        return
+
+    widths = [0.32, 0.18, 0.12, 0.18, 0.1, 0.1]
+    for col, label in zip(st.columns(widths), ["코인", "현재가", "등락률", "거래대금(24h)", "변동폭", ""]):
+        col.caption(label)
+    watched = st.session_state.get('selected_coins_state', [])
+    for row in ranked.itertuples(index=False):
+        c_name, c_price, c_change, c_value, c_range, c_add = st.columns(widths, vertical_alignment="center")
+        c_name.write(row.label)
+        c_price.write(format_coin_price(row.price))
+        c_change.write(f":{'red' if row.change_pct > 0 else 'blue'}[{row.change_pct:+.2f}%]")
+        c_value.write(f"{row.value_24h / 1e8:,.0f}억")
+        c_range.write(f"{row.range_pct:.1f}%")
+        if row.label in watched:
+            c_add.write("✓")
+        elif row.label in market_dict and c_add.button("➕", key=f"scr_add_{row.market}", help="대시보드에 추가"):
+            # 사이드바 코인 선택 목록에 추가하고 전체 재실행하여 타일/차트에 반영
+            st.session_state['selected_coins_state'].append(row.label)
+            utils.save_config()
+            st.toast(f"'{row.label}'을(를) 대시보드에 추가했습니다.", icon="➕")
+            st.rerun()
+    st.caption(f"업비트 KRW {len(snapshot)}개 마켓 · {TILE_REFRESH_SEC}초마다 갱신 · 종합 점수는 |등락률|·거래대금·변동폭 순위 평균")
+
+with st.expander("🔎 코인 스크리너 (업비트 전체 KRW 마켓)", expanded=False):
+    # 전체 마켓 시세를 주기적으로 조회하므로 켜둔 경우에만 실행
+    if st.toggle("스크리너 켜기", key="screener_enabled"):
+        render_screener()
+
+# [NEW] 지역 전체 실거래 이상 거래 스캐너 (관심 단지가 있는 시군구 대상)
+scan_regions = list(dict.fromkeys(f['lawd_cd'] for f in st.session_state['favorite_apts']))
+if use_real_estate and scan_regions:
+    with st.expander("🚨 실거래 이상 거래 스캐너 (지역 전체 단지·면적)", expanded=False):
+        col_region, col_period, col_toggle = st.columns([0.4, 0.4, 0.2])
+        with col_region:
+            scan_lawd = st.selectbox("지역", scan_regions, format_func=get_district_name, key="anomaly_region", label_visibility="collapsed")
+        with col_period:
+            scan_period = st.radio("기간", ["1년", "3년", "5년"], horizontal=True, key="anomaly_period", label_visibility="collapsed")
+        with col_toggle:
+            # 지역 전체의 여러 해 거래를 불러오므로 필요할 때만 계산
+            scan_enabled = st.toggle("스캔하기", key="anomaly_enabled")
+        scan_key = os.getenv("DATA_GO_KR_API_KEY") or st.session_state.get("input_service_key")
+        if scan_enabled and not scan_key:
+            st.warning("공공데이터포털 인증키가 필요합니다.")
+        elif scan_enabled:
+            scan_months = {"1년": 12, "3년": 36, "5년": 60}[scan_period]
+            with profiler.stage("anomaly_scan"), st.spinner("지역 실거래를 불러와 단지·면적별 추세 밴드를 적합하는 중..."):
+                ts = st.session_state.get('cache_invalidation_ts', {}).get(scan_lawd, 0)
+                month_data = anomaly_scanner.load_months(scan_key, scan_lawd, scan_months, cache_ts=ts)
+                # 지역/기간별 스캐너를 세션에 보관하여 새 달이 들어오면 관련 그룹만 다시 적합
+                scanner = st.session_state.setdefault('anomaly_scanners', {}).setdefault(
+                    (scan_lawd, scan_months), anomaly_scanner.AnomalyScanner()
+                )
+                scanner.update(month_data)
+
+            col_sort, col_z = st.columns([0.6, 0.4])
+            with col_sort:
+                scan_sort = st.radio("정렬 기준", list(anomaly_scanner.SORT_KEYS), horizontal=True, key="anomaly_sort", label_visibility="collapsed")
+            with col_z:
+                min_z = st.slider("최소 |z|", min_value=anomaly_scanner.BAND_K, max_value=5.0, value=2.0, step=0.5, key="anomaly_min_z")
+            flagged = scanner.flagged(min_z, scan_sort)
+            stats = scanner.stats()
+            if stats['deals'] == 0:
+                st.info(f"최근 {scan_period}간 해당 지역의 거래 데이터가 없습니다.")
+            elif flagged.empty:
+                st.info("조건에 맞는 이상 거래가 없습니다. 최소 |z|를 낮춰보세요.")
+            else:
+                st.dataframe(pd.DataFrame({
+                    "계약일": flagged['계약일'].dt.date,
+                    "단지": flagged['아파트'],
+                    "법정동": flagged['법정동'],
+                    "전용면적": flagged['전용면적'],
+                    "층": flagged['층'],
+                    "거래금액(억)": (flagged['거래금액'] / 10000).round(2),
+                    "추세가(억)": (flagged['추세가'] / 10000).round(2),
+                    "괴리율(%)": flagged['괴리율'].round(1),
+                    "z": flagged['z'].round(2),
+                    "신고가": flagged['신고가'].map({True: "🔺", False: ""}),
+                    "면적 거래수": flagged['그룹거래수'],
+                }), hide_index=True, width="stretch", height=420)
+            st.caption(
+                f"상세 차트와 같은 추세 밴드(최대 3차 회귀 ± 잔차 표준편차 {anomaly_scanner.BAND_K}배)를 단지·면적별로 적합하고, "
+                f"거래 {anomaly_scanner.MIN_DEALS}건 미만 면적은 제외합니다. "
+                f"· {stats['months']}개월 {stats['deals']:,}건, {stats['groups']:,}개 단지·면적 "
+                f"(최근 갱신 {stats['refit_groups']:,}개 재적합, 증분 {stats['incremental']}회, 전체 {stats['full']}회)"
+            )
+            if len(flagged):
+                st.caption(f"밴드 밖 거래 {len(flagged):,}건 · 열 제목을 눌러 정렬할 수 있습니다.")
 
 st.divider()
 
@@ -603,6 +939,7 @@ tab1, tab2, tab3 = st.tabs(["📊 차트 분석", "📋 상세 데이터", "🤖
 with tab1:
     st.subheader("자산 가격 변동 추이")
     target = st.session_state.get('selected_asset')
+    figure_cache = charts.get_figure_cache()
     
     if target:
         lawd_cd_for_cache = None
@@ -641,7 +978,7 @@ with tab1:
             if target['type'] == 'real_estate' and lawd_cd_for_cache:
                 if st.button("🔄 캐시 새로고침"):
                     st.session_state.setdefault('cache_invalidation_ts', {})[lawd_cd_for_cache] = time.time()
-                    st.toast(f"'{target['label']}' 지역의 캐시가 삭제되었습니다.", icon="🧹")
+                    st.toast(f"'{target['label']}' 지역 데이터를 확인합니다. (변경된 달만 다시 조회)", icon="🧹")
                     st.rerun()
                 
                 ts = st.session_state.get('cache_invalidation_ts', {}).get(lawd_cd_for_cache, 0)
@@ -676,37 +1013,41 @@ with tab1:
                 st.session_state['selected_asset'] = None
                 st.rerun()
         
+        # [NEW] 기술적 지표 오버레이 선택 (캐시된 캔들로 계산하므로 외부 호출 없음)
+        overlays = []
+        if target['type'] in ['coin', 'stock_rec', 'stock_custom', 'exchange']:
+            overlays = st.multiselect(
+                "보조지표", list(indicators.OVERLAYS), key="chart_overlays",
+                placeholder="SMA, EMA, 볼린저 밴드, RSI, MACD, ATR", label_visibility="collapsed"
+            )
+
         # 1. 코인 차트 (업비트)
         if target['type'] == 'coin':
             coin_market_dict = data_manager.get_upbit_markets()
             ticker = coin_market_dict.get(target['id'])
             if ticker:
-                try:
-                    # 기간별 API 호출 설정
-                    if period == "1주일":
-                        url = f"https://api.upbit.com/v1/candles/days?market={ticker}&count=7"
-                    elif period == "1개월":
-                        url = f"https://api.upbit.com/v1/candles/days?market={ticker}&count=30"
-                    elif period == "3개월":
-                        url = f"https://api.upbit.com/v1/candles/days?market={ticker}&count=90"
-                    elif period == "1년":
-                        url = f"https://api.upbit.com/v1/candles/weeks?market={ticker}&count=52"
-                    elif period == "5년":
-                        url = f"https://api.upbit.com/v1/candles/months?market={ticker}&count=60"
-                    elif period == "10년":
-                        url = f"https://api.upbit.com/v1/candles/months?market={ticker}&count=120"
-                    else: # 전체
-                        url = f"https://api.upbit.com/v1/candles/months?market={ticker}&count=200"
-
-                    df = pd.DataFrame(requests.get(url).json())
-                    df['trade_price'] = df['trade_price'].astype(float)
-                    df['date'] = pd.to_datetime(df['candle_date_time_kst'])
-                    
-                    fig = px.line(df, x='date', y='trade_price', title=f"{target['label']} 가격 추이")
-                    fig.update_layout(hovermode="x unified") # 마우스 오버 시 정보 표시
-                    st.plotly_chart(fig, width="stretch")
-                except:
+                # 기간별 캔들 단위/표시 개수 (조회는 단위별 최대 개수로 한 번만 하여 기간/지표가 같은 캐시를 공유)
+                unit, count = {
+                    "1주일": ("days", 7), "1개월": ("days", 30), "3개월": ("days", 90),
+                    "1년": ("weeks", 52), "5년": ("months", 60), "10년": ("months", 120),
+                }.get(period, ("months", 200))
+                df = data_manager.get_upbit_candles(ticker, unit=unit, count=data_manager.UPBIT_CANDLE_COUNT).tail(count)
+                if df.empty:
                     st.error("차트 데이터를 불러올 수 없습니다.")
+                elif overlays:
+                    ohlcv, ind = indicators.upbit_indicators(ticker, unit)
+                    ohlcv, ind = ohlcv.tail(count), ind.tail(count)
+                    fig_key = (ticker, period, charts.data_version(ohlcv), tuple(overlays), indicators.params_key())
+                    fig = figure_cache.get_or_build(
+                        fig_key, lambda: charts.indicator_figure(ohlcv, ind, f"{target['label']} 가격 추이", overlays)
+                    )
+                    st.plotly_chart(fig, width="stretch")
+                else:
+                    fig_key = (ticker, period, charts.data_version(df))
+                    fig = figure_cache.get_or_build(
+                        fig_key, lambda: charts.price_line_figure(df, 'date', 'trade_price', f"{target['label']} 가격 추이")
+                    )
+                    st.plotly_chart(fig, width="stretch")
         
         # 2. 주식 차트 (Yahoo Finance)
         elif target['type'] in ['stock_rec', 'stock_custom', 'exchange']:
@@ -716,20 +1057,24 @@ with tab1:
             
             if ticker:
                 try:
-                    # 기간별 파라미터 매핑
-                    yf_period = "1mo"
-                    if period == "1주일": yf_period = "5d"
-                    elif period == "1개월": yf_period = "1mo"
-                    elif period == "3개월": yf_period = "3mo"
-                    elif period == "1년": yf_period = "1y"
-                    elif period == "5년": yf_period = "5y"
-                    elif period == "10년": yf_period = "10y"
-                    else: yf_period = "max"
-
-                    df = yf.Ticker(ticker).history(period=yf_period)
+                    # 기간별 파라미터 매핑 (1년 이하는 1년 일봉을 한 번 조회해 잘라서 표시 - 기간/지표가 같은 캐시 공유)
+                    trim_days = {"1주일": 7, "1개월": 31, "3개월": 92}.get(period)
+                    yf_period = {"5년": "5y", "10년": "10y", "전체": "max"}.get(period, "1y")
+
+                    df = data_manager.get_stock_history(ticker, period=yf_period)
+                    if trim_days and not df.empty:
+                        df = df[df.index >= df.index[-1] - pd.Timedelta(days=trim_days)]
                     
                     if df.empty:
                         st.warning("해당 기간의 데이터가 없습니다.")
+                    elif overlays:
+                        ohlcv, ind = indicators.stock_indicators(ticker, yf_period)
+                        ohlcv, ind = ohlcv.loc[df.index], ind.loc[df.index]
+                        fig_key = (ticker, period, charts.data_version(ohlcv), tuple(overlays), indicators.params_key())
+                        fig = figure_cache.get_or_build(
+                            fig_key, lambda: charts.indicator_figure(ohlcv, ind, f"{target['label']} 추이", overlays)
+                        )
+                        st.plotly_chart(fig, width="stretch")
                     else:
                         # 인덱스(Date)를 컬럼으로 변환하여 Plotly에 사용
                         df = df.reset_index()
@@ -739,8 +1084,10 @@ with tab1:
                         if 'Date' not in df.columns:
                             date_col = 'Datetime' if 'Datetime' in df.columns else df.columns[0]
 
-                        fig = px.line(df, x=date_col, y='Close', title=f"{target['label']} 추이")
-                        fig.update_layout(hovermode="x unified")
+                        fig_key = (ticker, period, charts.data_version(df))
+                        fig = figure_cache.get_or_build(
+                            fig_key, lambda: charts.price_line_figure(df, date_col, 'Close', f"{target['label']} 추이")
+                        )
                         st.plotly_chart(fig, width="stretch")
                 except Exception as e:
                     st.error(f"차트 데이터를 불러올 수 없습니다: {e}")
@@ -762,7 +1109,7 @@ with tab1:
                 elif period == "5년": months = 60
                 
                 ts = st.session_state.get('cache_invalidation_ts', {}).get(lawd_cd, 0)
-                period_data = data_manager.get_period_apt_data(service_key, lawd_cd, months=months, _cache_ts=ts)
+                period_data = data_manager.get_period_apt_data(service_key, lawd_cd, months=months, cache_ts=ts)
                 
                 if period_data.empty:
                     st.info(f"최근 {period}간 해당 지역의 거래 데이터가 없습니다.")
@@ -811,74 +1158,10 @@ with tab1:
                                     c1, c2 = st.columns([0.6, 0.4])
                                     
                                     with c1:
-                                        fig = px.scatter(
-                                            filtered_df.sort_values('계약일'), 
-                                            x='계약일', y='거래금액_억', 
-                                            hover_data=['층', '전용면적', '평형', '거래금액'],
-                                            template='plotly_white', # 깔끔한 흰색 배경
-                                            color_discrete_sequence=['#4C78A8'] # 차분한 파란색
+                                        fig_key = (lawd_cd, apt_name, area, period, charts.data_version(filtered_df))
+                                        fig = figure_cache.get_or_build(
+                                            fig_key, lambda: charts.trade_scatter_figure(filtered_df, area)
                                         )
-                                        
-                                        # [NEW] 추세선 및 변동폭(채널) 추가 - Trend 방향과 폭 시각화
-                                        if len(filtered_df) >= 2:
-                                            df_sorted = filtered_df.sort_values('계약일')
-                                            # 회귀분석을 위한 수치형 변환
-                                            x_numeric = df_sorted['계약일'].map(lambda x: x.timestamp())
-                                            y_values = df_sorted['거래금액_억']
-                                            
-                                            # [CHANGED] 다차 회귀분석 (Polynomial Regression)
-                                            # 데이터 개수에 따라 차수 동적 결정 (최대 3차)
-                                            degree = min(3, len(filtered_df) - 1)
-                                            coeffs = np.polyfit(x_numeric, y_values, degree)
-                                            poly_eqn = np.poly1d(coeffs)
-                                            trend_line = poly_eqn(x_numeric)
-                                            
-                                            # 변동폭 계산 (Standard Deviation of Residuals)
-                                            # 다차 회귀이므로 복잡한 예측 구간 공식 대신 잔차 표준편차 활용
-                                            residuals = y_values - trend_line
-                                            std_dev = residuals.std()
-                                            
-                                            # 민감도 1.5배 적용 (약 87% 신뢰구간)
-                                            upper_bound = trend_line + (1.5 * std_dev)
-                                            lower_bound = trend_line - (1.5 * std_dev)
-                                            
-                                            # 1. 상단 밴드 (투명선)
-                                            fig.add_trace(go.Scatter(
-                                                x=df_sorted['계약일'], y=upper_bound,
-                                                mode='lines', line=dict(width=0),
-                                                showlegend=False, hoverinfo='skip'
-                                            ))
-                                            # 2. 하단 밴드 (상단과 채우기 = Trend Width)
-                                            fig.add_trace(go.Scatter(
-                                                x=df_sorted['계약일'], y=lower_bound,
-                                                mode='lines', line=dict(width=0),
-                                                fill='tonexty', fillcolor='rgba(76, 120, 168, 0.1)',
-                                                showlegend=False, hoverinfo='skip'
-                                            ))
-                                            # 3. 추세선 (중앙)
-                                            fig.add_trace(go.Scatter(
-                                                x=df_sorted['계약일'], y=trend_line,
-                                                mode='lines', name='추세',
-                                                line=dict(color='rgba(255, 99, 71, 0.8)', width=2, dash='dash'),
-                                                showlegend=False # [CHANGED] 범례 숨김
-                                            ))
-                                        
-                                        # 마커 디자인 개선 (크기 확대, 테두리 추가, 투명도)
-                                        fig.update_traces(
-                                            marker=dict(size=12, line=dict(width=1, color='white'), opacity=0.8)
-                                        )
-                                        
-                                        # 레이아웃 정리 (타이틀 폰트, 여백, 축 설정)
-                                        fig.update_layout(
-                                            title=dict(text=f"{area}㎡ 실거래가 추이", font=dict(size=18, color="#333333")),
-                                            yaxis_title="거래금액 (억원)", 
-                                            xaxis_title=None, # X축 타이틀 제거
-                                            height=500, # [CHANGED] 차트 높이 확대
-                                            margin=dict(t=50, b=20, l=20, r=20),
-                                            hovermode="closest"
-                                        )
-                                        fig.update_yaxes(tickformat=".2f")
-                                        
                                         st.plotly_chart(fig, width="stretch")
                                     
                                     with c2:
@@ -890,8 +1173,15 @@ with tab1:
                                             hide_index=True,
                                             height=400
                                         )
+        # 차트 캐시 적중률 (관련 없는 위젯 변경 시 재사용 여부 확인용)
+        fig_stats = figure_cache.stats()
+        st.caption(
+            f"🧩 차트 캐시: 적중 {fig_stats['hits']}/{fig_stats['hits'] + fig_stats['misses']}회 "
+            f"({fig_stats['hit_rate']:.0%}), {fig_stats['entries']}개, 평균 생성 {fig_stats['avg_build_ms']:.0f}ms"
+        )
     else:
         st.info("👆 대시보드에서 항목을 클릭하면 상세 차트가 표시됩니다.")
+    profiler.checkpoint("charts")
     
 with tab2:
     st.subheader("상세 정보 및 뉴스")
@@ -901,17 +1191,13 @@ with tab2:
         st.markdown(f"### {target['label']}")
         
         # 검색어 추출 (이모지 제거 및 괄호 앞부분 추출)
-        query = target['label']
-        for emoji in ["🪙", "📈", "💵", "🏠"]:
-            query = query.replace(emoji, "")
-        query = query.split('(')[0].strip()
-        
-        if target['type'] == 'exchange':
-            query = "원달러 환율"
+        query = utils.get_news_query(target)
 
         # 1. 뉴스 (주식, 코인, 환율)
         if target['type'] in ['stock_rec', 'stock_custom', 'exchange', 'coin']:
-            utils.display_news(query)
+            # [CHANGED] 백그라운드에서 미리 가져온 뉴스 캐시를 사용
+            with profiler.stage("news"):
+                utils.display_news(query, ticker=news_ticker_for(target))
             
             # 코인인 경우 네이버 검색 링크 추가
             if target['type'] == 'coin':
@@ -946,6 +1232,7 @@ with tab2:
                 
     else:
         st.info("👆 대시보드에서 항목을 선택하면 상세 정보와 뉴스를 확인할 수 있습니다.")
+    profiler.checkpoint("details")
 
 with tab3:
     st.subheader("🤖 AI 투자 분석 리포트")
@@ -955,105 +1242,90 @@ with tab3:
         st.warning("⚠️ Gemini API Key가 설정되지 않았습니다. 사이드바의 'AI 설정'에서 키를 입력하거나 .env 파일에 GEMINI_API_KEY를 설정해주세요.")
     else:
         target = st.session_state.get('selected_asset')
-        
-        if target and target.get('type') != 'info':
+        model_name = st.session_state.get('selected_ai_model', 'models/gemini-1.5-flash')
+        r_key = os.getenv("DATA_GO_KR_API_KEY") or st.session_state.get("input_service_key")
+
+        # [NEW] 분석 모드 선택: 선택한 자산 1개 또는 대시보드 전체 (1회 호출)
+        report_mode = st.radio("분석 대상", ["선택 자산", "전체 포트폴리오"], horizontal=True, key="ai_report_mode")
+
+        # [CHANGED] 리포트 생성은 백그라운드 작업 큐에서 실행 (탭/자산 전환 시에도 계속 진행)
+        job_queue = report_jobs.get_job_queue()
+        session_id = report_jobs.current_session_id()
+        # 작업 스레드에서는 세션 상태에 접근할 수 없으므로 필요한 값을 미리 복사
+        favorite_apts = [dict(f) for f in st.session_state['favorite_apts']]
+        cache_ts_map = dict(st.session_state.get('cache_invalidation_ts', {}))
+
+        if report_mode == "전체 포트폴리오":
+            portfolio_tiles = [dict(t) for t in ordered_tiles if t['type'] != 'info']
+            st.markdown(f"### 📊 전체 포트폴리오 분석 ({len(portfolio_tiles)}개 자산)")
+
+            if st.button("포트폴리오 리포트 요청 ✨", type="primary", width="stretch"):
+                def portfolio_work():
+                    # 자산별 고정 길이 수치 요약 (동시 수집)
+                    summaries = context_builder.collect_portfolio_summaries(
+                        portfolio_tiles, favorite_apts, service_key=r_key, cache_invalidation_ts=cache_ts_map
+                    )
+                    yield from ai_manager.stream_portfolio_report(gemini_api_key, model_name, summaries)
+
+                job_queue.submit("전체 포트폴리오", portfolio_work, owner=session_id)
+                st.toast("포트폴리오 리포트 생성을 요청했습니다.", icon="📝")
+
+        elif target and target.get('type') != 'info':
             st.markdown(f"### 📊 {target['label']} 심층 분석")
-            
-            if st.button("AI 리포트 생성하기 ✨", type="primary", width="stretch"):
-                with st.spinner(f"Gemini가 {target['label']} 데이터를 분석하고 있습니다..."):
-                    try:
-                        # 컨텍스트 데이터 수집
-                        context_text = f"자산명: {target['label']}\n현재가: {target['value']}\n변동률: {target['delta']}\n"
-                        
-                        # 1. 코인 데이터 추가 수집
-                        if target['type'] == 'coin':
-                            coin_market_dict = data_manager.get_upbit_markets()
-                            ticker = coin_market_dict.get(target['id'])
-                            if ticker:
-                                url = f"https://api.upbit.com/v1/candles/days?market={ticker}&count=7"
-                                candles = requests.get(url).json()
-                                context_text += "\n[최근 7일 가격 추이]\n"
-                                for c in candles:
-                                    context_text += f"날짜: {c['candle_date_time_kst'][:10]}, 종가: {c['trade_price']}, 등락률: {c['change_rate']*100:.2f}%\n"
-
-                        # 2. 주식 데이터 추가 수집
-                        elif target['type'] in ['stock_rec', 'stock_custom', 'exchange']:
-                            ticker = target['id']
-                            if target['type'] == 'stock_rec':
-                                ticker = utils.STOCK_RECOMMENDATIONS.get(target['id'], target['id'])
-                            
-                            stock = yf.Ticker(ticker)
-                            hist = stock.history(period="1mo")
-                            context_text += "\n[최근 1개월 주가 추이 요약]\n"
-                            context_text += f"최고가: {hist['High'].max()}\n최저가: {hist['Low'].min()}\n평균가: {hist['Close'].mean()}\n"
-                            
-                            # 뉴스 헤드라인 추가
-                            news = stock.news
-                            if news:
-                                context_text += "\n[최근 관련 뉴스 헤드라인]\n"
-                                for n in news[:3]:
-                                    context_text += f"- {n['title']}\n"
-
-                        # 3. 부동산 데이터 추가 수집
-                        elif target['type'] == 'real_estate':
-                            if 0 <= target['id'] < len(st.session_state['favorite_apts']):
-                                apt_info = st.session_state['favorite_apts'][target['id']]
-                                
-                                # API Key 확보
-                                r_key = os.getenv("DATA_GO_KR_API_KEY")
-                                if not r_key:
-                                    r_key = st.session_state.get("input_service_key")
-                                
-                                if r_key:
-                                    ts = st.session_state.get('cache_invalidation_ts', {}).get(apt_info['lawd_cd'], 0)
-                                    yearly_df = data_manager.get_period_apt_data(r_key, apt_info['lawd_cd'], months=12, _cache_ts=ts)
-                                    if not yearly_df.empty:
-                                        apt_df = yearly_df[yearly_df['아파트'] == apt_info['apt_name']]
-                                        if not apt_df.empty:
-                                            context_text += f"\n[대상 아파트: {apt_info['apt_name']} - 최근 1년 거래 요약]\n"
-                                            
-                                            # 전용면적별 통계 추가
-                                            for area in sorted(apt_df['전용면적'].unique()):
-                                                area_df = apt_df[apt_df['전용면적'] == area]
-                                                avg_p = area_df['거래금액'].mean()
-                                                max_p = area_df['거래금액'].max()
-                                                min_p = area_df['거래금액'].min()
-                                                cnt = len(area_df)
-                                                context_text += f"- 전용 {area}㎡: {cnt}건 거래, 평균 {avg_p:.0f}만원 (최고 {max_p}, 최저 {min_p})\n"
-                                            
-                                            context_text += f"최근 거래일: {apt_df['계약일'].max()}\n"
-
-                                            # 주변 아파트 비교 (같은 법정동)
-                                            if '법정동' in yearly_df.columns:
-                                                target_dong = apt_df.iloc[0]['법정동']
-                                                surrounding = yearly_df[(yearly_df['법정동'] == target_dong) & (yearly_df['아파트'] != apt_info['apt_name'])].copy()
-                                                
-                                                if not surrounding.empty:
-                                                    context_text += f"\n[주변 아파트 ({target_dong}) 비교 데이터]\n"
-                                                    # 평당가(3.3m2) 계산
-                                                    my_avg_py = (apt_df['거래금액'] / apt_df['전용면적'] * 3.3).mean()
-                                                    other_avg_py = (surrounding['거래금액'] / surrounding['전용면적'] * 3.3).mean()
-                                                    
-                                                    context_text += f"- 대상 단지 평균 평당가: {my_avg_py:.0f}만원\n"
-                                                    context_text += f"- 주변 단지 평균 평당가: {other_avg_py:.0f}만원\n"
-                                                    
-                                                    # 주변 시세 상위 단지
-                                                    surrounding['평당가'] = surrounding['거래금액'] / surrounding['전용면적'] * 3.3
-                                                    top_apts = surrounding.groupby('아파트')['평당가'].mean().sort_values(ascending=False).head(3)
-                                                    context_text += "- 주변 시세 상위 단지 (평당가):\n"
-                                                    for name, val in top_apts.items():
-                                                        context_text += f"  * {name}: {val:.0f}만원\n"
-
-                        # Gemini 호출 (ai_manager 사용)
-                        model_name = st.session_state.get('selected_ai_model', 'models/gemini-1.5-flash')
-                        report = ai_manager.generate_investment_report(gemini_api_key, model_name, context_text)
-                        st.markdown(report)
-                        
-                    except Exception as e:
-                        st.error(f"리포트 생성 중 오류가 발생했습니다: {e}")
+
+            if st.button("AI 리포트 요청 ✨", type="primary", width="stretch"):
+                job_target = dict(target)
+
+                def asset_work():
+                    # 컨텍스트 데이터 수집 (캐시 기반, 소스별 동시 수집)
+                    context_text = context_builder.build_context(
+                        job_target, favorite_apts, service_key=r_key, cache_invalidation_ts=cache_ts_map
+                    )
+                    # Gemini 호출 (캐시 적중 시 즉시, 아니면 스트리밍)
+                    yield from ai_manager.stream_investment_report(gemini_api_key, model_name, context_text)
+
+                job_queue.submit(job_target['label'], asset_work, owner=session_id)
+                st.toast(f"'{job_target['label']}' 리포트 생성을 요청했습니다.", icon="📝")
         else:
             st.info("👆 대시보드에서 분석할 자산 항목을 선택해주세요.")
 
+        # [NEW] 요청한 리포트 목록 (진행 중인 작업이 있으면 주기적으로 상태 폴링)
+        has_active_jobs = any(j.active for j in job_queue.list_jobs(session_id))
+
+        @st.fragment(run_every=2 if has_active_jobs else None)
+        def render_report_jobs():
+            jobs = job_queue.list_jobs(session_id)
+            if not jobs:
+                return
+
+            st.divider()
+            st.markdown("#### 📝 리포트 작업")
+            for job in jobs:
+                with st.expander(f"{report_jobs.STATUS_LABELS[job.status]} · {job.label}", expanded=job.active or job.status == report_jobs.DONE):
+                    col_info, col_action = st.columns([0.8, 0.2])
+                    with col_info:
+                        st.caption(f"요청: {datetime.datetime.fromtimestamp(job.created_at).strftime('%H:%M:%S')} · ID {job.id}")
+                    with col_action:
+                        if job.active:
+                            if st.button("취소", key=f"cancel_job_{job.id}"):
+                                job_queue.cancel(job.id)
+                                st.rerun(scope="fragment")
+                        elif st.button("삭제", key=f"remove_job_{job.id}"):
+                            job_queue.remove(job.id)
+                            st.rerun(scope="fragment")
+
+                    if job.error:
+                        st.error(f"리포트 생성 중 오류가 발생했습니다: {job.error}")
+                    if job.text:
+                        st.markdown(job.text)
+
+            # 모든 작업이 끝나면 전체 재실행으로 폴링 중지
+            if has_active_jobs and not any(j.active for j in jobs):
+                st.rerun()
+
+        render_report_jobs()
+    profiler.checkpoint("ai_report")
+
 # 스타일링
 st.markdown("""
     <style>
@@ -1096,4 +1368,21 @@ st.markdown("""
         height: auto !important;
     }
     </style>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """, unsafe_allow_html=True)
+
+# [NEW] 성능 계측 디버그 패널 (DASHBOARD_PROFILE=1)
+if run_profile is not None:
+    # 부하 테스트 도구(benchmarks/load_test.py)가 세션별 외부 호출 수를 집계할 때 사용
+    st.session_state['last_run_profile'] = run_profile
+    with st.expander(f"🛠️ 성능 프로파일 (이번 실행 {run_profile.total_sec * 1000:.0f}ms)", expanded=False):
+        if run_profile.stages:
+            stage_df = pd.DataFrame(run_profile.stages)
+            stage_df['ms'] = (stage_df['sec'] * 1000).round(1)
+            st.dataframe(stage_df[['stage', 'ms']], hide_index=True, width="stretch")
+        if run_profile.calls:
+            call_df = pd.DataFrame(run_profile.calls)
+            call_df['ms'] = (call_df['sec'] * 1000).round(1)
+            st.dataframe(call_df[['provider', 'endpoint', 'cache_hit', 'bytes', 'ms']], hide_index=True, width="stretch")
+        else:
+            st.caption("이번 실행에서 외부 호출이 없었습니다.")
+        st.download_button("Prometheus 지표 다운로드", profiler.prometheus_text(), file_name="metrics.prom", mime="text/plain")
@@ -0,0 +1,160 @@
+import os
+import json
+import bisect
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import data_store
+
+# 초성 / 중성 / 종성 (호환용 자모)
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+             "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+_HANGUL_BASE, _HANGUL_LAST = 0xAC00, 0xD7A3
+
+def _normalize(text: str) -> str:
+    return "".join(text.split()).lower()
+
+def to_jamo(text: str) -> str:
+    """한글 음절을 자모 단위로 분해합니다. (예: '만촌' -> 'ㅁㅏㄴㅊㅗㄴ')"""
+    out = []
+    for ch in _normalize(text):
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            idx = code - _HANGUL_BASE
+            out.append(CHOSEONG[idx // 588])
+            out.append(JUNGSEONG[(idx % 588) // 28])
+            out.append(JONGSEONG[idx % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+def to_choseong(text: str) -> str:
+    """한글 음절의 초성만 추출합니다. (예: '만촌자이' -> 'ㅁㅊㅈㅇ')"""
+    out = []
+    for ch in _normalize(text):
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            out.append(CHOSEONG[(code - _HANGUL_BASE) // 588])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+def _is_choseong_query(query: str) -> bool:
+    return bool(query) and all(ch in CHOSEONG for ch in query)
+
+class AptCatalog:
+    """지역별 아파트 이름 목록과 검색 인덱스
+
+    이름은 로컬 저장소(SQLite)에 지역 단위로 upsert되며, 자모/초성 키를 함께 저장합니다.
+    메모리 인덱스는 지역 버전이 바뀐 경우에만 다시 구성하므로 재실행 시 재파싱이 없습니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, float] = {}
+        self._names: Dict[str, List[str]] = {}
+        self._rows: Dict[str, List[Tuple[str, str, str]]] = {}
+        # 전국 검색용 인덱스: 자모 키 기준 정렬된 (jamo, choseong, lawd_cd, name)
+        self._entries: List[Tuple[str, str, str, str]] = []
+        self._jamo_keys: List[str] = []
+
+    def _sync(self) -> None:
+        """저장소의 지역 버전과 비교하여 바뀐 지역만 다시 읽어 인덱스를 갱신합니다."""
+        versions = data_store.get_apt_catalog_versions()
+        changed = [cd for cd, v in versions.items() if self._versions.get(cd) != v]
+        if not changed:
+            return
+        for cd in changed:
+            rows = data_store.get_apt_catalog(cd)
+            self._rows[cd] = rows
+            self._names[cd] = sorted(name for name, _, _ in rows)
+            self._versions[cd] = versions[cd]
+        self._entries = sorted(
+            (jamo, cho, cd, name) for cd, rows in self._rows.items() for name, jamo, cho in rows
+        )
+        self._jamo_keys = [e[0] for e in self._entries]
+
+    def get_names(self, lawd_cd: str) -> List[str]:
+        with self._lock:
+            self._sync()
+            return self._names.get(lawd_cd, [])
+
+    def upsert(self, lawd_cd: str, names: List[str]) -> List[str]:
+        """지역에 이름들을 추가하고 정렬된 전체 목록을 반환합니다."""
+        rows = [(n, to_jamo(n), to_choseong(n)) for n in set(names) if n]
+        with self._lock:
+            if data_store.upsert_apt_names(lawd_cd, rows):
+                self._sync()
+            return self._names.get(lawd_cd, [])
+
+    def search(self, query: str, lawd_cd: Optional[str] = None, limit: int = 50) -> List[Tuple[str, str]]:
+        """이름 접두어/자모/초성으로 검색하여 (lawd_cd, name) 목록을 반환합니다.
+
+        접두어 일치를 먼저, 부분 일치를 나중에 반환합니다. '만ㅊ', '만초', 'ㅁㅊㅈㅇ' 모두 '만촌자이'와 일치합니다.
+        """
+        q = _normalize(query)
+        if not q:
+            return []
+        with self._lock:
+            self._sync()
+            entries, jamo_keys = self._entries, self._jamo_keys
+
+        results: List[Tuple[str, str]] = []
+        seen = set()
+
+        def add(entry) -> bool:
+            key = (entry[2], entry[3])
+            if key not in seen and (lawd_cd is None or entry[2] == lawd_cd):
+                seen.add(key)
+                results.append(key)
+            return len(results) >= limit
+
+        if _is_choseong_query(q):
+            for e in entries:
+                if e[1].startswith(q) and add(e):
+                    return results
+            for e in entries:
+                if q in e[1] and add(e):
+                    return results
+            return results
+
+        # 1) 자모 접두어 일치 (정렬된 키에서 이진 탐색)
+        qj = to_jamo(q)
+        start = bisect.bisect_left(jamo_keys, qj)
+        for i in range(start, len(entries)):
+            if not jamo_keys[i].startswith(qj):
+                break
+            if add(entries[i]):
+                return results
+        # 2) 자모 부분 일치
+        for e in entries:
+            if qj in e[0] and add(e):
+                return results
+        return results
+
+    def import_json(self, path: str) -> int:
+        """기존 apt_list.json 형식({lawd_cd: [이름, ...]})의 목록을 가져옵니다."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        for cd, names in data.items():
+            self.upsert(cd, names)
+        return len(data)
+
+_catalog: Optional[AptCatalog] = None
+_catalog_lock = threading.Lock()
+
+def get_catalog(seed_file: Optional[str] = None) -> AptCatalog:
+    """프로세스에서 공유되는 카탈로그를 반환합니다. 저장소가 비어 있으면 seed_file에서 한 번 가져옵니다."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            catalog = AptCatalog()
+            if seed_file and os.path.exists(seed_file) and not data_store.get_apt_catalog_versions():
+                catalog.import_json(seed_file)
+            _catalog = catalog
+        return _catalog
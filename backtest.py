@@ -0,0 +1,289 @@
+"""가격 알림 규칙 백테스트
+
+수집기(main.py)가 로컬 저장소에 기록한 시세 이력(quote_history)이나 캔들 CSV에 알림 규칙을 적용하여
+규칙이 언제, 몇 번 발동했을지와 발동 이후 수익률(1시간/1일/7일 등)을 보고합니다.
+규칙 판정은 마켓별 전체 가격 배열에 대한 벡터 연산(조건이 거짓 -> 참으로 바뀌는 지점 검출)으로 처리합니다.
+
+규칙 형식 (마켓에는 * ? 와일드카드 사용 가능):
+    KRW-BTC>=100000000      가격이 1억 원 이상이 되는 순간
+    KRW-ETH<=3000000        가격이 300만 원 이하가 되는 순간
+    KRW-*@1h>=5%            직전 1시간 수익률이 +5% 이상이 되는 순간
+    KRW-*@1d<=-10%          직전 1일 수익률이 -10% 이하가 되는 순간
+
+    python backtest.py                                     # main.py의 TARGET_PRICE_BTC 규칙
+    python backtest.py --rule "KRW-*@1h>=5%" --rule "KRW-*@1h<=-5%" --bar 1m --horizons 1h,1d,7d
+    python backtest.py --file candles.csv --rule "KRW-ETH<=3000000" --cooldown 1d --events 20 --json
+"""
+import re
+import sys
+import json
+import time
+import fnmatch
+import argparse
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import data_store
+
+KST = datetime.timezone(datetime.timedelta(hours=9))
+DEFAULT_HORIZONS = "1h,1d,7d"
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_DURATION = re.compile(r"^(\d+)([smhd])$")
+_RULE = re.compile(
+    r"^\s*(?P<pattern>[^@<>=\s]+)\s*(?:@\s*(?P<window>\d+[smhd]))?\s*(?P<op>>=|<=)\s*(?P<value>[+-]?[\d.,_]+)\s*(?P<pct>%)?\s*$"
+)
+
+def parse_duration(text: str) -> int:
+    """'30s', '5m', '1h', '7d' -> 초"""
+    match = _DURATION.match(text.strip())
+    if not match:
+        raise ValueError(f"기간 형식이 올바르지 않습니다: {text} (예: 30s, 5m, 1h, 7d)")
+    return int(match.group(1)) * _UNITS[match.group(2)]
+
+class AlertRule:
+    """알림 규칙 하나: 마켓 패턴, 지표(가격 또는 직전 window초 수익률 %), 비교 방향, 기준값"""
+
+    def __init__(self, text: str):
+        match = _RULE.match(text)
+        if not match:
+            raise ValueError(f"규칙 형식이 올바르지 않습니다: {text} (예: KRW-BTC>=100000000, KRW-*@1h>=5%)")
+        self.text = text.strip()
+        self.pattern = match.group("pattern")
+        self.window = parse_duration(match.group("window")) if match.group("window") else 0
+        self.above = match.group("op") == ">="
+        self.value = float(match.group("value").replace(",", "").replace("_", ""))
+        if self.window and not match.group("pct"):
+            raise ValueError(f"수익률 규칙은 %로 지정해야 합니다: {text}")
+        if match.group("pct") and not self.window:
+            raise ValueError(f"% 기준은 @기간과 함께 사용해야 합니다: {text} (예: KRW-*@1h>=5%)")
+
+    def matches(self, symbol: str) -> bool:
+        return fnmatch.fnmatchcase(symbol, self.pattern)
+
+    def __repr__(self) -> str:
+        return f"AlertRule({self.text!r})"
+
+def resample_last(ts: np.ndarray, price: np.ndarray, step: int) -> Tuple[np.ndarray, np.ndarray]:
+    """틱을 step초 봉의 종가로 줄입니다. (봉 시작 시각, 봉 마지막 가격)"""
+    if not step or len(ts) == 0:
+        return ts, price
+    bucket = (ts // step).astype(np.int64)
+    last = np.flatnonzero(np.diff(bucket, append=bucket[-1] + 1))
+    return bucket[last].astype(float) * step, price[last]
+
+def _bar_step(ts: np.ndarray) -> float:
+    """시각 간격이 모두 같으면(봉 데이터) 그 간격, 아니면 0"""
+    if len(ts) < 2:
+        return 0.0
+    step = ts[1] - ts[0]
+    return float(step) if step > 0 and np.all(np.diff(ts) == step) else 0.0
+
+def _locate(ts: np.ndarray, targets: np.ndarray, side: str, step: float) -> np.ndarray:
+    """np.searchsorted(ts, targets, side)와 같은 결과. 등간격이면 이진 탐색 대신 산술 계산"""
+    if not step:
+        return np.searchsorted(ts, targets, side=side)
+    pos = (targets - ts[0]) / step
+    pos = np.floor(pos) + 1 if side == "right" else np.ceil(pos)
+    return np.clip(pos, 0, len(ts)).astype(np.int64)
+
+def trailing_return(ts: np.ndarray, price: np.ndarray, window: int, step: float = 0.0) -> np.ndarray:
+    """각 시점의 직전 window초 수익률(%) - window초 전 시점(또는 그 이전 마지막 가격) 대비"""
+    j = _locate(ts, ts - window, "right", step) - 1
+    base = price[np.maximum(j, 0)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = (price / base - 1) * 100
+    out[j < 0] = np.nan
+    return out
+
+def forward_returns(ts: np.ndarray, price: np.ndarray, idx: np.ndarray, horizons: List[int], step: float = 0.0) -> np.ndarray:
+    """발동 시점(idx)별 horizon초 뒤 첫 가격 기준 수익률(%) - (발동 수, horizon 수). 이력이 끝나면 NaN"""
+    out = np.full((len(idx), len(horizons)), np.nan)
+    for k, h in enumerate(horizons):
+        j = _locate(ts, ts[idx] + h, "left", step)
+        ok = j < len(ts)
+        out[ok, k] = (price[j[ok]] / price[idx[ok]] - 1) * 100
+    return out
+
+def _apply_cooldown(ts: np.ndarray, idx: np.ndarray, cooldown: int) -> np.ndarray:
+    # 발동 목록만 순회 (봉 단위 반복 없음)
+    if not cooldown or len(idx) < 2:
+        return idx
+    keep, last = [], -np.inf
+    for i, t in zip(idx, ts[idx]):
+        if t - last >= cooldown:
+            keep.append(i)
+            last = t
+    return np.array(keep, dtype=np.int64)
+
+def evaluate_symbol(ts: np.ndarray, price: np.ndarray, rules: List[AlertRule], horizons: List[int],
+                    cooldown: int = 0) -> List[Tuple[AlertRule, np.ndarray, np.ndarray]]:
+    """한 마켓의 가격 배열에 규칙들을 적용합니다. [(규칙, 발동 위치, 이후 수익률 행렬), ...]
+
+    같은 지표(가격 또는 같은 window의 수익률)를 쓰는 규칙은 (시점 × 규칙) 조건 행렬 하나로 함께 판정합니다.
+    """
+    results = []
+    if len(ts) == 0:
+        return [(r, np.empty(0, dtype=np.int64), np.empty((0, len(horizons)))) for r in rules]
+    step = _bar_step(ts)
+    for window in sorted({r.window for r in rules}):
+        group = [r for r in rules if r.window == window]
+        metric = trailing_return(ts, price, window, step) if window else price
+        # 부호를 맞춰 '>=' 비교 한 번으로 판정 (<= 규칙은 -metric >= -value)
+        sign = np.array([1.0 if r.above else -1.0 for r in group])
+        with np.errstate(invalid="ignore"):
+            cond = metric[:, None] * sign >= np.array([r.value for r in group]) * sign
+        # 조건이 거짓 -> 참으로 바뀌는 지점 (처음부터 참이면 첫 시점에 발동)
+        fired = np.empty_like(cond)
+        fired[0] = cond[0]
+        np.greater(cond[1:], cond[:-1], out=fired[1:])
+        for k, rule in enumerate(group):
+            idx = _apply_cooldown(ts, np.flatnonzero(fired[:, k]), cooldown)
+            results.append((rule, idx, forward_returns(ts, price, idx, horizons, step)))
+    return results
+
+def load_store(patterns: List[str], since: float = 0, db_file: Optional[str] = None):
+    """로컬 저장소에서 패턴에 맞는 심볼의 (심볼, ts, 가격) 이력을 하나씩 반환합니다. (메모리 절약)"""
+    for symbol in data_store.list_history_symbols(db_file=db_file):
+        if any(fnmatch.fnmatchcase(symbol, p) for p in patterns):
+            df = data_store.get_quote_history(symbol, since=since, db_file=db_file)
+            if not df.empty:
+                yield symbol, df["ts"].to_numpy(float), df["price"].to_numpy(float)
+
+def load_csv(path: str, patterns: List[str], since: float = 0):
+    """캔들/틱 CSV(symbol|market, ts|timestamp|candle_date_time_kst, price|close|trade_price)를 읽습니다.
+
+    문자열 시각은 시간대가 없으면 KST로 간주하고, 숫자 시각은 초(13자리면 밀리초) 단위로 봅니다.
+    """
+    df = pd.read_csv(path)
+    pick = lambda names: next((c for c in names if c in df.columns), None)
+    sym_col = pick(["symbol", "market"])
+    ts_col = pick(["ts", "timestamp", "candle_date_time_kst", "date", "datetime"])
+    price_col = pick(["price", "close", "trade_price", "Close"])
+    if not (sym_col and ts_col and price_col):
+        raise ValueError(f"CSV에 심볼/시각/가격 컬럼이 필요합니다: {list(df.columns)}")
+
+    raw = df[ts_col]
+    if pd.api.types.is_numeric_dtype(raw):
+        ts = raw.to_numpy(float)
+        ts = np.where(ts > 1e12, ts / 1000, ts)
+    else:
+        parsed = pd.to_datetime(raw)
+        if parsed.dt.tz is None:
+            parsed = parsed.dt.tz_localize(KST)
+        ts = (parsed - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy(float)
+    frame = pd.DataFrame({"symbol": df[sym_col].astype(str), "ts": ts, "price": df[price_col].astype(float)})
+    frame = frame[frame["ts"] >= since].sort_values(["symbol", "ts"], kind="stable")
+    for symbol, g in frame.groupby("symbol", sort=True):
+        if any(fnmatch.fnmatchcase(symbol, p) for p in patterns):
+            yield symbol, g["ts"].to_numpy(float), g["price"].to_numpy(float)
+
+def run(series, rules: List[AlertRule], horizons: List[int], bar: int = 0, cooldown: int = 0) -> Dict:
+    """(심볼, ts, 가격) 이력 반복자에 규칙을 적용하고 발동 내역/요약을 반환합니다."""
+    events, per_rule = [], {r.text: {"symbols": 0, "triggers": 0, "fwd": []} for r in rules}
+    points = symbols = 0
+    load_sec = eval_sec = 0.0
+    started = time.perf_counter()
+    for symbol, ts, price in series:
+        loaded = time.perf_counter()
+        load_sec += loaded - started
+        ts, price = resample_last(ts, price, bar)
+        matched = [r for r in rules if r.matches(symbol)]
+        points += len(ts)
+        symbols += 1
+        for rule, idx, fwd in evaluate_symbol(ts, price, matched, horizons, cooldown):
+            summary = per_rule[rule.text]
+            summary["symbols"] += 1
+            summary["triggers"] += len(idx)
+            summary["fwd"].append(fwd)
+            events.extend(
+                {"rule": rule.text, "symbol": symbol, "ts": float(ts[i]), "price": float(price[i]),
+                 "forward": [None if np.isnan(v) else round(float(v), 3) for v in row]}
+                for i, row in zip(idx, fwd)
+            )
+        started = time.perf_counter()
+        eval_sec += started - loaded
+
+    summaries = []
+    for text, s in per_rule.items():
+        fwd = np.vstack(s["fwd"]) if s["fwd"] else np.empty((0, len(horizons)))
+        with np.errstate(invalid="ignore"):
+            summaries.append({
+                "rule": text,
+                "symbols": s["symbols"],
+                "triggers": s["triggers"],
+                "mean": [_round(np.nanmean(fwd[:, k])) if np.isfinite(fwd[:, k]).any() else None for k in range(len(horizons))],
+                "median": [_round(np.nanmedian(fwd[:, k])) if np.isfinite(fwd[:, k]).any() else None for k in range(len(horizons))],
+                "win_rate": [_round((fwd[:, k][np.isfinite(fwd[:, k])] > 0).mean() * 100) if np.isfinite(fwd[:, k]).any() else None
+                             for k in range(len(horizons))],
+            })
+    events.sort(key=lambda e: e["ts"])
+    return {"symbols": symbols, "points": points, "load_sec": round(load_sec, 3), "eval_sec": round(eval_sec, 3),
+            "rules": summaries, "events": events}
+
+def _round(value) -> float:
+    return round(float(value), 3)
+
+def _fmt_ts(ts: float) -> str:
+    return datetime.datetime.fromtimestamp(ts, tz=KST).strftime("%Y-%m-%d %H:%M")
+
+def _fmt_pct(value) -> str:
+    return "-" if value is None else f"{value:+.2f}%"
+
+def print_report(report: Dict, horizon_labels: List[str], max_events: int) -> None:
+    print(f"마켓 {report['symbols']}개, 가격 {report['points']:,}개 (로딩 {report['load_sec']}초, 평가 {report['eval_sec']}초)")
+    for s in report["rules"]:
+        print(f"\n📐 {s['rule']}  — 마켓 {s['symbols']}개에서 {s['triggers']}회 발동")
+        if s["triggers"]:
+            for k, label in enumerate(horizon_labels):
+                win = "-" if s["win_rate"][k] is None else f"{s['win_rate'][k]:.0f}%"
+                print(f"   {label:>4} 후 수익률  평균 {_fmt_pct(s['mean'][k]):>8}  중앙값 {_fmt_pct(s['median'][k]):>8}  상승 비율 {win:>4}")
+    events = report["events"][-max_events:] if max_events else []
+    if events:
+        print(f"\n최근 발동 {len(events)}건 (KST)")
+        for e in events:
+            fwd = "  ".join(f"{label} {_fmt_pct(v)}" for label, v in zip(horizon_labels, e["forward"]))
+            print(f"  {_fmt_ts(e['ts'])}  {e['symbol']:<12} {e['price']:>16,.4g}  {e['rule']}  {fwd}")
+
+def main(argv=None) -> int:
+    import main as collector   # 기본 규칙(TARGET_PRICE_BTC)
+
+    parser = argparse.ArgumentParser(description="가격 알림 규칙 백테스트 (저장된 시세 이력 사용)")
+    parser.add_argument("--rule", action="append", default=None,
+                        help="알림 규칙 (여러 번 지정 가능, 예: KRW-BTC>=100000000, KRW-*@1h>=5%%)")
+    parser.add_argument("--file", default=None, help="저장소 대신 사용할 캔들/틱 CSV 파일")
+    parser.add_argument("--db", default=None, help="로컬 저장소(SQLite) 파일 경로")
+    parser.add_argument("--days", type=float, default=0, help="최근 N일만 사용 (0이면 전체)")
+    parser.add_argument("--bar", default=None, help="틱을 이 간격의 봉 종가로 줄여서 평가 (예: 1m, 1h)")
+    parser.add_argument("--horizons", default=DEFAULT_HORIZONS, help="발동 이후 수익률 기간 (쉼표 구분)")
+    parser.add_argument("--cooldown", default=None, help="같은 규칙/마켓 재발동 최소 간격 (예: 1h)")
+    parser.add_argument("--events", type=int, default=10, help="출력할 최근 발동 건수")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    try:
+        rules = [AlertRule(r) for r in (args.rule or [f"KRW-BTC>={collector.TARGET_PRICE_BTC}"])]
+        horizon_labels = [h.strip() for h in args.horizons.split(",") if h.strip()]
+        horizons = [parse_duration(h) for h in horizon_labels]
+        bar = parse_duration(args.bar) if args.bar else 0
+        cooldown = parse_duration(args.cooldown) if args.cooldown else 0
+    except ValueError as e:
+        parser.error(str(e))
+
+    since = time.time() - args.days * 86400 if args.days else 0
+    patterns = sorted({r.pattern for r in rules})
+    series = load_csv(args.file, patterns, since) if args.file else load_store(patterns, since, args.db)
+    report = run(series, rules, horizons, bar=bar, cooldown=cooldown)
+
+    if args.json:
+        report["events"] = report["events"][-args.events:] if args.events else []
+        print(json.dumps(report | {"horizons": horizon_labels}, ensure_ascii=False, indent=2))
+    else:
+        print_report(report, horizon_labels, args.events)
+    return 0 if report["symbols"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""부하 테스트용 로컬 가짜 외부 API 서버
+
+Upbit(시세/캔들/마켓 목록), 국토교통부 실거래 API, Yahoo chart/search API, Google News RSS를
+하나의 HTTP 서버에서 경로 접두어별로 흉내 냅니다. 공급자별로 지연 시간, 오류율,
+초당 호출 한도(초과 시 각 공급자의 실제 응답 형식으로 거절)를 설정할 수 있습니다.
+
+    python -m benchmarks.fake_upstream --port 8765 --latency-ms 80 --error-rate 0.01 --rate-limit upbit=10
+
+실행 후 출력되는 환경 변수를 설정하면 앱과 수집기가 이 서버를 사용합니다.
+"""
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks import fixtures
+
+PROVIDERS = ("upbit", "molit", "yahoo", "news")
+MOLIT_PATH = "/molit/getRTMSDataSvcAptTradeDev"
+
+UPBIT_MARKETS = [
+    ("KRW-BTC", "비트코인"), ("KRW-ETH", "이더리움"), ("KRW-XRP", "리플"), ("KRW-SOL", "솔라나"),
+    ("KRW-DOGE", "도지코인"), ("KRW-ADA", "에이다"), ("KRW-AVAX", "아발란체"), ("KRW-DOT", "폴카닷"),
+] + [(f"KRW-T{i:03d}", f"테스트코인{i}") for i in range(220)]   # 실제 KRW 마켓 수(약 230개) 수준
+
+def _seed(*parts) -> int:
+    return int(hashlib.md5("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:8], 16)
+
+class ProviderState:
+    """공급자별 설정(지연/오류율/호출 한도)과 요청 통계"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+
+    def admit(self) -> bool:
+        """토큰 버킷으로 초당 호출 한도를 적용합니다. 한도가 없으면 항상 True."""
+        with self._lock:
+            self.requests += 1
+            if not self.rate_limit:
+                return True
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.throttled += 1
+            return False
+
+    def delay(self) -> None:
+        if self.latency_ms or self.jitter_ms:
+            time.sleep(max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000)
+
+    def fail(self) -> bool:
+        if self.error_rate and random.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return True
+        return False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "throttled": self.throttled, "bytes": self.bytes}
+
+class FakeUpstream:
+    """가짜 외부 API 서버 (백그라운드 스레드에서 실행)"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, providers: Optional[Dict[str, ProviderState]] = None,
+                 molit_rows: int = 300):
+        self.providers = {name: ProviderState() for name in PROVIDERS}
+        self.providers.update(providers or {})
+        self.molit_rows = molit_rows
+        self._molit_cache: Dict[tuple, bytes] = {}
+        self._cache_lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """앱/수집기가 이 서버를 사용하도록 하는 환경 변수"""
+        return {
+            "UPBIT_API_BASE": f"{self.base_url}/upbit",
+            "MOLIT_APT_TRADE_URL": f"{self.base_url}{MOLIT_PATH}",
+            "YAHOO_CHART_BASE": f"{self.base_url}/yahoo",
+            "YAHOO_SEARCH_BASE": f"{self.base_url}/yahoo",
+            "GOOGLE_NEWS_RSS_URL": f"{self.base_url}/news/rss/search",
+        }
+
+    def start(self) -> "FakeUpstream":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self) -> Dict[str, Dict]:
+        return {name: p.stats() for name, p in self.providers.items()}
+
+    # --- 요청 처리 ---
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        url = urlparse(handler.path)
+        provider = url.path.strip("/").split("/", 1)[0]
+        state = self.providers.get(provider)
+        if state is None:
+            self._send(handler, None, 404, b"not found", "text/plain")
+            return
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if not state.admit():
+            self._send(handler, state, *self._throttled(provider))
+            return
+        state.delay()
+        if state.fail():
+            self._send(handler, state, 500, b"internal error", "text/plain")
+            return
+        try:
+            status, body, content_type = self._route(provider, url.path, params)
+        except (KeyError, ValueError) as e:
+            status, body, content_type = 400, str(e).encode("utf-8"), "text/plain"
+        self._send(handler, state, status, body, content_type)
+
+    def _send(self, handler, state: Optional[ProviderState], status: int, body: bytes, content_type: str) -> None:
+        if state is not None:
+            with state._lock:
+                state.bytes += len(body)
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _throttled(self, provider: str):
+        if provider == "molit":
+            # 공공데이터포털은 200 응답 본문의 resultCode로 한도 초과를 알림
+            body = ('<?xml version="1.0" encoding="UTF-8"?><response><header><resultCode>22</resultCode>'
+                    "<resultMsg>LIMITED NUMBER OF SERVICE REQUESTS EXCEEDS ERROR.</resultMsg></header></response>")
+            return 200, body.encode("utf-8"), "application/xml"
+        if provider == "upbit":
+            return 429, json.dumps({"error": {"name": "too_many_requests", "message": "Too many requests"}}).encode("utf-8"), "application/json"
+        return 429, b"Too Many Requests", "text/plain"
+
+    def _route(self, provider: str, path: str, params: Dict[str, str]):
+        if provider == "upbit":
+            if path.endswith("/v1/market/all"):
+                body = [{"market": m, "korean_name": k, "english_name": m[4:]} for m, k in UPBIT_MARKETS]
+                return 200, json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json"
+            if path.endswith("/v1/ticker"):
+                return 200, fixtures.upbit_ticker(params["markets"].split(",")), "application/json"
+            if "/v1/candles/" in path:
+                return 200, fixtures.upbit_candles(int(params.get("count", 200)), seed=_seed(params["market"])), "application/json"
+        elif provider == "molit" and path == MOLIT_PATH:
+            return 200, self._molit(params["LAWD_CD"], params["DEAL_YMD"], int(params.get("numOfRows", 9999))), "application/xml"
+        elif provider == "yahoo":
+            if "/v8/finance/chart/" in path:
+                symbol = path.rsplit("/", 1)[-1]
+                points = {"2d": 2, "5d": 5, "1mo": 22, "3mo": 66, "1y": 250, "5y": 1250, "10y": 2500}.get(params.get("range"), 250)
+                currency = "KRW" if symbol.upper().endswith((".KS", ".KQ", "KRW=X")) else "USD"
+                return 200, fixtures.yahoo_chart(points, currency=currency, seed=_seed(symbol)), "application/json"
+            if path.endswith("/v1/finance/search"):
+                now = int(time.time())
+                news = [{"title": f"{params.get('q', '')} news {i}", "link": f"https://finance.example.com/{params.get('q', '')}/{i}",
+                         "publisher": "Example Finance", "providerPublishTime": now - i * 3600} for i in range(5)]
+                return 200, json.dumps({"news": news}).encode("utf-8"), "application/json"
+        elif provider == "news" and path.endswith("/rss/search"):
+            return 200, fixtures.news_rss(20, seed=_seed(params.get("q", ""))), "application/rss+xml"
+        return 404, b"not found", "text/plain"
+
+    def _molit(self, lawd_cd: str, deal_ymd: str, num_rows: int) -> bytes:
+        key = (lawd_cd, deal_ymd)
+        with self._cache_lock:
+            full = self._molit_cache.get(key)
+        if full is None:
+            full = fixtures.molit_xml(self.molit_rows, deal_ymd=deal_ymd, seed=_seed(lawd_cd, deal_ymd))
+            with self._cache_lock:
+                self._molit_cache[key] = full
+        if num_rows >= self.molit_rows:
+            return full
+        # 변경 감지용 건수 확인 요청(numOfRows=1): 첫 항목과 totalCount만 반환
+        head = full.decode("utf-8")
+        start, end = head.index("<item>"), head.index("</item>") + len("</item>")
+        rest = head.index("</items>")
+        return (head[:start] + head[start:end] + head[rest:]).encode("utf-8")
+
+def parse_provider_values(values, cast=float) -> Dict[str, float]:
+    """'upbit=10,molit=2' 또는 '5'(전체 공통) 형식을 공급자별 값으로 변환합니다."""
+    result: Dict[str, float] = {}
+    for value in values or []:
+        for part in value.split(","):
+            if "=" in part:
+                name, v = part.split("=", 1)
+                result[name.strip()] = cast(v)
+            elif part.strip():
+                result.update({name: cast(part) for name in PROVIDERS})
+    return result
+
+def build_providers(latency_ms=None, jitter_ms=None, error_rate=None, rate_limit=None) -> Dict[str, ProviderState]:
+    latency = parse_provider_values(latency_ms)
+    jitter = parse_provider_values(jitter_ms)
+    errors = parse_provider_values(error_rate)
+    limits = parse_provider_values(rate_limit)
+    return {
+        name: ProviderState(latency.get(name, 0.0), jitter.get(name, 0.0), errors.get(name, 0.0), limits.get(name, 0.0))
+        for name in PROVIDERS
+    }
+
+def add_provider_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", action="append", help="응답 지연 (예: 80 또는 molit=300,upbit=20)")
+    parser.add_argument("--jitter-ms", action="append", help="지연 표준편차 (형식 동일)")
+    parser.add_argument("--error-rate", action="append", help="HTTP 500 응답 비율 0~1 (형식 동일)")
+    parser.add_argument("--rate-limit", action="append", help="초당 호출 한도, 초과 시 429/resultCode 22 (형식 동일)")
+    parser.add_argument("--molit-rows", type=int, default=300, help="지역/월별 실거래 건수")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="부하 테스트용 가짜 외부 API 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_provider_arguments(parser)
+    args = parser.parse_args(argv)
+
+    providers = build_providers(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit)
+    server = FakeUpstream(args.host, args.port, providers, molit_rows=args.molit_rows).start()
+    for key, value in server.env().items():
+        print(f"export {key}={value}")
+    print(f"# {datetime.datetime.now():%H:%M:%S} 가짜 서버 실행 중 (종료: Ctrl+C)", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(server.stats()), file=sys.stderr)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
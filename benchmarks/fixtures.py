@@ -0,0 +1,136 @@
+"""벤치마크용 공급자 응답 픽스처
+
+benchmarks/fixtures/ 아래에 기록된 실제 응답(--record)이 있으면 그것을 사용하고,
+없으면 고정 시드로 실제 응답과 같은 형식의 데이터를 생성합니다.
+"""
+import os
+import json
+import random
+import hashlib
+import datetime
+from email.utils import format_datetime
+from typing import Dict
+from xml.sax.saxutils import escape
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+APT_NAMES = ["만촌자이르네", "수성2차e-편한세상", "동서맨션", "만촌삼정그린코아에듀파크", "래미안", "힐스테이트",
+             "푸르지오", "아이파크", "롯데캐슬", "더샵", "센트럴파크", "두산위브", "한신", "현대", "삼익", "우방"]
+DONGS = ["만촌동", "범어동", "수성동", "황금동", "지산동", "두산동"]
+AREAS = [59.97, 74.85, 84.93, 101.5, 114.2, 134.8]
+
+def _recorded(name: str):
+    path = os.path.join(FIXTURE_DIR, name)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return None
+
+def molit_xml(rows: int, deal_ymd: str = "202409", seed: int = 1, recorded_name: str = None) -> bytes:
+    """국토교통부 아파트매매 실거래 응답(XML)"""
+    recorded = _recorded(recorded_name) if recorded_name else None
+    if recorded is not None:
+        return recorded
+    rng = random.Random(seed)
+    year, month = deal_ymd[:4], str(int(deal_ymd[4:]))
+    items = []
+    for _ in range(rows):
+        area = rng.choice(AREAS)
+        amount = int(area * rng.uniform(80, 160))
+        items.append(
+            "<item>"
+            f"<aptNm>{escape(rng.choice(APT_NAMES))}</aptNm><umdNm>{rng.choice(DONGS)}</umdNm>"
+            f"<dealAmount>{amount:,}</dealAmount><excluUseAr>{area}</excluUseAr>"
+            f"<floor>{rng.randint(1, 35)}</floor><buildYear>{rng.randint(1985, 2023)}</buildYear>"
+            f"<dealYear>{year}</dealYear><dealMonth>{month}</dealMonth><dealDay>{rng.randint(1, 28)}</dealDay>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?><response>'
+        "<header><resultCode>000</resultCode><resultMsg>OK</resultMsg></header>"
+        f"<body><items>{''.join(items)}</items><numOfRows>{rows}</numOfRows><pageNo>1</pageNo>"
+        f"<totalCount>{rows}</totalCount></body></response>"
+    ).encode("utf-8")
+
+def upbit_candles(count: int = 200, seed: int = 2) -> bytes:
+    """업비트 /v1/candles/days 응답 (최신순)"""
+    recorded = _recorded("upbit_candles.json")
+    if recorded is not None:
+        return recorded
+    rng = random.Random(seed)
+    day = datetime.datetime(2026, 10, 1, 9, 0)
+    price = 90_000_000.0
+    candles = []
+    for i in range(count):
+        price *= 1 + rng.gauss(0, 0.02)
+        ts = day - datetime.timedelta(days=i)
+        candles.append({
+            "market": "KRW-BTC",
+            "candle_date_time_utc": (ts - datetime.timedelta(hours=9)).strftime("%Y-%m-%dT%H:%M:%S"),
+            "candle_date_time_kst": ts.strftime("%Y-%m-%dT%H:%M:%S"),
+            "opening_price": round(price * 0.99), "high_price": round(price * 1.02),
+            "low_price": round(price * 0.97), "trade_price": round(price),
+            "timestamp": int(ts.timestamp() * 1000),
+            "candle_acc_trade_price": price * 1500, "candle_acc_trade_volume": 1500 + rng.random() * 500,
+            "prev_closing_price": round(price * 0.995), "change_price": round(price * 0.005), "change_rate": 0.005,
+        })
+    return json.dumps(candles).encode("utf-8")
+
+def upbit_ticker(markets) -> bytes:
+    """업비트 /v1/ticker 응답"""
+    tickers = []
+    for m in markets:
+        rng = random.Random(f"{m}:3")
+        price, change = rng.uniform(100, 1e8), rng.uniform(-0.1, 0.1)
+        prev = price / (1 + change)
+        tickers.append({
+            "market": m, "trade_price": price, "signed_change_rate": change, "prev_closing_price": prev,
+            "high_price": max(price, prev) * (1 + rng.uniform(0, 0.05)), "low_price": min(price, prev) * (1 - rng.uniform(0, 0.05)),
+            "acc_trade_price_24h": rng.lognormvariate(23, 2),
+        })
+    return json.dumps(tickers).encode("utf-8")
+
+def yahoo_chart(points: int = 250, currency: str = "KRW", seed: int = 4) -> bytes:
+    """Yahoo Finance v8 chart 응답"""
+    recorded = _recorded("yahoo_chart.json")
+    if recorded is not None:
+        return recorded
+    rng = random.Random(seed)
+    start = int(datetime.datetime(2025, 10, 1).timestamp())
+    close, closes = 70000.0, []
+    for _ in range(points):
+        close *= 1 + rng.gauss(0, 0.015)
+        closes.append(round(close, 2))
+    return json.dumps({"chart": {"result": [{
+        "meta": {"currency": currency, "symbol": "005930.KS"},
+        "timestamp": [start + 86400 * i for i in range(points)],
+        "indicators": {"quote": [{
+            "open": closes, "high": [c * 1.01 for c in closes], "low": [c * 0.99 for c in closes],
+            "close": closes, "volume": [rng.randint(1_000_000, 20_000_000) for _ in closes],
+        }]},
+    }], "error": None}}).encode("utf-8")
+
+def news_rss(items: int = 100, seed: int = 5) -> bytes:
+    """Google News RSS 응답"""
+    recorded = _recorded("news_rss.xml")
+    if recorded is not None:
+        return recorded
+    rng = random.Random(seed)
+    now = datetime.datetime(2026, 10, 1, tzinfo=datetime.timezone.utc)
+    entries = []
+    for i in range(items):
+        published = format_datetime(now - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 7)))
+        entries.append(
+            f"<item><title>삼성전자 관련 뉴스 {i}</title><link>https://news.example.com/{i}</link>"
+            f"<pubDate>{published}</pubDate><source url=\"https://news.example.com\">예시 언론</source></item>"
+        )
+    return ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Google News</title>{''.join(entries)}</channel></rss>").encode("utf-8")
+
+def fingerprint(fixtures: Dict[str, bytes]) -> str:
+    """기준값 비교 시 같은 픽스처를 사용했는지 확인하기 위한 해시"""
+    h = hashlib.sha1()
+    for name in sorted(fixtures):
+        h.update(name.encode("utf-8"))
+        h.update(fixtures[name])
+    return h.hexdigest()[:12]
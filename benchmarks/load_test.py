@@ -0,0 +1,176 @@
+"""동시 세션 부하 테스트
+
+로컬 가짜 외부 API 서버(benchmarks/fake_upstream.py)를 띄우고, Streamlit AppTest로
+N개의 세션이 app.py를 실행/재실행하도록 하여 렌더링 시간 백분위수와
+세션별 외부 호출 수, 공급자별 총 요청 수를 보고합니다. 실제 API 할당량은 사용하지 않습니다.
+
+    python -m benchmarks.load_test --sessions 20 --processes 4 --reruns 3 --latency-ms 80
+    python -m benchmarks.load_test --sessions 10 --rate-limit upbit=10 --error-rate 0.02 --json
+"""
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import logging
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fake_upstream import FakeUpstream, add_provider_arguments, build_providers
+
+TILE_KEY = re.compile(r"btn_\d+")
+
+def prepare_workdir(workdir: str) -> str:
+    """앱 파일을 작업 디렉터리에 복사합니다. (설정 파일/로컬 저장소가 저장소 원본을 건드리지 않도록)"""
+    os.makedirs(workdir, exist_ok=True)
+    for path in glob.glob(os.path.join(ROOT, "*.py")) + glob.glob(os.path.join(ROOT, "*.json")):
+        shutil.copy(path, workdir)
+    return workdir
+
+class SimulatedSession:
+    """AppTest 한 개 = 브라우저 세션 한 개. 첫 렌더링 후 요약 타일을 차례로 눌러 재실행합니다."""
+
+    def __init__(self, session_no: int, timeout: float):
+        from streamlit.testing.v1 import AppTest
+
+        self.session_no = session_no
+        self.timeout = timeout
+        self.at = AppTest.from_file(os.path.join(os.getcwd(), "app.py"), default_timeout=timeout)
+        self.renders: List[float] = []
+        self.calls: Counter = Counter()
+        self.errors: List[str] = []
+
+    def step(self) -> None:
+        if self.renders:
+            tiles = [b for b in self.at.button if TILE_KEY.fullmatch(b.key or "")]
+            if tiles:
+                tiles[(self.session_no + len(self.renders)) % len(tiles)].click()
+        start = time.perf_counter()
+        self.at.run(timeout=self.timeout)
+        self.renders.append(time.perf_counter() - start)
+        if self.at.exception:
+            self.errors.append(str(self.at.exception[0].message)[:200])
+        profile = self.at.session_state["last_run_profile"] if "last_run_profile" in self.at.session_state else None
+        for call in getattr(profile, "calls", []):
+            if not call["cache_hit"]:
+                self.calls[call["provider"]] += 1
+
+    def result(self) -> Dict:
+        return {"session": self.session_no, "renders": self.renders, "calls": dict(self.calls), "errors": self.errors}
+
+def run_sessions(session_nos: List[int], reruns: int, timeout: float, workdir: str) -> List[Dict]:
+    """한 프로세스(= Streamlit 서버 한 대) 안에서 세션들을 번갈아 실행합니다.
+
+    AppTest는 실행마다 전역 Runtime을 교체하므로 같은 프로세스에서 스레드로 동시에 돌릴 수 없습니다.
+    대신 세션들을 라운드 로빈으로 실행해 st.cache_data 등 프로세스 공유 캐시의 효과는 그대로 측정합니다.
+    """
+    os.chdir(workdir)
+    if workdir not in sys.path:
+        sys.path.insert(0, workdir)
+    import streamlit.logger
+    streamlit.logger.set_log_level(logging.ERROR)
+
+    sessions = [SimulatedSession(n, timeout) for n in session_nos]
+    for _ in range(reruns + 1):
+        for session in sessions:
+            session.step()
+    return [s.result() for s in sessions]
+
+def _percentiles(values_sec: List[float]) -> Dict[str, float]:
+    if not values_sec:
+        return {}
+    ms = np.array(values_sec) * 1000
+    return {f"p{p}_ms": round(float(np.percentile(ms, p)), 1) for p in (50, 90, 95, 99)} | {"max_ms": round(float(ms.max()), 1)}
+
+def summarize(sessions: List[Dict], upstream_stats: Dict, wall_sec: float) -> Dict:
+    first = [s["renders"][0] for s in sessions if s["renders"]]
+    later = [r for s in sessions for r in s["renders"][1:]]
+    per_session = [sum(s["calls"].values()) for s in sessions]
+    by_provider = Counter()
+    for s in sessions:
+        by_provider.update(s["calls"])
+    return {
+        "sessions": len(sessions),
+        "wall_sec": round(wall_sec, 2),
+        "renders": sum(len(s["renders"]) for s in sessions),
+        "first_render": _percentiles(first),
+        "rerun_render": _percentiles(later),
+        "upstream_calls_per_session": {
+            "mean": round(float(np.mean(per_session)), 2) if per_session else 0,
+            "max": max(per_session) if per_session else 0,
+            "by_provider_mean": {k: round(v / len(sessions), 2) for k, v in sorted(by_provider.items())},
+        },
+        "upstream_server": upstream_stats,
+        "errors": [e for s in sessions for e in s["errors"]][:10],
+    }
+
+def print_report(report: Dict) -> None:
+    print(f"세션 {report['sessions']}개, 렌더링 {report['renders']}회, 총 {report['wall_sec']}초")
+    for label, key in (("첫 렌더링", "first_render"), ("재실행", "rerun_render")):
+        p = report[key]
+        if p:
+            print(f"  {label:<6} p50 {p['p50_ms']}ms  p90 {p['p90_ms']}ms  p95 {p['p95_ms']}ms  p99 {p['p99_ms']}ms  max {p['max_ms']}ms")
+    calls = report["upstream_calls_per_session"]
+    print(f"  세션당 외부 호출 (스크립트 스레드): 평균 {calls['mean']}, 최대 {calls['max']} {calls['by_provider_mean']}")
+    print("  가짜 서버 누적 요청:")
+    for name, s in report["upstream_server"].items():
+        print(f"    {name:<6} 요청 {s['requests']:>6}  오류 {s['errors']:>4}  한도초과 {s['throttled']:>4}  {s['bytes'] / 1024:,.0f}KB")
+    for e in report["errors"]:
+        print(f"  ❌ {e}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="동시 세션 부하 테스트 (가짜 외부 API 사용)")
+    parser.add_argument("--sessions", type=int, default=10, help="시뮬레이션할 세션 수")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="동시에 실행할 앱 프로세스 수 (프로세스마다 캐시가 따로 유지됨, 외부 API에는 동시 부하)")
+    parser.add_argument("--reruns", type=int, default=2, help="세션별 추가 재실행 횟수 (타일 클릭)")
+    parser.add_argument("--timeout", type=float, default=120, help="렌더링 1회 제한 시간 (초)")
+    parser.add_argument("--workdir", default=None, help="앱 실행 디렉터리 (기본: 임시 디렉터리)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    add_provider_arguments(parser)
+    args = parser.parse_args(argv)
+
+    providers = build_providers(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit)
+    server = FakeUpstream(providers=providers, molit_rows=args.molit_rows).start()
+
+    workdir = prepare_workdir(args.workdir or tempfile.mkdtemp(prefix="loadtest-"))
+    # 앱 모듈을 불러오기 전에 외부 API 주소와 계측 설정을 지정해야 합니다.
+    os.environ.update(server.env())
+    os.environ.update({
+        "DASHBOARD_PROFILE": "1",
+        "MARKET_DB_FILE": os.path.join(workdir, "market_data.db"),
+        "DATA_GO_KR_API_KEY": "LOADTEST",
+        "AI_BACKEND": "stub",
+    })
+
+    start = time.perf_counter()
+    processes = max(1, min(args.processes, args.sessions))
+    groups = [list(range(args.sessions))[i::processes] for i in range(processes)]
+    if processes == 1:
+        sessions = run_sessions(groups[0], args.reruns, args.timeout, workdir)
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(run_sessions, g, args.reruns, args.timeout, workdir) for g in groups]
+            sessions = sorted((r for f in futures for r in f.result()), key=lambda r: r["session"])
+    report = summarize(sessions, server.stats(), time.perf_counter() - start)
+    server.stop()
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 1 if report["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,369 @@
+"""오프라인 마이크로 벤치마크
+
+기록된(또는 생성된) 공급자 응답을 스텁 전송 계층으로 재생하여 주요 함수의
+처리량, 지연 시간 백분위수, 최대 메모리를 측정하고 저장된 기준값과 비교합니다.
+
+    python -m benchmarks.run_benchmarks                   # 측정 후 기준값과 비교 (하락 시 종료 코드 1)
+    python -m benchmarks.run_benchmarks --check           # CI용: 기준값 파일이 없어도 실패 (종료 코드 2)
+    python -m benchmarks.run_benchmarks --save-baseline   # 현재 결과를 기준값으로 저장
+    python -m benchmarks.run_benchmarks --only molit      # 이름에 molit이 포함된 항목만
+    python -m benchmarks.run_benchmarks --record          # 실제 API 응답을 benchmarks/fixtures/에 기록
+
+기준값은 실행 환경(CPU)에 따라 다르므로 같은 머신에서 저장/비교해야 합니다.
+"""
+import os
+import sys
+import json
+import time
+import inspect
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import fixtures
+from benchmarks.transport import StubTransport
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.2   # 처리량 20% 이상 하락 또는 메모리 20% 이상 증가 시 실패
+
+# 현실적인 데이터 크기
+MONTH_ROWS = 10_000       # 대도시 시군구 한 달 거래 건수 상한 수준
+WINDOW_MONTHS = 60        # 차트 '5년' 조회 기간
+WINDOW_MONTH_ROWS = 1_500
+FAVORITES = 8
+TREND_POINTS = 600
+PORTFOLIO_POSITIONS = 500
+INDICATOR_CANDLES = 200     # 업비트 캔들 1회 최대 조회 수
+RISK_ASSETS = 50
+SCREENER_MARKETS = 230      # 업비트 KRW 마켓 수 수준
+RISK_DAYS = 1260            # 리스크 분석 '5년' (평일 수)
+BACKTEST_MINUTES = 43_200   # 분봉 30일
+
+def _quiet_streamlit() -> None:
+    # 런타임 없이 st.cache_data/st.spinner를 호출할 때의 경고 억제
+    import streamlit.logger
+    streamlit.logger.set_log_level(logging.ERROR)
+
+def _parse_month(xml: bytes) -> pd.DataFrame:
+    import real_estate_loader
+    with StubTransport({real_estate_loader.MOLIT_APT_TRADE_URL: xml}).install():
+        return real_estate_loader.get_apt_trade_data("BENCH", "27260", "202409")
+
+def build_cases(fx: Dict[str, bytes], workdir: str) -> List[Tuple[str, Callable[[], object], Callable]]:
+    """(이름, 측정 함수, 환경 설정 컨텍스트 팩토리) 목록. 임시 파일(SQLite 등)은 workdir에 만듭니다."""
+    import anomaly_scanner
+    import backtest
+    import charts
+    import data_manager
+    import indicators
+    import main
+    import news_manager
+    import portfolio
+    import risk
+    import screener
+    import real_estate_loader
+
+    unlimited = mock.patch.object(real_estate_loader, "MOLIT_LIMITER", real_estate_loader.QuotaLimiter(0, 0))
+    molit = StubTransport({real_estate_loader.MOLIT_APT_TRADE_URL: fx["molit_month"]})
+    molit_probe = StubTransport({real_estate_loader.MOLIT_APT_TRADE_URL: fx["molit_probe"]})
+    upbit = StubTransport({
+        "https://api.upbit.com/v1/candles/": fx["upbit_candles"],
+        "https://api.upbit.com/v1/ticker": lambda url, params: fixtures.upbit_ticker(url.split("markets=")[1].split(",")),
+    })
+    yahoo = StubTransport({}, yahoo_chart=fx["yahoo_chart"])
+
+    with unlimited:
+        window_month = _parse_month(fx["molit_window_month"])
+        month = _parse_month(fx["molit_month"])
+
+    def fake_month(service_key, lawd_cd, deal_ymd, cache_ts=0):
+        return window_month
+
+    region = pd.concat([month] * 3, ignore_index=True)
+    favorites = [
+        {"id": str(i), "apt_name": name, "lawd_cd": f"2726{i}", "region_name": "대구 수성구"}
+        for i, name in enumerate(fixtures.APT_NAMES[:FAVORITES])
+    ]
+
+    trend_df = region[region["전용면적"] == fixtures.AREAS[2]].head(TREND_POINTS).copy()
+    trend_df["계약일"] = pd.to_datetime(trend_df["계약일"])
+    trend_df["평형"] = (trend_df["전용면적"] / 3.3058).round(1)
+    trend_df["거래금액_억"] = trend_df["거래금액"] / 10000
+    figure_cache = charts.FigureCache()
+
+    tickers = [f"KRW-C{i:03d}" for i in range(50)]
+    all_markets = tuple(f"KRW-C{i:03d}" for i in range(SCREENER_MARKETS))
+    snapshot = pd.DataFrame(json.loads(fixtures.upbit_ticker(all_markets)))
+    market_names = {m: f"코인{i} ({m})" for i, m in enumerate(all_markets)}
+    session = requests.Session()
+
+    # 다통화 포트폴리오: 시세 한 건 갱신 / 환율 한 건 갱신 / 전체 재평가
+    rng = np.random.default_rng(7)
+    book = portfolio.PortfolioBook([
+        {"key": f"p{i}", "type": ("coin", "stock_rec", "real_estate")[i % 3],
+         "quantity": float(rng.integers(1, 100)), "cost": float(rng.uniform(10, 1000))}
+        for i in range(PORTFOLIO_POSITIONS)
+    ])
+    currencies = ["KRW", "USD", "JPY", "EUR", "GBp"]
+    for i, key in enumerate(book.keys):
+        book.update_price(key, float(rng.uniform(10, 1000)), currencies[i % len(currencies)])
+    book.update_fx({"USD": 1380.0, "JPY": 9.2, "EUR": 1500.0, "GBP": 1750.0})
+    ticks = iter(range(1, 10**9))
+
+    def portfolio_tick():
+        n = next(ticks)
+        book.update_price(book.keys[n % len(book)], 100.0 + n % 997)
+        return book.total_value
+
+    def portfolio_fx_tick():
+        book.update_fx({"JPY": 9.0 + next(ticks) % 50 / 100})
+        return book.total_value
+
+    # 기술 지표: 전체 계산 / 새 캔들 1개가 추가되고 창이 한 칸 밀린 경우의 증분 계산
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, INDICATOR_CANDLES + 1000)))
+    candles = pd.DataFrame({"open": closes, "high": closes * 1.01, "low": closes * 0.99, "close": closes,
+                            "volume": rng.uniform(1, 10, len(closes))},
+                           index=pd.date_range("2020-01-01", periods=len(closes), freq="D"))
+    indicator_cache = indicators.IndicatorCache()
+
+    def indicators_tick():
+        n = next(ticks) % 1000
+        return indicator_cache.get("BENCH", "days", candles.iloc[n:n + INDICATOR_CANDLES])
+
+    # 리스크 행렬: 코인(매일)/주식(평일)이 섞인 5년 이력 전체 계산 / 한 자산에 새 봉이 들어온 경우
+    all_days = pd.date_range(end="2026-10-16", periods=RISK_DAYS * 7 // 5 + 30, freq="D")
+    risk_series = {}
+    for i in range(RISK_ASSETS):
+        days = all_days if i % 3 == 0 else all_days[all_days.dayofweek < 5]
+        risk_series[f"a{i}"] = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(days)))), index=days)
+    risk_model = risk.RiskModel(RISK_DAYS)
+    risk_model.update(risk_series)
+
+    def risk_tick():
+        n = next(ticks)
+        key = f"a{n % RISK_ASSETS}"
+        prices = risk_series[key].copy()
+        prices.iloc[-1] *= 1 + (n % 7 - 3) / 1000
+        risk_series[key] = prices
+        risk_model.update(risk_series)
+        return risk_model.covariance()
+
+    # 알림 규칙 백테스트: 분봉 30일 한 마켓에 가격/1시간/1일 수익률 규칙 적용
+    bt_ts = 1.7e9 + np.arange(BACKTEST_MINUTES) * 60.0
+    bt_price = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, BACKTEST_MINUTES)))
+    bt_rules = [backtest.AlertRule(t) for t in ("KRW-*>=105", "KRW-*@1h>=2%", "KRW-*@1h<=-2%", "KRW-*@1d<=-5%")]
+    bt_horizons = [3600, 86400]
+
+    # 지역 이상 거래 스캔: 5년치 월별 거래 전체 적합 / 새 달이 들어오고 가장 오래된 달이 빠지는 경우
+    anomaly_months = {}
+    for i in range(WINDOW_MONTHS + 1):
+        ym = f"{2020 + i // 12}{i % 12 + 1:02d}"
+        m = window_month.copy()
+        m["계약일"] = f"{ym[:4]}-{ym[4:]}-" + m["계약일"].str[-2:]
+        m["거래금액"] = (m["거래금액"] * (1 + 0.005 * i)).astype(int)
+        anomaly_months[ym] = m
+    anomaly_yms = list(anomaly_months)
+    anomaly = anomaly_scanner.AnomalyScanner()
+
+    def anomaly_full():
+        scanner = anomaly_scanner.AnomalyScanner()
+        scanner.update({ym: anomaly_months[ym] for ym in anomaly_yms[:WINDOW_MONTHS]})
+        return scanner.flagged()
+
+    def anomaly_month_tick():
+        start = next(ticks) % 2
+        anomaly.update({ym: anomaly_months[ym] for ym in anomaly_yms[start:start + WINDOW_MONTHS]})
+        return anomaly.flagged()
+    tmp_db = os.path.join(workdir, "bench.db")
+
+    return [
+        (f"molit_parse_{MONTH_ROWS // 1000}k", lambda: real_estate_loader.get_apt_trade_data("BENCH", "27260", "202409"),
+         lambda: _stack(unlimited, molit.install())),
+        ("molit_probe", lambda: real_estate_loader.probe_month("BENCH", "27260", "202409"),
+         lambda: _stack(unlimited, molit_probe.install())),
+        (f"period_merge_{WINDOW_MONTHS}m", lambda: inspect.unwrap(data_manager._get_period_apt_data)("BENCH", "27260", months=WINDOW_MONTHS),
+         lambda: _stack(mock.patch.object(data_manager, "fetch_apt_trade_data_cached", fake_month))),
+        ("real_estate_metrics", lambda: data_manager.build_real_estate_metrics(favorites, "BENCH"),
+         lambda: _stack(mock.patch.object(data_manager, "get_period_apt_data", lambda *a, **k: region))),
+        ("trend_band_figure", lambda: charts.trade_scatter_figure(trend_df, fixtures.AREAS[2]).to_json(), _stack),
+        ("figure_cache_hit", lambda: figure_cache.get_or_build(
+            ("bench", charts.data_version(trend_df)), lambda: charts.trade_scatter_figure(trend_df, fixtures.AREAS[2])), _stack),
+        ("upbit_candles_200", lambda: inspect.unwrap(data_manager.get_upbit_candles)("KRW-BTC", unit="days", count=200),
+         lambda: _stack(upbit.install())),
+        (f"upbit_snapshot_{SCREENER_MARKETS}", lambda: inspect.unwrap(data_manager._get_upbit_snapshot)(all_markets, 0),
+         lambda: _stack(upbit.install())),
+        (f"screener_rank_{SCREENER_MARKETS}", lambda: screener.top(screener.enrich(snapshot, market_names), "종합", 20), _stack),
+        ("upbit_ticker_50", lambda: main.get_crypto_quotes(session, tickers), lambda: _stack(upbit.install())),
+        ("yahoo_quote", lambda: inspect.unwrap(data_manager._get_stock_price)("005930.KS", "bench"),
+         lambda: _stack(yahoo.install(), mock.patch("data_store.DB_FILE", tmp_db))),
+        (f"portfolio_tick_{PORTFOLIO_POSITIONS}", portfolio_tick, _stack),
+        (f"portfolio_fx_tick_{PORTFOLIO_POSITIONS}", portfolio_fx_tick, _stack),
+        (f"portfolio_revalue_{PORTFOLIO_POSITIONS}", book.revalue, _stack),
+        (f"indicators_full_{INDICATOR_CANDLES}", lambda: indicators.compute(candles.iloc[:INDICATOR_CANDLES]), _stack),
+        (f"indicators_tick_{INDICATOR_CANDLES}", indicators_tick, _stack),
+        (f"risk_matrix_{RISK_ASSETS}x{RISK_DAYS}", lambda: risk.RiskModel(RISK_DAYS).update(risk_series), _stack),
+        (f"risk_tick_{RISK_ASSETS}x{RISK_DAYS}", risk_tick, _stack),
+        (f"backtest_rules_{BACKTEST_MINUTES // 1000}k",
+         lambda: backtest.evaluate_symbol(bt_ts, bt_price, bt_rules, bt_horizons, cooldown=3600), _stack),
+        (f"anomaly_scan_{WINDOW_MONTHS}m", anomaly_full, _stack),
+        (f"anomaly_month_tick_{WINDOW_MONTHS}m", anomaly_month_tick, _stack),
+        ("rss_parse_100", lambda: news_manager.parse_rss(fx["news_rss"]), _stack),
+        ("news_merge", lambda: news_manager.merge_news(news_manager.parse_rss(fx["news_rss"]), news_manager.parse_rss(fx["news_rss"])), _stack),
+    ]
+
+def _stack(*contexts):
+    from contextlib import ExitStack
+    stack = ExitStack()
+    for ctx in contexts:
+        stack.enter_context(ctx)
+    return stack
+
+def measure(func: Callable[[], object], min_time: float, min_runs: int = 5, max_runs: int = 2000) -> Dict:
+    func()  # 워밍업
+    latencies = []
+    deadline = time.perf_counter() + min_time
+    while len(latencies) < max_runs and (len(latencies) < min_runs or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "runs": len(latencies),
+        "ops_per_sec": round(len(latencies) / sum(latencies), 3),
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(lat_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """기준값 대비 처리량 하락 / 메모리 증가가 threshold를 넘는 항목을 반환합니다."""
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        drop = 1 - r["ops_per_sec"] / b["ops_per_sec"] if b["ops_per_sec"] else 0.0
+        growth = r["peak_kb"] / b["peak_kb"] - 1 if b["peak_kb"] else 0.0
+        if drop > threshold:
+            regressions.append(f"{name}: 처리량 {drop:.0%} 하락 ({b['ops_per_sec']} -> {r['ops_per_sec']} ops/s)")
+        if growth > threshold:
+            regressions.append(f"{name}: 최대 메모리 {growth:.0%} 증가 ({b['peak_kb']} -> {r['peak_kb']} KB)")
+    return regressions
+
+def load_fixtures() -> Dict[str, bytes]:
+    return {
+        "molit_month": fixtures.molit_xml(MONTH_ROWS, recorded_name="molit_month.xml"),
+        "molit_window_month": fixtures.molit_xml(WINDOW_MONTH_ROWS, seed=7),
+        "molit_probe": fixtures.molit_xml(1, seed=8),
+        "upbit_candles": fixtures.upbit_candles(200),
+        "yahoo_chart": fixtures.yahoo_chart(250),
+        "news_rss": fixtures.news_rss(100),
+    }
+
+def record(lawd_cd: str, deal_ymd: str) -> None:
+    """실제 API 응답을 benchmarks/fixtures/에 저장합니다. (MOLIT은 DATA_GO_KR_API_KEY 필요)"""
+    from dotenv import load_dotenv
+    import real_estate_loader
+
+    load_dotenv()
+    os.makedirs(fixtures.FIXTURE_DIR, exist_ok=True)
+    targets = {
+        "upbit_candles.json": ("https://api.upbit.com/v1/candles/days", {"market": "KRW-BTC", "count": 200}),
+        "yahoo_chart.json": ("https://query1.finance.yahoo.com/v8/finance/chart/005930.KS", {"range": "1y", "interval": "1d"}),
+        "news_rss.xml": ("https://news.google.com/rss/search", {"q": "삼성전자", "hl": "ko", "gl": "KR", "ceid": "KR:ko"}),
+    }
+    service_key = os.getenv("DATA_GO_KR_API_KEY")
+    if service_key:
+        targets["molit_month.xml"] = (real_estate_loader.MOLIT_APT_TRADE_URL, {
+            "serviceKey": requests.utils.unquote(service_key), "LAWD_CD": lawd_cd, "DEAL_YMD": deal_ymd,
+            "numOfRows": "9999", "pageNo": "1",
+        })
+    for name, (url, params) in targets.items():
+        response = requests.get(url, params=params, headers={"User-Agent": "Mozilla/5.0"}, timeout=30)
+        response.raise_for_status()
+        with open(os.path.join(fixtures.FIXTURE_DIR, name), "wb") as f:
+            f.write(response.content)
+        print(f"recorded {name} ({len(response.content):,} bytes)")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="오프라인 마이크로 벤치마크")
+    parser.add_argument("--only", default=None, help="이름에 이 문자열이 포함된 항목만 실행")
+    parser.add_argument("--min-time", type=float, default=1.0, help="항목별 최소 측정 시간 (초)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="기준값 JSON 파일 경로")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="허용 하락 비율 (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="현재 결과를 기준값으로 저장")
+    parser.add_argument("--check", action="store_true", help="기준값 파일이 없으면 실패로 처리")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    parser.add_argument("--record", action="store_true", help="실제 API 응답을 픽스처로 기록하고 종료")
+    parser.add_argument("--lawd-cd", default="27260", help="--record 대상 지역 코드")
+    parser.add_argument("--deal-ymd", default="202409", help="--record 대상 년월")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(args.lawd_cd, args.deal_ymd)
+        return 0
+
+    _quiet_streamlit()
+    fx = load_fixtures()
+    results: Dict[str, Dict] = {}
+    # 측정 중 만든 SQLite(WAL/SHM 포함) 등 임시 파일은 종료 시 함께 삭제
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for name, func, setup in build_cases(fx, workdir):
+            if args.only and args.only not in name:
+                continue
+            with setup():
+                results[name] = measure(func, args.min_time)
+            if not args.json:
+                r = results[name]
+                print(f"{name:<24} {r['ops_per_sec']:>10.1f} ops/s  p50 {r['p50_ms']:>8.2f}ms  "
+                      f"p95 {r['p95_ms']:>8.2f}ms  p99 {r['p99_ms']:>8.2f}ms  peak {r['peak_kb']:>9.1f}KB")
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    report = {"fixtures": fixtures.fingerprint(fx), "results": results}
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f).get("results", {})
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({**report, "results": baseline}, f, ensure_ascii=False, indent=2)
+        print(f"기준값 저장: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("기준값 파일이 없습니다. --save-baseline으로 먼저 저장하세요.")
+        return 2 if args.check else 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("fixtures") != report["fixtures"]:
+        print("⚠️ 기준값과 픽스처가 다릅니다. 비교 결과가 정확하지 않을 수 있습니다.")
+    regressions = compare(results, baseline.get("results", {}), args.threshold)
+    for line in regressions:
+        print(f"❌ {line}")
+    if regressions:
+        return 1
+    print(f"✅ 기준값 대비 {args.threshold:.0%} 이내")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""콜드 스타트(첫 화면 표시까지 걸리는 시간) 벤치마크
+
+매 반복마다 새 파이썬 프로세스에서 app.py를 AppTest로 한 번 실행하여
+Streamlit 자체를 불러오는 시간, 앱 모듈을 불러오는 시간, 첫 렌더링 완료까지의 시간을 측정합니다.
+외부 API는 지연 없는 로컬 가짜 서버(benchmarks/fake_upstream.py)로 대체하므로 네트워크 영향이 없습니다.
+첫 렌더링에서 불러온 무거운 의존성도 함께 보고하여 지연 로딩이 깨지면 바로 드러나게 합니다.
+
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.startup --repeat 5 --budget-ms 3000   # 중앙값이 예산을 넘으면 종료 코드 1
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fake_upstream import FakeUpstream
+from benchmarks.load_test import prepare_workdir
+
+# 필요한 기능을 처음 사용할 때만 불러와야 하는 무거운 의존성
+HEAVY_MODULES = ("yfinance", "plotly.express", "google.generativeai")
+APP_MODULES = ("utils", "data_manager", "ai_manager", "news_manager", "context_builder",
+               "report_jobs", "frame_cache", "charts", "profiler", "real_estate_loader")
+
+def child(workdir: str) -> Dict:
+    """새 프로세스 안에서 실행: 단계별 시간을 측정합니다."""
+    start = time.perf_counter()
+    import logging
+    import importlib
+    import streamlit.logger
+    from streamlit.testing.v1 import AppTest
+    streamlit.logger.set_log_level(logging.ERROR)
+    framework = time.perf_counter()
+
+    os.chdir(workdir)
+    sys.path.insert(0, workdir)
+    for name in APP_MODULES:
+        importlib.import_module(name)
+    modules = time.perf_counter()
+
+    at = AppTest.from_file(os.path.join(workdir, "app.py"), default_timeout=120)
+    at.run()
+    first_paint = time.perf_counter()
+    return {
+        "framework_ms": (framework - start) * 1000,
+        "app_import_ms": (modules - framework) * 1000,
+        "first_render_ms": (first_paint - modules) * 1000,
+        "first_paint_ms": (first_paint - start) * 1000,
+        "heavy_loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+        "exception": str(at.exception[0].message)[:200] if at.exception else None,
+    }
+
+def run(repeat: int, workdir: str) -> List[Dict]:
+    results = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child", workdir],
+            cwd=ROOT, capture_output=True, text=True, timeout=300,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr[-2000:])
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return results
+
+def summarize(results: List[Dict]) -> Dict:
+    keys = ("framework_ms", "app_import_ms", "first_render_ms", "first_paint_ms")
+    return {
+        "repeat": len(results),
+        **{k: {"p50": round(float(np.median([r[k] for r in results])), 1),
+               "max": round(max(r[k] for r in results), 1)} for k in keys},
+        "heavy_loaded": sorted({m for r in results for m in r["heavy_loaded"]}),
+        "exceptions": [r["exception"] for r in results if r["exception"]],
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="콜드 스타트(첫 화면 표시 시간) 벤치마크")
+    parser.add_argument("--repeat", type=int, default=5, help="새 프로세스 실행 횟수")
+    parser.add_argument("--budget-ms", type=float, default=0, help="첫 화면 표시 시간 중앙값 예산 (0이면 검사 안 함)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    parser.add_argument("--child", metavar="WORKDIR", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(child(args.child)))
+        return 0
+
+    server = FakeUpstream().start()
+    workdir = prepare_workdir(tempfile.mkdtemp(prefix="startup-"))
+    os.environ.update(server.env())
+    os.environ.update({
+        "MARKET_DB_FILE": os.path.join(workdir, "market_data.db"),
+        "DATA_GO_KR_API_KEY": "STARTUP",
+        "AI_BACKEND": "stub",
+    })
+    try:
+        report = summarize(run(args.repeat, workdir))
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"콜드 스타트 {report['repeat']}회 (중앙값 / 최대)")
+        for key, label in (("framework_ms", "Streamlit 로딩"), ("app_import_ms", "앱 모듈 로딩"),
+                           ("first_render_ms", "첫 렌더링"), ("first_paint_ms", "첫 화면 표시")):
+            print(f"  {label:<12} {report[key]['p50']:>8.1f}ms / {report[key]['max']:.1f}ms")
+        print(f"  첫 화면까지 불러온 무거운 의존성: {', '.join(report['heavy_loaded']) or '없음'}")
+        for e in report["exceptions"]:
+            print(f"  ❌ {e}")
+
+    over_budget = args.budget_ms and report["first_paint_ms"]["p50"] > args.budget_ms
+    return 1 if over_budget or report["exceptions"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""네트워크 없이 기록된 응답을 돌려주는 스텁 전송 계층"""
+import json
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Dict, Union
+from unittest import mock
+
+import pandas as pd
+import requests
+
+Body = Union[bytes, Callable[[str, dict], bytes]]
+
+class FakeResponse:
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+        self.headers = {}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}")
+
+class FakeTicker:
+    """yfinance.Ticker 대체 - Yahoo v8 chart 응답을 history() DataFrame으로 변환합니다."""
+
+    def __init__(self, chart: bytes):
+        result = json.loads(chart)["chart"]["result"][0]
+        quote = result["indicators"]["quote"][0]
+        index = pd.to_datetime(result["timestamp"], unit="s", utc=True).tz_convert("Asia/Seoul")
+        self._history = pd.DataFrame({
+            "Open": quote["open"], "High": quote["high"], "Low": quote["low"],
+            "Close": quote["close"], "Volume": quote["volume"],
+        }, index=pd.Index(index, name="Date"))
+        self.fast_info = {"currency": result["meta"].get("currency", "KRW")}
+        self.news = []
+
+    def history(self, period: str = "1mo", **kwargs) -> pd.DataFrame:
+        days = {"2d": 2, "5d": 5, "1mo": 22, "3mo": 66, "1y": 250}.get(period)
+        return self._history.tail(days).copy() if days else self._history.copy()
+
+class StubTransport:
+    """URL 접두어별로 응답 본문을 지정하는 스텁 (requests.get / Session.get / yfinance.Ticker 대체)"""
+
+    def __init__(self, routes: Dict[str, Body], yahoo_chart: bytes = None):
+        self.routes = routes
+        self.yahoo_chart = yahoo_chart
+        self.calls = 0
+
+    def get(self, url: str, params: dict = None, **kwargs) -> FakeResponse:
+        self.calls += 1
+        for prefix, body in self.routes.items():
+            if url.startswith(prefix):
+                return FakeResponse(body(url, params or {}) if callable(body) else body)
+        return FakeResponse(b"", status_code=404)
+
+    @contextmanager
+    def install(self):
+        transport = self
+
+        def session_get(session, url, params=None, **kwargs):
+            return transport.get(url, params=params, **kwargs)
+
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch.object(requests, "get", self.get))
+            stack.enter_context(mock.patch.object(requests.Session, "get", session_get))
+            if self.yahoo_chart is not None:
+                import yfinance
+                ticker = FakeTicker(self.yahoo_chart)
+                stack.enter_context(mock.patch.object(yfinance, "Ticker", lambda symbol: ticker))
+            yield self
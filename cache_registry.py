@@ -0,0 +1,183 @@
+import time
+import pickle
+import inspect
+import threading
+import functools
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import streamlit as st
+
+# st.cache_data 함수별 적중률/항목 수/메모리/경과 시간 집계 및 새로고침으로 대체된 항목 즉시 제거
+
+_local = threading.local()
+
+def _estimate_nbytes(value) -> int:
+    """st.cache_data는 값을 pickle로 직렬화해 보관하므로 직렬화 크기를 사용량으로 봅니다."""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+def _freeze(value):
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+class CachedFunctionStats:
+    """캐시 함수 하나의 통계와 (호출 인자 -> 생성 시각/크기) 항목 목록
+
+    st.cache_data 내부 저장소를 직접 볼 수 없으므로 같은 TTL/max_entries 규칙으로 항목을 추정합니다.
+    """
+
+    def __init__(self, name: str, ttl: Optional[float], max_entries: Optional[int], supersede: Optional[str]):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.supersede = supersede
+        self.hits = 0
+        self.misses = 0
+        self.superseded = 0
+        self._lock = threading.Lock()
+        # key -> (call_args, call_kwargs, created, nbytes, group, version)
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        if self.ttl:
+            for key in [k for k, e in self._entries.items() if now - e[2] > self.ttl]:
+                del self._entries[key]
+        while self.max_entries and len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def hit(self, key: tuple) -> None:
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def miss(self, key: tuple, call, value, group=None, version=None) -> List[tuple]:
+        """새 항목을 기록하고, 같은 그룹에서 더 오래된 버전(cache_ts)의 항목을 제거 대상으로 반환합니다."""
+        nbytes = _estimate_nbytes(value)
+        now = time.time()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (call[0], call[1], now, nbytes, group, version)
+            self._expire(now)
+            stale = []
+            if group is not None and version is not None:
+                for old_key, e in list(self._entries.items()):
+                    if old_key != key and e[4] == group and e[5] is not None and e[5] < version:
+                        stale.append((e[0], e[1]))
+                        del self._entries[old_key]
+                self.superseded += len(stale)
+            return stale
+
+    def forget(self, key: Optional[tuple] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            ages = [now - e[2] for e in self._entries.values()]
+            total = self.hits + self.misses
+            return {
+                "function": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": sum(e[3] for e in self._entries.values()),
+                "oldest_sec": max(ages) if ages else 0.0,
+                "avg_age_sec": sum(ages) / len(ages) if ages else 0.0,
+                "superseded": self.superseded,
+                "ttl": self.ttl,
+            }
+
+class CacheRegistry:
+    def __init__(self):
+        self._functions: "OrderedDict[str, CachedFunctionStats]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, stats: CachedFunctionStats) -> None:
+        with self._lock:
+            self._functions[stats.name] = stats
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            functions = list(self._functions.values())
+        return [f.stats() for f in functions]
+
+REGISTRY = CacheRegistry()
+
+def cache_data(ttl: Optional[float] = None, max_entries: Optional[int] = None, supersede: Optional[str] = None,
+               **cache_kwargs):
+    """st.cache_data 대신 사용하는 데코레이터. 함수별 적중/미스/항목/메모리 통계를 REGISTRY에 기록합니다.
+
+    supersede에 새로고침 시각 인자 이름(cache_ts)을 지정하면, 더 최신 값으로 새 항목이 만들어질 때
+    나머지 인자가 같은 이전 항목을 TTL 만료를 기다리지 않고 바로 제거합니다.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__name__}"
+        signature = inspect.signature(func)
+        stats = CachedFunctionStats(name, ttl, max_entries, supersede)
+        REGISTRY.register(stats)
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            # 캐시 미스일 때만 실행되므로 실행 여부로 적중을 판단
+            _local.computed = True
+            return func(*args, **kwargs)
+
+        # 캐시 함수는 utils.run_concurrently 작업 스레드(스크립트 컨텍스트 없음)에서도 호출되므로
+        # 기본 스피너는 끄고, 화면에서는 호출하는 쪽의 st.spinner로 표시
+        cache_kwargs.setdefault("show_spinner", False)
+        cached = st.cache_data(ttl=ttl, max_entries=max_entries, **cache_kwargs)(compute)
+
+        def _group(args, kwargs):
+            if not supersede:
+                return None, None
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            values = dict(bound.arguments)
+            version = values.pop(supersede, None)
+            return tuple((k, _freeze(v)) for k, v in values.items()), version
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            outer = getattr(_local, "computed", False)
+            _local.computed = False
+            try:
+                result = cached(*args, **kwargs)
+                computed = _local.computed
+            finally:
+                _local.computed = outer
+            key = (tuple(_freeze(a) for a in args), tuple(sorted((k, _freeze(v)) for k, v in kwargs.items())))
+            if not computed:
+                stats.hit(key)
+                return result
+            group, version = _group(args, kwargs)
+            for old_args, old_kwargs in stats.miss(key, (args, kwargs), result, group, version):
+                cached.clear(*old_args, **old_kwargs)
+            return result
+
+        def clear(*args, **kwargs):
+            cached.clear(*args, **kwargs)
+            if args or kwargs:
+                stats.forget((tuple(_freeze(a) for a in args), tuple(sorted((k, _freeze(v)) for k, v in kwargs.items()))))
+            else:
+                stats.forget()
+
+        wrapper.clear = clear
+        wrapper.cache_stats = stats.stats
+        return wrapper
+    return decorator
+
+def stats() -> List[Dict]:
+    return REGISTRY.stats()
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Hashable
+
+import pandas as pd
+import streamlit as st
+
+# plotly는 불러오는 데 오래 걸리므로 차트를 처음 그릴 때 불러옵니다.
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# 보관할 차트(Figure JSON) 최대 개수
+FIGURE_CACHE_SIZE = int(os.getenv("FIGURE_CACHE_SIZE", "64"))
+
+def data_version(df: pd.DataFrame) -> str:
+    """DataFrame 내용(값/인덱스/컬럼)으로 데이터 버전 해시를 계산합니다."""
+    h = hashlib.sha1("|".join(map(str, df.columns)).encode("utf-8"))
+    if not df.empty:
+        h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+class FigureCache:
+    """(자산, 기간, 데이터 버전) 키로 완성된 Figure JSON을 보관하는 LRU 캐시
+
+    관련 없는 위젯 변경으로 재실행될 때 px/go 호출과 추세선 계산을 건너뜁니다.
+    """
+
+    def __init__(self, max_entries: int = FIGURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.build_sec = 0.0
+        self._lock = threading.Lock()
+        self._specs: "OrderedDict[Hashable, str]" = OrderedDict()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], "go.Figure"]) -> Dict:
+        """캐시된 Figure 스펙을 반환합니다. 없으면 build()로 만들어 저장합니다."""
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+        if spec is None:
+            start = time.perf_counter()
+            spec = build().to_json()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.misses += 1
+                self.build_sec += elapsed
+                self._specs[key] = spec
+                while len(self._specs) > self.max_entries:
+                    self._specs.popitem(last=False)
+        return json.loads(spec)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._specs),
+                "bytes": sum(len(s) for s in self._specs.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "avg_build_ms": self.build_sec * 1000 / self.misses if self.misses else 0.0,
+            }
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    return FigureCache()
+
+def price_line_figure(df: pd.DataFrame, x: str, y: str, title: str) -> "go.Figure":
+    """가격 추이 라인 차트"""
+    import plotly.express as px
+
+    fig = px.line(df, x=x, y=y, title=title)
+    fig.update_layout(hovermode="x unified") # 마우스 오버 시 정보 표시
+    return fig
+
+def trade_scatter_figure(filtered_df: pd.DataFrame, area) -> "go.Figure":
+    """전용면적별 실거래가 산점도 + 추세선/변동폭 밴드"""
+    import numpy as np
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    df_sorted = filtered_df.sort_values('계약일')
+    fig = px.scatter(
+        df_sorted,
+        x='계약일', y='거래금액_억',
+        hover_data=['층', '전용면적', '평형', '거래금액'],
+        template='plotly_white', # 깔끔한 흰색 배경
+        color_discrete_sequence=['#4C78A8'] # 차분한 파란색
+    )
+
+    # 추세선 및 변동폭(채널) 추가 - Trend 방향과 폭 시각화
+    if len(df_sorted) >= 2:
+        # 회귀분석을 위한 수치형 변환
+        x_numeric = df_sorted['계약일'].map(lambda x: x.timestamp())
+        y_values = df_sorted['거래금액_억']
+
+        # 다차 회귀분석 (Polynomial Regression) - 데이터 개수에 따라 차수 동적 결정 (최대 3차)
+        degree = min(3, len(df_sorted) - 1)
+        coeffs = np.polyfit(x_numeric, y_values, degree)
+        poly_eqn = np.poly1d(coeffs)
+        trend_line = poly_eqn(x_numeric)
+
+        # 변동폭 계산 (잔차 표준편차), 민감도 1.5배 적용 (약 87% 신뢰구간)
+        residuals = y_values - trend_line
+        std_dev = residuals.std()
+        upper_bound = trend_line + (1.5 * std_dev)
+        lower_bound = trend_line - (1.5 * std_dev)
+
+        # 1. 상단 밴드 (투명선)
+        fig.add_trace(go.Scatter(
+            x=df_sorted['계약일'], y=upper_bound,
+            mode='lines', line=dict(width=0),
+            showlegend=False, hoverinfo='skip'
+        ))
+        # 2. 하단 밴드 (상단과 채우기 = Trend Width)
+        fig.add_trace(go.Scatter(
+            x=df_sorted['계약일'], y=lower_bound,
+            mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor='rgba(76, 120, 168, 0.1)',
+            showlegend=False, hoverinfo='skip'
+        ))
+        # 3. 추세선 (중앙)
+        fig.add_trace(go.Scatter(
+            x=df_sorted['계약일'], y=trend_line,
+            mode='lines', name='추세',
+            line=dict(color='rgba(255, 99, 71, 0.8)', width=2, dash='dash'),
+            showlegend=False
+        ))
+
+    # 마커 디자인 (크기 확대, 테두리 추가, 투명도)
+    fig.update_traces(
+        marker=dict(size=12, line=dict(width=1, color='white'), opacity=0.8)
+    )
+
+    # 레이아웃 정리 (타이틀 폰트, 여백, 축 설정)
+    fig.update_layout(
+        title=dict(text=f"{area}㎡ 실거래가 추이", font=dict(size=18, color="#333333")),
+        yaxis_title="거래금액 (억원)",
+        xaxis_title=None, # X축 타이틀 제거
+        height=500,
+        margin=dict(t=50, b=20, l=20, r=20),
+        hovermode="closest"
+    )
+    fig.update_yaxes(tickformat=".2f")
+    return fig
+
+# 가격 축에 겹쳐 그리는 지표 (나머지 RSI/MACD/ATR은 아래 패널)
+PRICE_OVERLAYS = ("SMA", "EMA", "볼린저 밴드")
+
+def indicator_figure(ohlcv: pd.DataFrame, ind: pd.DataFrame, title: str, overlays) -> "go.Figure":
+    """가격 라인 + 기술적 지표 오버레이 (ohlcv/ind는 같은 인덱스, indicators.compute 결과 컬럼 사용)"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    panels = [o for o in overlays if o not in PRICE_OVERLAYS]
+    heights = [0.6] + [0.4 / len(panels)] * len(panels) if panels else [1.0]
+    fig = make_subplots(rows=1 + len(panels), cols=1, shared_xaxes=True, vertical_spacing=0.04, row_heights=heights)
+    x = ohlcv.index
+
+    if "볼린저 밴드" in overlays:
+        fig.add_trace(go.Scatter(x=x, y=ind["bb_upper"], mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"), row=1, col=1)
+        fig.add_trace(go.Scatter(x=x, y=ind["bb_lower"], mode="lines", line=dict(width=0), fill="tonexty",
+                                 fillcolor="rgba(76, 120, 168, 0.12)", name="볼린저 밴드"), row=1, col=1)
+        fig.add_trace(go.Scatter(x=x, y=ind["bb_mid"], mode="lines", name="BB 중심", line=dict(color="rgba(76, 120, 168, 0.6)", dash="dot")), row=1, col=1)
+    fig.add_trace(go.Scatter(x=x, y=ohlcv["close"], mode="lines", name="종가", line=dict(color="#4C78A8")), row=1, col=1)
+    if "SMA" in overlays:
+        fig.add_trace(go.Scatter(x=x, y=ind["sma"], mode="lines", name="SMA", line=dict(color="#F58518")), row=1, col=1)
+    if "EMA" in overlays:
+        fig.add_trace(go.Scatter(x=x, y=ind["ema"], mode="lines", name="EMA", line=dict(color="#54A24B")), row=1, col=1)
+
+    for row, name in enumerate(panels, start=2):
+        if name == "RSI":
+            fig.add_trace(go.Scatter(x=x, y=ind["rsi"], mode="lines", name="RSI", line=dict(color="#B279A2")), row=row, col=1)
+            for level in (30, 70):
+                fig.add_hline(y=level, line=dict(color="gray", width=1, dash="dot"), row=row, col=1)
+            fig.update_yaxes(range=[0, 100], row=row, col=1)
+        elif name == "MACD":
+            colors = ["#54A24B" if v >= 0 else "#E45756" for v in ind["macd_hist"].fillna(0)]
+            fig.add_trace(go.Bar(x=x, y=ind["macd_hist"], name="MACD 히스토그램", marker_color=colors), row=row, col=1)
+            fig.add_trace(go.Scatter(x=x, y=ind["macd"], mode="lines", name="MACD", line=dict(color="#4C78A8")), row=row, col=1)
+            fig.add_trace(go.Scatter(x=x, y=ind["macd_signal"], mode="lines", name="시그널", line=dict(color="#F58518")), row=row, col=1)
+        elif name == "ATR":
+            fig.add_trace(go.Scatter(x=x, y=ind["atr"], mode="lines", name="ATR", line=dict(color="#72B7B2")), row=row, col=1)
+        fig.update_yaxes(title_text=name, row=row, col=1)
+
+    fig.update_layout(title=title, hovermode="x unified", height=420 + 160 * len(panels),
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0))
+    return fig
+
+def correlation_heatmap(corr: pd.DataFrame, title: str) -> "go.Figure":
+    """자산 간 상관계수 히트맵 (-1 ~ 1, 공통 관측이 부족한 쌍은 빈칸)"""
+    import numpy as np
+    import plotly.graph_objects as go
+
+    z = corr.to_numpy()
+    fig = go.Figure(go.Heatmap(
+        z=z, x=list(corr.columns), y=list(corr.index), zmin=-1, zmax=1, colorscale="RdBu_r",
+        text=np.round(z, 2), texttemplate="%{text}" if len(corr) <= 15 else None,
+        hovertemplate="%{y} / %{x}: %{z:.2f}<extra></extra>", colorbar=dict(title="상관계수"),
+    ))
+    fig.update_layout(title=title, height=max(420, 28 * len(corr) + 160), yaxis=dict(autorange="reversed"))
+    return fig
@@ -0,0 +1,147 @@
+import os
+import copy
+import json
+import atexit
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 연속된 변경을 모아서 한 번에 저장하기까지 기다리는 시간 (초)
+SAVE_DEBOUNCE_SEC = float(os.getenv("CONFIG_SAVE_DEBOUNCE", "1.0"))
+
+@contextmanager
+def _file_lock(path: str):
+    """여러 프로세스(세션)가 동시에 설정 파일을 쓰지 않도록 잠금 파일로 보호합니다."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+# 새로 만드는 설정 파일의 권한 (open()으로 만들 때와 같은 기본값)
+_NEW_FILE_MODE = 0o666 & ~_umask()
+
+def _file_mode(path: str) -> int:
+    """기존 파일의 권한을 반환합니다. (mkstemp 임시 파일은 0600이라 교체 전에 맞춰야 함)"""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except OSError:
+        return _NEW_FILE_MODE
+
+class ConfigStore:
+    """dashboard_config.json 읽기/쓰기 관리자
+
+    - load(): 파일 수정 시각(mtime)이 그대로면 메모리 사본을 반환 (재파싱 없음)
+    - save(): 변경을 메모리에 즉시 반영하고, 디바운스 후 한 번만 파일에 기록
+    - 기록은 임시 파일 작성 후 rename으로 원자적으로 교체
+    """
+
+    def __init__(self, path: str, debounce: float = SAVE_DEBOUNCE_SEC):
+        self.path = path
+        self.debounce = debounce
+        self._lock = threading.RLock()
+        self._cached: Optional[Dict] = None
+        self._cached_mtime: Optional[float] = None
+        self._pending: Optional[Dict] = None
+        self._timer: Optional[threading.Timer] = None
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self) -> Dict:
+        with self._lock:
+            # 아직 기록되지 않은 변경이 있으면 그것이 최신 상태
+            if self._pending is not None:
+                return copy.deepcopy(self._pending)
+
+            mtime = self._mtime()
+            if mtime is None:
+                return {}
+            if self._cached is None or mtime != self._cached_mtime:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._cached = json.load(f)
+                except (OSError, ValueError):
+                    return {}
+                self._cached_mtime = mtime
+            return copy.deepcopy(self._cached)
+
+    def save(self, config: Dict) -> None:
+        with self._lock:
+            self._pending = copy.deepcopy(config)
+            self._schedule()
+
+    def _schedule(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.debounce, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self) -> None:
+        """대기 중인 변경을 즉시 파일에 기록합니다."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            # [FIX] 기록이 끝날 때까지 대기 중인 변경을 지우지 않음 (실패 시 다시 시도)
+            config = self._pending
+            if config is None:
+                return
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            try:
+                with _file_lock(self.path):
+                    fd, tmp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+                    try:
+                        with os.fdopen(fd, "w", encoding="utf-8") as f:
+                            json.dump(config, f, ensure_ascii=False, indent=4)
+                            f.flush()
+                            os.fsync(f.fileno())
+                        os.chmod(tmp_path, _file_mode(self.path))
+                        os.replace(tmp_path, self.path)
+                    except BaseException:
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                        raise
+            except Exception as e:
+                print(f"Config save failed: {e}")
+                self._schedule()
+                return
+
+            self._pending = None
+            self._cached = config
+            self._cached_mtime = self._mtime()
+
+_stores: Dict[str, ConfigStore] = {}
+_stores_lock = threading.Lock()
+
+def get_store(path: str) -> ConfigStore:
+    """경로별로 프로세스 내에서 공유되는 ConfigStore를 반환합니다."""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = ConfigStore(path)
+        return _stores[path]
+
+@atexit.register
+def _flush_all() -> None:
+    for store in list(_stores.values()):
+        store.flush()
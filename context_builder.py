@@ -0,0 +1,251 @@
+import os
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+import data_manager
+import indicators
+import news_manager
+import utils
+
+# AI 리포트 컨텍스트 최대 길이 (문자 수). 섹션별 줄 수 제한 후 전체 길이로 한 번 더 자릅니다.
+MAX_CONTEXT_CHARS = int(os.getenv("AI_CONTEXT_MAX_CHARS", "4000"))
+MAX_SECTION_LINES = 12
+
+def _section(title: str, lines: List[str], max_lines: int = MAX_SECTION_LINES) -> Dict:
+    return {"title": title, "lines": lines[:max_lines], "truncated": len(lines) > max_lines}
+
+def _resolve_stock_ticker(target: Dict) -> str:
+    if target['type'] == 'stock_rec':
+        return utils.STOCK_RECOMMENDATIONS.get(target['id'], target['id'])
+    return target.get('ticker') or target['id']
+
+def _last_month(hist):
+    return hist[hist.index >= hist.index[-1] - pd.Timedelta(days=31)] if not hist.empty else hist
+
+def _coin_price_section(ticker: str) -> Optional[Dict]:
+    # 차트/지표와 같은 캔들 조회를 재사용 (추가 외부 호출 없음)
+    candles = data_manager.get_upbit_candles(ticker, unit="days", count=data_manager.UPBIT_CANDLE_COUNT).tail(7)
+    if candles.empty:
+        return None
+    lines = [
+        f"날짜: {str(c['candle_date_time_kst'])[:10]}, 종가: {c['trade_price']}, 등락률: {c['change_rate']*100:.2f}%"
+        for _, c in candles.sort_values('date', ascending=False).iterrows()
+    ]
+    return _section("최근 7일 가격 추이", lines)
+
+def _stock_price_section(ticker: str) -> Optional[Dict]:
+    hist = _last_month(data_manager.get_stock_history(ticker, period="1y"))
+    if hist.empty:
+        return None
+    lines = [
+        f"최고가: {hist['High'].max()}",
+        f"최저가: {hist['Low'].min()}",
+        f"평균가: {hist['Close'].mean()}",
+    ]
+    return _section("최근 1개월 주가 추이 요약", lines)
+
+def _indicator_section(ohlcv, result) -> Optional[Dict]:
+    """[NEW] 일봉 기준 기술적 지표 요약 (지표 캐시 재사용)"""
+    snap = indicators.snapshot(ohlcv, result)
+    if not snap:
+        return None
+    p = indicators.DEFAULT_PARAMS
+    lines = []
+    if "RSI" in snap:
+        zone = "과매수" if snap["RSI"] >= 70 else "과매도" if snap["RSI"] <= 30 else "중립"
+        lines.append(f"RSI({p['rsi']}): {snap['RSI']:.1f} ({zone})")
+    if "SMA대비%" in snap:
+        lines.append(f"종가의 {p['sma']}일 이동평균 대비: {snap['SMA대비%']:+.2f}%")
+    if "볼린저위치%" in snap:
+        lines.append(f"볼린저 밴드 내 위치: {snap['볼린저위치%']:.0f}% (0=하단, 100=상단)")
+    if "MACD히스토그램" in snap:
+        cross = f", 최근 {snap['MACD교차']} 교차" if "MACD교차" in snap else ""
+        lines.append(f"MACD 히스토그램: {snap['MACD히스토그램']:+.4g}{cross}")
+    if "ATR%" in snap:
+        lines.append(f"ATR({p['atr']}) 변동폭: 종가의 {snap['ATR%']:.2f}%")
+    return _section("기술적 지표 (일봉)", lines)
+
+def _news_section(query: str, ticker: Optional[str]) -> Optional[Dict]:
+    items = news_manager.get_news_service().get_news(query, ticker=ticker, limit=3)
+    if not items:
+        return None
+    return _section("최근 관련 뉴스 헤드라인", [f"- {n['title']}" for n in items])
+
+def _real_estate_sections(apt_info: Dict, service_key: str, cache_ts: float = 0) -> List[Dict]:
+    yearly_df = data_manager.get_period_apt_data(service_key, apt_info['lawd_cd'], months=12, cache_ts=cache_ts)
+    if yearly_df.empty:
+        return []
+    apt_df = yearly_df[yearly_df['아파트'] == apt_info['apt_name']]
+    if apt_df.empty:
+        return []
+
+    # 전용면적별 통계 (groupby 한 번으로 계산)
+    stats = apt_df.groupby('전용면적')['거래금액'].agg(['count', 'mean', 'max', 'min']).sort_index()
+    lines = [
+        f"- 전용 {area}㎡: {int(row['count'])}건 거래, 평균 {row['mean']:.0f}만원 (최고 {int(row['max'])}, 최저 {int(row['min'])})"
+        for area, row in stats.iterrows()
+    ]
+    lines.append(f"최근 거래일: {apt_df['계약일'].max()}")
+    sections = [_section(f"대상 아파트: {apt_info['apt_name']} - 최근 1년 거래 요약", lines, max_lines=MAX_SECTION_LINES + 1)]
+
+    # 주변 아파트 비교 (같은 법정동)
+    if '법정동' in yearly_df.columns:
+        target_dong = apt_df.iloc[0]['법정동']
+        surrounding = yearly_df[(yearly_df['법정동'] == target_dong) & (yearly_df['아파트'] != apt_info['apt_name'])]
+        if not surrounding.empty:
+            # 평당가(3.3m2) 계산
+            my_py = apt_df['거래금액'] / apt_df['전용면적'] * 3.3
+            other_py = surrounding['거래금액'] / surrounding['전용면적'] * 3.3
+            top_apts = other_py.groupby(surrounding['아파트']).mean().nlargest(3)
+            lines = [
+                f"- 대상 단지 평균 평당가: {my_py.mean():.0f}만원",
+                f"- 주변 단지 평균 평당가: {other_py.mean():.0f}만원",
+                "- 주변 시세 상위 단지 (평당가):",
+            ] + [f"  * {name}: {val:.0f}만원" for name, val in top_apts.items()]
+            sections.append(_section(f"주변 아파트 ({target_dong}) 비교 데이터", lines))
+    return sections
+
+def collect_sections(target: Dict, favorite_apts: List[Dict], service_key: Optional[str],
+                     cache_invalidation_ts: Optional[Dict] = None) -> List[Dict]:
+    """자산 유형별 컨텍스트 데이터를 동시에 수집하여 섹션 목록으로 반환합니다."""
+    tasks: List[Callable[[], object]] = []
+
+    if target['type'] == 'coin':
+        ticker = data_manager.get_upbit_markets().get(target['id'])
+        if ticker:
+            tasks.append(lambda: _coin_price_section(ticker))
+            tasks.append(lambda: _indicator_section(*indicators.upbit_indicators(ticker, "days")))
+        tasks.append(lambda: _news_section(utils.get_news_query(target), None))
+
+    elif target['type'] in ['stock_rec', 'stock_custom', 'exchange']:
+        ticker = _resolve_stock_ticker(target)
+        tasks.append(lambda: _stock_price_section(ticker))
+        tasks.append(lambda: _indicator_section(*indicators.stock_indicators(ticker, "1y")))
+        news_ticker = ticker if target['type'] != 'exchange' else None
+        tasks.append(lambda: _news_section(utils.get_news_query(target), news_ticker))
+
+    elif target['type'] == 'real_estate':
+        if service_key and 0 <= target['id'] < len(favorite_apts):
+            apt_info = favorite_apts[target['id']]
+            ts = (cache_invalidation_ts or {}).get(apt_info['lawd_cd'], 0)
+            tasks.append(lambda: _real_estate_sections(apt_info, service_key, ts))
+
+    sections = []
+    for result in utils.run_concurrently(tasks):
+        if isinstance(result, list):
+            sections.extend(result)
+        elif result:
+            sections.append(result)
+    return sections
+
+def render_context(target: Dict, sections: List[Dict], max_chars: int = MAX_CONTEXT_CHARS) -> str:
+    """섹션 목록을 프롬프트용 텍스트로 변환합니다. 전체 길이는 max_chars 이내로 제한됩니다."""
+    context_text = f"자산명: {target['label']}\n현재가: {target['value']}\n변동률: {target['delta']}\n"
+    for sec in sections:
+        block = f"\n[{sec['title']}]\n" + "".join(f"{line}\n" for line in sec['lines'])
+        if sec['truncated']:
+            block += "... (이하 생략)\n"
+        if len(context_text) + len(block) > max_chars:
+            context_text += "\n... (컨텍스트 길이 제한으로 이하 생략)\n"
+            break
+        context_text += block
+    return context_text
+
+def build_context(target: Dict, favorite_apts: List[Dict], service_key: Optional[str] = None,
+                  cache_invalidation_ts: Optional[Dict] = None, max_chars: int = MAX_CONTEXT_CHARS) -> str:
+    """AI 리포트용 컨텍스트 텍스트를 만듭니다."""
+    sections = collect_sections(target, favorite_apts, service_key, cache_invalidation_ts)
+    return render_context(target, sections, max_chars)
+
+# ---------------------------------------------------------------------------
+# [NEW] 포트폴리오 리포트용 고정 길이 수치 요약
+# ---------------------------------------------------------------------------
+
+SUMMARY_MAX_CHARS = 160
+
+def _pct(a, b) -> Optional[float]:
+    return (a / b - 1) * 100 if b else None
+
+def _fmt_fields(fields: Dict[str, object]) -> str:
+    parts = []
+    for k, v in fields.items():
+        if v is None:
+            continue
+        parts.append(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}")
+    return "|".join(parts)
+
+def _price_stats(closes) -> Dict[str, Optional[float]]:
+    """종가 시계열에서 7일/30일 수익률과 일간 변동성(%)을 계산합니다."""
+    closes = closes.dropna().astype(float)
+    if len(closes) < 2:
+        return {}
+    last = closes.iloc[-1]
+    return {
+        "7일%": _pct(last, closes.iloc[-min(8, len(closes))]),
+        "30일%": _pct(last, closes.iloc[0]),
+        "변동성%": float(closes.pct_change().std() * 100),
+    }
+
+def asset_summary(tile: Dict, favorite_apts: List[Dict], service_key: Optional[str] = None,
+                  cache_invalidation_ts: Optional[Dict] = None) -> Optional[str]:
+    """대시보드 항목 하나를 고정 길이의 수치 요약 한 줄로 압축합니다."""
+    kind = tile['type']
+    fields: Dict[str, object] = {}
+
+    if kind == 'coin':
+        ticker = tile.get('ticker') or data_manager.get_upbit_markets().get(tile['id'])
+        if not ticker:
+            return None
+        price, change = data_manager.get_crypto_price(ticker)
+        fields.update({"가격": float(price), "일간%": float(change), "통화": "KRW"})
+        ohlcv, result = indicators.upbit_indicators(ticker, "days")
+        if not ohlcv.empty:
+            fields.update(_price_stats(ohlcv['close'].tail(30)))
+            fields["RSI"] = indicators.snapshot(ohlcv, result).get("RSI")
+
+    elif kind in ['stock_rec', 'stock_custom', 'exchange']:
+        ticker = _resolve_stock_ticker(tile)
+        if kind == 'exchange':
+            price, change = data_manager.get_exchange_rate("USD", "KRW")
+            currency = "KRW"
+        else:
+            price, change, currency = data_manager.get_stock_price(ticker)
+        fields.update({"가격": float(price or 0), "일간%": float(change), "통화": currency})
+        ohlcv, result = indicators.stock_indicators(ticker, "1y")
+        if not ohlcv.empty:
+            fields.update(_price_stats(_last_month(ohlcv)['close']))
+            fields["RSI"] = indicators.snapshot(ohlcv, result).get("RSI")
+
+    elif kind == 'real_estate':
+        if not service_key or not (0 <= tile['id'] < len(favorite_apts)):
+            return None
+        apt_info = favorite_apts[tile['id']]
+        ts = (cache_invalidation_ts or {}).get(apt_info['lawd_cd'], 0)
+        df = data_manager.get_period_apt_data(service_key, apt_info['lawd_cd'], months=12, cache_ts=ts)
+        apt_df = df[df['아파트'] == apt_info['apt_name']] if not df.empty else df
+        if apt_df.empty:
+            fields["거래"] = 0
+        else:
+            latest = apt_df.sort_values('계약일').iloc[-1]
+            py_price = apt_df['거래금액'] / apt_df['전용면적'] * 3.3
+            fields.update({
+                "1년거래": len(apt_df),
+                "평균만원": float(apt_df['거래금액'].mean()),
+                "평당만원": float(py_price.mean()),
+                "최근만원": int(latest['거래금액']),
+                "최근일": str(latest['계약일']),
+            })
+    else:
+        return None
+
+    return f"{tile['label']}|{kind}|{_fmt_fields(fields)}"[:SUMMARY_MAX_CHARS]
+
+def collect_portfolio_summaries(tiles: List[Dict], favorite_apts: List[Dict], service_key: Optional[str] = None,
+                                cache_invalidation_ts: Optional[Dict] = None) -> List[str]:
+    """대시보드 전체 항목의 수치 요약을 동시에 수집합니다. (대시보드 순서 유지)"""
+    tasks = [
+        (lambda t=t: asset_summary(t, favorite_apts, service_key, cache_invalidation_ts))
+        for t in tiles if t.get('type') != 'info'
+    ]
+    return [line for line in utils.run_concurrently(tasks) if line]
@@ -1,16 +1,133 @@
+import os
+import contextlib
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import requests
 import pandas as pd
-import yfinance as yf
+import time
 import datetime
-from real_estate_loader import get_apt_trade_data
+import threading
+import cache_registry
+import data_store
+import market_calendar
+import profiler
+from real_estate_loader import QuotaLimiter, get_apt_trade_data, probe_month
 
-@st.cache_data(ttl=604800)
-def fetch_apt_trade_data_cached(service_key, lawd_cd, deal_ymd, _cache_ts=0):
-    return get_apt_trade_data(service_key, lawd_cd, deal_ymd)
+# [NEW] 외부 API 주소 (부하 테스트 시 로컬 가짜 서버로 대체 가능)
+UPBIT_API_BASE = os.getenv("UPBIT_API_BASE", "https://api.upbit.com")
+# 설정하면 yfinance 대신 Yahoo v8 chart API 형식의 주소를 직접 호출합니다.
+YAHOO_CHART_BASE = os.getenv("YAHOO_CHART_BASE", "")
 
-@st.cache_data(ttl=604800)
-def get_period_apt_data(service_key, lawd_cd, months=12, _cache_ts=0):
+def _yahoo_chart_history(ticker, period):
+    """Yahoo v8 chart API를 직접 호출하여 (history DataFrame, 통화)를 반환합니다."""
+    url = f"{YAHOO_CHART_BASE}/v8/finance/chart/{ticker}"
+    with profiler.upstream("yahoo", "chart") as call:
+        response = requests.get(url, params={"range": period, "interval": "1d"}, timeout=10)
+        call.nbytes = len(response.content)
+    response.raise_for_status()
+    result = response.json()["chart"]["result"][0]
+    quote = result["indicators"]["quote"][0]
+    index = pd.to_datetime(result["timestamp"], unit="s", utc=True)
+    hist = pd.DataFrame({
+        "Open": quote["open"], "High": quote["high"], "Low": quote["low"],
+        "Close": quote["close"], "Volume": quote["volume"],
+    }, index=pd.Index(index, name="Date")).dropna(subset=["Close"])
+    return hist, result["meta"].get("currency", "KRW")
+
+def _yahoo_history(ticker, period, with_currency=False):
+    """Yahoo Finance 가격 이력과 통화(with_currency일 때)를 반환합니다."""
+    if YAHOO_CHART_BASE:
+        return _yahoo_chart_history(ticker, period)
+    import yfinance as yf   # 불러오는 데 오래 걸리므로 주식/환율을 처음 조회할 때 불러옴
+    with profiler.upstream("yahoo", "history"):
+        stock = yf.Ticker(ticker)
+        currency = stock.fast_info.get('currency', 'KRW') if with_currency else None
+        return stock.history(period=period), currency
+
+# [NEW] 수집기(main.py)가 기록한 로컬 저장소 데이터의 최대 허용 경과 시간 (초)
+# 이 시간 이내의 스냅샷이 있으면 외부 API를 호출하지 않습니다.
+STORE_MAX_AGE = {
+    "coin": 10,
+    "stock": 120,
+    "fx": 600,
+    "apt_current": 6 * 3600,   # 이번 달 데이터는 계속 추가되므로 짧게
+    "apt_past": 7 * 86400,
+}
+
+def _apt_max_age(deal_ymd):
+    return STORE_MAX_AGE["apt_current"] if deal_ymd == datetime.date.today().strftime("%Y%m") else STORE_MAX_AGE["apt_past"]
+
+def _save_apt_month(lawd_cd, deal_ymd, df):
+    try:
+        data_store.save_apt_month(lawd_cd, deal_ymd, df)
+        data_store.save_apt_month_meta(lawd_cd, deal_ymd, df.attrs.get("total_count"), df.attrs.get("head_hash"))
+    except Exception as e:
+        print(f"Store write failed: {e}")
+
+class AptFetchError(Exception):
+    """실거래 조회 실패 (st.cache_data는 예외를 캐시하지 않으므로 실패 결과가 1주일간 남지 않음)
+
+    partial: 여러 달을 합치는 중 실패한 경우 조회에 성공한 달만 합친 결과
+    """
+
+    def __init__(self, message, partial=None):
+        super().__init__(message)
+        self.partial = partial
+
+def load_apt_month(service_key, lawd_cd, deal_ymd, checked_after=0):
+    """지역/월 실거래 데이터를 로컬 저장소 우선으로 불러옵니다.
+
+    저장된 데이터가 오래되었거나 checked_after(새로고침 시각) 이전에 확인된 경우,
+    전체 다운로드 대신 건수 확인 요청(numOfRows=1)으로 변경 여부를 먼저 확인하고
+    변경된 달만 다시 다운로드합니다.
+    """
+    entry = data_store.get_apt_month_entry(lawd_cd, deal_ymd)
+    if entry is not None:
+        stored, updated_at = entry
+        if time.time() - updated_at <= _apt_max_age(deal_ymd) and updated_at >= checked_after:
+            return stored
+
+        # [NEW] 변경 감지: totalCount/첫 항목 해시가 같으면 저장된 데이터 재사용
+        meta = data_store.get_apt_month_meta(lawd_cd, deal_ymd)
+        probe = probe_month(service_key, lawd_cd, deal_ymd)
+        if probe is None:
+            return stored
+        if meta and meta["total_count"] == probe["total_count"] and meta["head_hash"] == probe["head_hash"]:
+            data_store.touch_apt_month(lawd_cd, deal_ymd)
+            return stored
+
+    df = get_apt_trade_data(service_key, lawd_cd, deal_ymd)
+    # [FIX] 조회 오류(HTTP 오류/호출 한도 초과 등 totalCount 없음)면 저장된 데이터를 유지하고,
+    # 저장된 데이터도 없으면 예외로 알려 빈 결과가 캐시되지 않게 함
+    if df.empty and df.attrs.get("total_count") is None:
+        if entry is not None:
+            return stored
+        raise AptFetchError(f"실거래 조회 실패: {lawd_cd} {deal_ymd}")
+    # 거래가 없는 달도 저장
+    _save_apt_month(lawd_cd, deal_ymd, df)
+    return df
+
+# [FIX] 새로고침 시각 인자는 밑줄로 시작하면 st.cache_data 해시에서 제외되어
+# 새로고침이 반영되지 않으므로 cache_ts로 변경
+# [CHANGED] 새로고침으로 cache_ts가 바뀌면 이전 항목은 TTL(1주) 만료를 기다리지 않고 바로 제거
+@profiler.cached("molit")
+@cache_registry.cache_data(ttl=604800, supersede="cache_ts")
+def fetch_apt_trade_data_cached(service_key, lawd_cd, deal_ymd, cache_ts=0):
+    return load_apt_month(service_key, lawd_cd, deal_ymd, checked_after=cache_ts)
+
+def get_period_apt_data(service_key, lawd_cd, months=12, cache_ts=0):
+    """최근 months개월 실거래를 합쳐 반환합니다.
+
+    일부 달 조회에 실패하면 성공한 달만 합친 결과를 캐시하지 않고 반환하여 다음 실행 때 다시 조회합니다.
+    """
+    try:
+        return _get_period_apt_data(service_key, lawd_cd, months=months, cache_ts=cache_ts)
+    except AptFetchError as e:
+        print(f"MOLIT period fetch incomplete: {e}")
+        return e.partial
+
+@cache_registry.cache_data(ttl=604800, supersede="cache_ts")
+def _get_period_apt_data(service_key, lawd_cd, months=12, cache_ts=0):
     if not service_key:
         return pd.DataFrame()
         
@@ -23,19 +140,74 @@ def get_period_apt_data(service_key, lawd_cd, months=12, _cache_ts=0):
         deal_ymd = current_date.strftime("%Y%m")
         ym_to_fetch.append(deal_ymd)
 
-    with st.spinner(f"'{lawd_cd}' 지역의 최근 {months}개월 데이터를 불러옵니다..."):
+    # 작업 스레드(스크립트 컨텍스트 없음)에서 호출되면 스피너 없이 조회
+    spinner = (st.spinner(f"'{lawd_cd}' 지역의 최근 {months}개월 데이터를 불러옵니다...")
+               if get_script_run_ctx(suppress_warning=True) else contextlib.nullcontext())
+    with spinner:
+        failed = []
         for deal_ymd in ym_to_fetch:
-            df_month = fetch_apt_trade_data_cached(service_key, lawd_cd, deal_ymd, _cache_ts=_cache_ts)
+            try:
+                df_month = fetch_apt_trade_data_cached(service_key, lawd_cd, deal_ymd, cache_ts=cache_ts)
+            except AptFetchError:
+                failed.append(deal_ymd)
+                continue
             if not df_month.empty:
                 all_dfs.append(df_month)
     
-    return pd.concat(all_dfs, ignore_index=True) if all_dfs else pd.DataFrame()
+    merged = pd.concat(all_dfs, ignore_index=True) if all_dfs else pd.DataFrame()
+    if failed:
+        raise AptFetchError(f"{lawd_cd} {', '.join(failed)} 조회 실패", partial=merged)
+    return merged
+
+def build_real_estate_metrics(favorite_apts, service_key, cache_invalidation_ts=None, months=3):
+    """관심 단지별 최신 거래 요약 타일과 상세 탭용 통합 거래 내역을 만듭니다.
+
+    반환값: (metrics_data, df_display)
+    """
+    cache_invalidation_ts = cache_invalidation_ts or {}
+    metrics_data = []
+    apt_frames = []
+    for idx, item in enumerate(favorite_apts):
+        base = {"label": f"🏠 {item['apt_name']}", "type": "real_estate", "id": idx, "key": f"real_estate:{item['id']}"}
+        ts = cache_invalidation_ts.get(item['lawd_cd'], 0)
+        df = get_period_apt_data(service_key, item['lawd_cd'], months=months, cache_ts=ts)
+        if df.empty:
+            metrics_data.append({**base, "value": "데이터 없음", "delta": "API 확인"})
+            continue
+
+        # 해당 아파트만 필터링 및 최신순 정렬
+        apt_df = df[df['아파트'] == item['apt_name']].sort_values(by='계약일', ascending=False)
+        if apt_df.empty:
+            metrics_data.append({**base, "value": f"최근 {months}개월 거래 없음", "delta": "-"})
+            continue
 
-@st.cache_data(ttl=86400)
+        # 상세 데이터 병합은 마지막에 한 번만 수행 (반복 concat 비용 제거)
+        apt_frames.append(apt_df)
+
+        # 메트릭(요약) 추가 - 가장 최신 거래 1건
+        recent = apt_df.iloc[0]
+        # 계약일 포맷팅 (YYYY-MM-DD -> MM-DD)
+        deal_date = str(recent['계약일'])
+        if len(deal_date) >= 10: deal_date = deal_date[5:]
+        metrics_data.append({
+            **base,
+            "price": int(recent['거래금액']) * 10000,   # 포트폴리오 평가용 (원)
+            "currency": "KRW",
+            "value": f"{recent['거래금액']:,} 만원",
+            "delta": f"{deal_date} | {recent['층']}층 ({recent['전용면적']}㎡)",
+        })
+
+    df_display = pd.concat(apt_frames, ignore_index=True) if apt_frames else pd.DataFrame()
+    return metrics_data, df_display
+
+@profiler.cached("upbit")
+@cache_registry.cache_data(ttl=86400)
 def get_upbit_markets():
     try:
-        url = "https://api.upbit.com/v1/market/all?isDetails=false"
-        response = requests.get(url)
+        url = f"{UPBIT_API_BASE}/v1/market/all?isDetails=false"
+        with profiler.upstream("upbit", "market/all") as call:
+            response = requests.get(url)
+            call.nbytes = len(response.content)
         data = response.json()
         market_dict = {}
         for item in data:
@@ -45,24 +217,81 @@ def get_upbit_markets():
     except Exception:
         return {}
 
-@st.cache_data(ttl=60)
+# [CHANGED] 실시간 요약 타일이 수 초 단위로 갱신되므로 TTL 단축
+@profiler.cached("upbit")
+@cache_registry.cache_data(ttl=5)
 def get_crypto_price(ticker):
+    # [NEW] 로컬 저장소 우선 조회
+    snap = data_store.get_quote(ticker, STORE_MAX_AGE["coin"])
+    if snap:
+        return snap["price"], snap["change"]
     try:
-        coin_url = f"https://api.upbit.com/v1/ticker?markets={ticker}"
-        coin_resp = requests.get(coin_url).json()
+        coin_url = f"{UPBIT_API_BASE}/v1/ticker?markets={ticker}"
+        with profiler.upstream("upbit", "ticker") as call:
+            response = requests.get(coin_url)
+            call.nbytes = len(response.content)
+        coin_resp = response.json()
         price = coin_resp[0]['trade_price']
         change = coin_resp[0]['signed_change_rate'] * 100
         return price, change
     except Exception:
         return 0, 0
 
-@st.cache_data(ttl=60)
+# [NEW] 스크리너용 전체 KRW 마켓 시세 스냅샷
+# 갱신 주기(요약 타일과 같음) 구간을 캐시 키로 사용하므로, 같은 구간의 모든 세션/재실행이 한 번의 조회를 공유합니다.
+UPBIT_SNAPSHOT_TTL = 10
+UPBIT_TICKER_BATCH = 100   # /v1/ticker 1회 요청당 마켓 수
+SNAPSHOT_COLUMNS = ['market', 'trade_price', 'signed_change_rate', 'acc_trade_price_24h',
+                    'high_price', 'low_price', 'prev_closing_price']
+
+@profiler.cached("upbit")
+def get_upbit_snapshot():
+    """전체 KRW 마켓의 현재가/등락률/24시간 거래대금/고저가 DataFrame을 반환합니다."""
+    markets = tuple(sorted(get_upbit_markets().values()))
+    if not markets:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+    return _get_upbit_snapshot(markets, int(time.time() // UPBIT_SNAPSHOT_TTL))
+
+@cache_registry.cache_data(ttl=UPBIT_SNAPSHOT_TTL * 2, max_entries=4)
+def _get_upbit_snapshot(markets, bucket):
+    rows = []
+    for i in range(0, len(markets), UPBIT_TICKER_BATCH):
+        batch = markets[i:i + UPBIT_TICKER_BATCH]
+        try:
+            url = f"{UPBIT_API_BASE}/v1/ticker?markets={','.join(batch)}"
+            with profiler.upstream("upbit", "ticker") as call:
+                response = requests.get(url, timeout=5)
+                call.nbytes = len(response.content)
+            response.raise_for_status()
+            rows.extend(response.json())
+        except Exception:
+            continue   # 일부 배치가 실패해도 나머지 마켓은 표시
+    df = pd.DataFrame(rows).reindex(columns=SNAPSHOT_COLUMNS)
+    for col in SNAPSHOT_COLUMNS[1:]:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+# [NEW] 장중 TTL - 휴장 중(야간/주말/휴장일)에는 다음 개장까지 캐시를 유지합니다.
+STOCK_OPEN_TTL = 60
+FX_OPEN_TTL = 3600
+
+@profiler.cached("yahoo")
 def get_stock_price(ticker):
+    bucket = market_calendar.cache_bucket(ticker, STOCK_OPEN_TTL)
+    result = _get_stock_price(ticker, bucket)
+    # 조회 실패 결과가 휴장 기간 내내 캐시에 남지 않도록 제거
+    if not result[0] and bucket.startswith("closed"):
+        _get_stock_price.clear(ticker, bucket)
+    return result
+
+@cache_registry.cache_data(ttl=86400, max_entries=512)
+def _get_stock_price(ticker, bucket):
+    # [NEW] 로컬 저장소 우선 조회 (휴장 중에는 장 종료 이후 스냅샷이면 충분)
+    snap = data_store.get_quote(ticker, market_calendar.store_max_age(ticker, STORE_MAX_AGE["stock"]))
+    if snap:
+        return snap["price"], snap["change"], snap["currency"] or "KRW"
     try:
-        stock = yf.Ticker(ticker)
-        currency = stock.fast_info.get('currency', 'KRW')
-        
-        hist = stock.history(period="2d")
+        hist, currency = _yahoo_history(ticker, "2d", with_currency=True)
         if len(hist) >= 2:
             price = hist['Close'].iloc[-1]
             prev_close = hist['Close'].iloc[-2]
@@ -73,15 +302,25 @@ def get_stock_price(ticker):
     except Exception:
         return 0, 0, "KRW"
 
-@st.cache_data(ttl=3600)
+@profiler.cached("yahoo")
 def get_exchange_rate(from_currency="USD", to_currency="KRW"):
+    ticker_str = f"{from_currency}{to_currency}=X"
+    if from_currency == "USD" and to_currency == "KRW":
+        ticker_str = "KRW=X"
+    bucket = market_calendar.cache_bucket(ticker_str, FX_OPEN_TTL)
+    result = _get_exchange_rate(ticker_str, bucket)
+    if result[0] is None and bucket.startswith("closed"):
+        _get_exchange_rate.clear(ticker_str, bucket)
+    return result
+
+@cache_registry.cache_data(ttl=86400, max_entries=64)
+def _get_exchange_rate(ticker_str, bucket):
+    # [NEW] 로컬 저장소 우선 조회 (주말에는 금요일 마감 이후 스냅샷이면 충분)
+    snap = data_store.get_quote(ticker_str, market_calendar.store_max_age(ticker_str, STORE_MAX_AGE["fx"]))
+    if snap:
+        return snap["price"], snap["change"]
     try:
-        ticker_str = f"{from_currency}{to_currency}=X"
-        if from_currency == "USD" and to_currency == "KRW":
-            ticker_str = "KRW=X"
-            
-        ticker = yf.Ticker(ticker_str)
-        hist = ticker.history(period="5d")
+        hist, _ = _yahoo_history(ticker_str, "5d")
         
         if len(hist) >= 2:
             rate = hist['Close'].iloc[-1]
@@ -93,3 +332,137 @@ def get_exchange_rate(from_currency="USD", to_currency="KRW"):
         return None, 0.0
     except Exception:
         return None, 0.0
+
+def fx_ticker(currency):
+    return "KRW=X" if currency == "USD" else f"{currency}KRW=X"
+
+@profiler.cached("yahoo")
+def get_fx_rates(currencies):
+    """[NEW] 통화별 원화 환율 {통화: 1단위당 원}을 한 번에 조회합니다. (조회 실패한 통화는 제외)
+
+    USD는 환율 타일과 같은 캐시(get_exchange_rate)를 사용하고, 나머지 통화는 한 번의 일괄 요청으로 가져옵니다.
+    """
+    wanted = sorted({c for c in currencies if c and c not in ("KRW", "USD")})
+    rates = {"KRW": 1.0}
+    if "USD" in currencies:
+        usd, _ = get_exchange_rate("USD", "KRW")
+        if usd:
+            rates["USD"] = float(usd)
+    if wanted:
+        bucket = market_calendar.cache_bucket("KRW=X", FX_OPEN_TTL)
+        fetched = _get_fx_rates(tuple(wanted), bucket)
+        # 일부 통화 조회 실패 결과가 휴장 기간 내내 캐시에 남지 않도록 제거
+        if len(fetched) < len(wanted) and bucket.startswith("closed"):
+            _get_fx_rates.clear(tuple(wanted), bucket)
+        rates.update(fetched)
+    return rates
+
+@cache_registry.cache_data(ttl=86400, max_entries=64)
+def _get_fx_rates(currencies, bucket):
+    rates = {}
+    missing = []
+    for currency in currencies:
+        ticker_str = fx_ticker(currency)
+        snap = data_store.get_quote(ticker_str, market_calendar.store_max_age(ticker_str, STORE_MAX_AGE["fx"]))
+        if snap:
+            rates[currency] = float(snap["price"])
+        else:
+            missing.append(currency)
+    if not missing:
+        return rates
+    try:
+        if YAHOO_CHART_BASE:
+            # chart API는 일괄 조회를 지원하지 않으므로 통화별로 호출
+            for currency in missing:
+                hist, _ = _yahoo_chart_history(fx_ticker(currency), "5d")
+                if not hist.empty:
+                    rates[currency] = float(hist['Close'].iloc[-1])
+        else:
+            import yfinance as yf
+            tickers = [fx_ticker(c) for c in missing]
+            with profiler.upstream("yahoo", "download"):
+                closes = yf.download(tickers, period="5d", progress=False, threads=True, group_by="column")["Close"]
+            if isinstance(closes, pd.Series):
+                closes = closes.to_frame(tickers[0])
+            last = closes.ffill().iloc[-1] if not closes.empty else pd.Series(dtype=float)
+            for currency, ticker_str in zip(missing, tickers):
+                if pd.notna(last.get(ticker_str)):
+                    rates[currency] = float(last[ticker_str])
+    except Exception:
+        pass
+    return rates
+
+# [NEW] 차트/지표/AI 컨텍스트가 같은 캐시 항목을 쓰도록 캔들은 항상 최대 개수(업비트 1회 요청 상한)로 조회
+UPBIT_CANDLE_COUNT = 200
+
+@profiler.cached("upbit")
+@cache_registry.cache_data(ttl=300)
+def get_upbit_candles(ticker, unit="days", count=200):
+    """업비트 캔들(OHLCV) 데이터를 오래된 순으로 정렬된 DataFrame으로 반환합니다. (unit: days/weeks/months)"""
+    try:
+        url = f"{UPBIT_API_BASE}/v1/candles/{unit}?market={ticker}&count={count}"
+        with profiler.upstream("upbit", f"candles/{unit}") as call:
+            response = requests.get(url, timeout=5)
+            call.nbytes = len(response.content)
+        return _parse_upbit_candles(response.json())
+    except Exception:
+        return pd.DataFrame()
+
+def _parse_upbit_candles(records):
+    df = pd.DataFrame(records)
+    if df.empty:
+        return df
+    df['date'] = pd.to_datetime(df['candle_date_time_kst'])
+    for col in ['opening_price', 'high_price', 'low_price', 'trade_price', 'candle_acc_trade_volume']:
+        df[col] = df[col].astype(float)
+    return df.sort_values('date').reset_index(drop=True)
+
+# [FIX] 장기 일봉은 코인마다 여러 페이지를 받으므로 업비트 요청 수 제한(초당)을 넘지 않도록 동시 조회 수와 속도를 제한
+UPBIT_HISTORY_WORKERS = threading.BoundedSemaphore(int(os.getenv("UPBIT_HISTORY_WORKERS", "2")))
+UPBIT_HISTORY_LIMITER = QuotaLimiter(rate_per_sec=float(os.getenv("UPBIT_HISTORY_RATE_PER_SEC", "5")), daily_quota=0)
+
+@profiler.cached("upbit")
+@cache_registry.cache_data(ttl=3600)
+def get_upbit_daily_history(ticker, days=UPBIT_CANDLE_COUNT):
+    """[NEW] 업비트 일봉을 1회 최대 개수씩 과거 방향으로 이어 받아 최근 days개를 반환합니다. (리스크 분석 등 장기 이력용)
+
+    [FIX] 요청이 하나라도 실패(HTTP 오류/429, 목록이 아닌 응답)하면 예외를 발생시켜 일부만 받은 이력이 캐시되지 않게 합니다.
+    """
+    pages = []
+    to = None
+    with UPBIT_HISTORY_WORKERS:
+        while days > 0:
+            count = min(days, UPBIT_CANDLE_COUNT)
+            url = f"{UPBIT_API_BASE}/v1/candles/days?market={ticker}&count={count}" + (f"&to={to}" if to else "")
+            UPBIT_HISTORY_LIMITER.acquire()
+            with profiler.upstream("upbit", "candles/days") as call:
+                response = requests.get(url, timeout=5)
+                call.nbytes = len(response.content)
+            response.raise_for_status()
+            batch = response.json()
+            if not isinstance(batch, list):
+                raise ValueError(f"Unexpected Upbit candles response for {ticker}: {str(batch)[:200]}")
+            if not batch:
+                break
+            oldest = min(c['candle_date_time_utc'] for c in batch)
+            if to is not None and oldest >= to:   # 더 과거 데이터가 없음
+                break
+            pages.append(_parse_upbit_candles(batch))
+            days -= len(batch)
+            to = oldest
+            if len(batch) < count:
+                break
+    if not pages:
+        return pd.DataFrame()
+    df = pd.concat(pages, ignore_index=True).drop_duplicates('date')
+    return df.sort_values('date').reset_index(drop=True)
+
+@profiler.cached("yahoo")
+@cache_registry.cache_data(ttl=300)
+def get_stock_history(ticker, period="1mo"):
+    """Yahoo Finance 가격 이력(OHLCV)을 반환합니다."""
+    try:
+        hist, _ = _yahoo_history(ticker, period)
+        return hist
+    except Exception:
+        return pd.DataFrame()
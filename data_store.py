@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# 수집기(main.py)와 앱(app.py)이 공유하는 로컬 저장소 (SQLite)
+DB_FILE = os.getenv("MARKET_DB_FILE", "market_data.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quote_snapshots (
+    symbol TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    price REAL NOT NULL,
+    change REAL NOT NULL,
+    currency TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quote_history (
+    symbol TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    ts REAL NOT NULL,
+    price REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quote_history_symbol_ts ON quote_history (symbol, ts);
+CREATE TABLE IF NOT EXISTS apt_trades (
+    lawd_cd TEXT NOT NULL,
+    deal_ymd TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (lawd_cd, deal_ymd)
+);
+CREATE TABLE IF NOT EXISTS apt_month_meta (
+    lawd_cd TEXT NOT NULL,
+    deal_ymd TEXT NOT NULL,
+    total_count INTEGER,
+    head_hash TEXT,
+    PRIMARY KEY (lawd_cd, deal_ymd)
+);
+CREATE TABLE IF NOT EXISTS apt_catalog (
+    lawd_cd TEXT NOT NULL,
+    name TEXT NOT NULL,
+    jamo TEXT NOT NULL,
+    choseong TEXT NOT NULL,
+    PRIMARY KEY (lawd_cd, name)
+);
+CREATE TABLE IF NOT EXISTS apt_catalog_regions (
+    lawd_cd TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+"""
+
+_init_lock = threading.Lock()
+_initialized = set()
+
+@contextmanager
+def _connect(db_file: Optional[str] = None):
+    """WAL 모드 SQLite 연결을 열고, 최초 1회 스키마를 생성합니다."""
+    path = db_file or DB_FILE
+    conn = sqlite3.connect(path, timeout=5)
+    try:
+        if path not in _initialized:
+            with _init_lock:
+                if path not in _initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    _initialized.add(path)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+def save_quotes(rows: List[Dict], db_file: Optional[str] = None) -> None:
+    """시세 스냅샷을 갱신하고 이력 테이블에 추가합니다.
+
+    rows: [{"symbol", "kind", "price", "change", "currency"}, ...]
+    """
+    if not rows:
+        return
+    now = time.time()
+    with _connect(db_file) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO quote_snapshots (symbol, kind, price, change, currency, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(r["symbol"], r["kind"], float(r["price"]), float(r.get("change", 0.0)), r.get("currency"), now) for r in rows]
+        )
+        conn.executemany(
+            "INSERT INTO quote_history (symbol, kind, ts, price) VALUES (?, ?, ?, ?)",
+            [(r["symbol"], r["kind"], now, float(r["price"])) for r in rows]
+        )
+
+def get_quote(symbol: str, max_age: float, db_file: Optional[str] = None) -> Optional[Dict]:
+    """max_age(초) 이내에 저장된 시세 스냅샷을 반환합니다. 없거나 오래되었으면 None."""
+    try:
+        with _connect(db_file) as conn:
+            row = conn.execute(
+                "SELECT price, change, currency, updated_at FROM quote_snapshots WHERE symbol = ?", (symbol,)
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    if row is None or time.time() - row[3] > max_age:
+        return None
+    return {"price": row[0], "change": row[1], "currency": row[2], "updated_at": row[3]}
+
+def get_quote_history(symbol: str, since: float = 0, db_file: Optional[str] = None) -> pd.DataFrame:
+    """저장된 시세 이력(ts, price)을 시간순으로 반환합니다."""
+    with _connect(db_file) as conn:
+        return pd.read_sql_query(
+            "SELECT ts, price FROM quote_history WHERE symbol = ? AND ts >= ? ORDER BY ts",
+            conn, params=(symbol, since)
+        )
+
+def compact_quote_history(raw_before: float, keep_after: float = 0, since: float = 0, bar: int = 60,
+                          db_file: Optional[str] = None) -> int:
+    """시세 이력을 줄이고 삭제한 행 수를 반환합니다.
+
+    [since, raw_before) 구간의 틱은 심볼별 bar초 봉마다 마지막 가격(종가)만 남기고,
+    keep_after(0이면 무기한 보관) 이전 이력은 삭제합니다. 구간 경계는 bar초 단위로 내림합니다.
+    """
+    raw_before, since = raw_before // bar * bar, since // bar * bar
+    with _connect(db_file) as conn:
+        before = conn.total_changes
+        # (symbol, ts) 인덱스를 타도록 심볼별로 처리
+        for (symbol,) in conn.execute("SELECT DISTINCT symbol FROM quote_snapshots").fetchall():
+            if keep_after:
+                conn.execute("DELETE FROM quote_history WHERE symbol = ? AND ts < ?", (symbol, keep_after))
+            if since < raw_before:
+                conn.execute(
+                    "DELETE FROM quote_history WHERE symbol = ? AND ts >= ? AND ts < ? AND rowid NOT IN ("
+                    " SELECT keep FROM (SELECT rowid AS keep, MAX(ts) FROM quote_history"
+                    " WHERE symbol = ? AND ts >= ? AND ts < ? GROUP BY CAST(ts / ? AS INTEGER)))",
+                    (symbol, since, raw_before, symbol, since, raw_before, bar)
+                )
+        return conn.total_changes - before
+
+def list_history_symbols(db_file: Optional[str] = None) -> List[str]:
+    """시세가 한 번이라도 저장된 심볼 목록 (이력 테이블 전체를 훑지 않도록 스냅샷 테이블 사용)"""
+    with _connect(db_file) as conn:
+        return [row[0] for row in conn.execute("SELECT symbol FROM quote_snapshots ORDER BY symbol")]
+
+def save_apt_month(lawd_cd: str, deal_ymd: str, df: pd.DataFrame, db_file: Optional[str] = None) -> None:
+    """지역/월 단위 실거래 데이터를 저장합니다."""
+    payload = df.to_json(orient="records", force_ascii=False) if not df.empty else "[]"
+    with _connect(db_file) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO apt_trades (lawd_cd, deal_ymd, payload, row_count, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (lawd_cd, deal_ymd, payload, len(df), time.time())
+        )
+
+def get_apt_month(lawd_cd: str, deal_ymd: str, max_age: Optional[float] = None, db_file: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """저장된 지역/월 실거래 데이터를 반환합니다. 없거나 max_age(초)보다 오래되었으면 None."""
+    entry = get_apt_month_entry(lawd_cd, deal_ymd, db_file)
+    if entry is None:
+        return None
+    df, updated_at = entry
+    if max_age is not None and time.time() - updated_at > max_age:
+        return None
+    return df
+
+def get_apt_month_entry(lawd_cd: str, deal_ymd: str, db_file: Optional[str] = None) -> Optional[tuple]:
+    """저장된 지역/월 실거래 데이터와 최근 확인 시각을 (DataFrame, updated_at)으로 반환합니다."""
+    try:
+        with _connect(db_file) as conn:
+            row = conn.execute(
+                "SELECT payload, updated_at FROM apt_trades WHERE lawd_cd = ? AND deal_ymd = ?", (lawd_cd, deal_ymd)
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    records = json.loads(row[0])
+    return (pd.DataFrame(records) if records else pd.DataFrame()), row[1]
+
+def touch_apt_month(lawd_cd: str, deal_ymd: str, db_file: Optional[str] = None) -> None:
+    """변경이 없음을 확인한 월의 확인 시각만 갱신합니다. (데이터는 그대로 유지)"""
+    with _connect(db_file) as conn:
+        conn.execute(
+            "UPDATE apt_trades SET updated_at = ? WHERE lawd_cd = ? AND deal_ymd = ?",
+            (time.time(), lawd_cd, deal_ymd)
+        )
+
+def save_apt_month_meta(lawd_cd: str, deal_ymd: str, total_count: Optional[int], head_hash: Optional[str],
+                        db_file: Optional[str] = None) -> None:
+    """전체 다운로드 시점의 totalCount와 첫 항목 해시를 저장합니다. (변경 감지 기준값)"""
+    with _connect(db_file) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO apt_month_meta (lawd_cd, deal_ymd, total_count, head_hash) VALUES (?, ?, ?, ?)",
+            (lawd_cd, deal_ymd, total_count, head_hash)
+        )
+
+def get_apt_month_meta(lawd_cd: str, deal_ymd: str, db_file: Optional[str] = None) -> Optional[Dict]:
+    with _connect(db_file) as conn:
+        row = conn.execute(
+            "SELECT total_count, head_hash FROM apt_month_meta WHERE lawd_cd = ? AND deal_ymd = ?", (lawd_cd, deal_ymd)
+        ).fetchone()
+    return {"total_count": row[0], "head_hash": row[1]} if row else None
+
+def upsert_apt_names(lawd_cd: str, rows: List[tuple], db_file: Optional[str] = None) -> int:
+    """지역의 아파트 이름 목록을 추가합니다. rows: [(name, jamo, choseong), ...]
+
+    새로 추가된 이름이 있을 때만 지역 버전(updated_at)을 갱신하고, 추가된 개수를 반환합니다.
+    """
+    with _connect(db_file) as conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO apt_catalog (lawd_cd, name, jamo, choseong) VALUES (?, ?, ?, ?)",
+            [(lawd_cd, name, jamo, cho) for name, jamo, cho in rows]
+        )
+        added = conn.total_changes - before
+        if added:
+            conn.execute(
+                "INSERT OR REPLACE INTO apt_catalog_regions (lawd_cd, updated_at) VALUES (?, ?)",
+                (lawd_cd, time.time())
+            )
+    return added
+
+def get_apt_catalog(lawd_cd: str, db_file: Optional[str] = None) -> List[tuple]:
+    """지역의 (name, jamo, choseong) 목록을 반환합니다."""
+    with _connect(db_file) as conn:
+        return conn.execute(
+            "SELECT name, jamo, choseong FROM apt_catalog WHERE lawd_cd = ?", (lawd_cd,)
+        ).fetchall()
+
+def get_apt_catalog_versions(db_file: Optional[str] = None) -> Dict[str, float]:
+    """지역별 아파트 목록 버전(최근 갱신 시각)을 반환합니다."""
+    with _connect(db_file) as conn:
+        return dict(conn.execute("SELECT lawd_cd, updated_at FROM apt_catalog_regions").fetchall())
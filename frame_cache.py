@@ -0,0 +1,166 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+import pandas as pd
+import streamlit as st
+
+# 세션별 / 전체(모든 세션 합계) DataFrame 메모리 예산 (MB)
+SESSION_BUDGET_MB = float(os.getenv("SESSION_FRAME_BUDGET_MB", "64"))
+GLOBAL_BUDGET_MB = float(os.getenv("GLOBAL_FRAME_BUDGET_MB", "512"))
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """DataFrame의 실제 메모리 사용량 (문자열 등 object 컬럼 포함)"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class GlobalFrameBudget:
+    """모든 세션 캐시의 항목을 하나의 LRU 순서로 관리하여 전체 예산을 넘으면 가장 오래된 항목부터 제거합니다."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+        self._order: "OrderedDict[tuple, int]" = OrderedDict()
+        self._caches: Dict[int, "weakref.ref[SessionFrameCache]"] = {}
+
+    def register(self, cache: "SessionFrameCache") -> None:
+        with self._lock:
+            self._caches[id(cache)] = weakref.ref(cache)
+        # 세션이 끝나 캐시가 사라지면 사용량도 함께 반환
+        weakref.finalize(cache, self._release_cache, id(cache))
+
+    def _release_cache(self, cache_id: int) -> None:
+        with self._lock:
+            for entry in [e for e in self._order if e[0] == cache_id]:
+                self.bytes -= self._order.pop(entry)
+            self._caches.pop(cache_id, None)
+
+    def touch(self, cache: "SessionFrameCache", key: Hashable) -> None:
+        with self._lock:
+            entry = (id(cache), key)
+            if entry in self._order:
+                self._order.move_to_end(entry)
+
+    def add(self, cache: "SessionFrameCache", key: Hashable, nbytes: int) -> None:
+        victims = []
+        with self._lock:
+            self._order[(id(cache), key)] = nbytes
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes and self._order:
+                (cache_id, old_key), old_bytes = self._order.popitem(last=False)
+                self.bytes -= old_bytes
+                self.evictions += 1
+                ref = self._caches.get(cache_id)
+                victims.append((ref() if ref else None, old_key))
+        # 세션 캐시의 잠금은 전체 잠금 밖에서 잡아 교착을 피함
+        for owner, old_key in victims:
+            if owner is not None and owner._drop(old_key):
+                owner.evictions += 1
+
+    def remove(self, cache: "SessionFrameCache", key: Hashable) -> None:
+        with self._lock:
+            nbytes = self._order.pop((id(cache), key), None)
+            if nbytes is not None:
+                self.bytes -= nbytes
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._caches),
+                "entries": len(self._order),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+class SessionFrameCache:
+    """세션별 DataFrame LRU 캐시 (세션 예산과 전체 예산을 모두 적용)
+
+    st.session_state에 저장해 dict처럼 get()/[]= 로 사용합니다.
+    """
+
+    def __init__(self, max_bytes: int, budget: Optional[GlobalFrameBudget] = None):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._budget = budget
+        if budget is not None:
+            budget.register(self)
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+        if self._budget is not None:
+            self._budget.touch(self, key)
+        return item[0]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __setitem__(self, key: Hashable, df: pd.DataFrame) -> None:
+        nbytes = frame_nbytes(df)
+        with self._lock:
+            evicted = [key] if self._drop(key) else []
+            # 항목 하나가 세션 예산보다 크면 보관하지 않음
+            if nbytes <= self.max_bytes:
+                self._items[key] = (df, nbytes)
+                self.bytes += nbytes
+                while self.bytes > self.max_bytes:
+                    old_key = next(iter(self._items))
+                    self._drop(old_key)
+                    self.evictions += 1
+                    evicted.append(old_key)
+        if self._budget is not None:
+            for old_key in evicted:
+                self._budget.remove(self, old_key)
+            if nbytes <= self.max_bytes:
+                self._budget.add(self, key, nbytes)
+
+    def _drop(self, key: Hashable) -> bool:
+        """항목을 제거합니다. (전체 예산 반영은 호출 측 책임)"""
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return False
+            self.bytes -= item[1]
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            keys = list(self._items)
+            self._items.clear()
+            self.bytes = 0
+        if self._budget is not None:
+            for key in keys:
+                self._budget.remove(self, key)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+@st.cache_resource
+def get_global_budget() -> GlobalFrameBudget:
+    return GlobalFrameBudget(int(GLOBAL_BUDGET_MB * 1024 * 1024))
+
+def new_session_cache() -> SessionFrameCache:
+    """세션 예산과 공유 전체 예산이 적용된 새 세션 캐시를 만듭니다."""
+    return SessionFrameCache(int(SESSION_BUDGET_MB * 1024 * 1024), get_global_budget())
@@ -0,0 +1,244 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import data_manager
+
+# 기술적 지표 엔진 (SMA/EMA, RSI, MACD, 볼린저 밴드, ATR)
+#
+# 캐시된 OHLCV(open/high/low/close/volume, 시간순) 전체를 벡터 연산으로 한 번 계산하고,
+# 이후 새 캔들이 추가되거나 마지막(진행 중) 캔들이 바뀌면 바뀐 행부터만 이어서 계산합니다.
+# EMA 계열(EMA/RSI/MACD/ATR)은 직전 행의 값을 시드로, 이동 창(SMA/볼린저)은 창 길이만큼의 과거 행을 포함해 계산합니다.
+
+# 보관할 (심볼, 간격, 파라미터)별 지표 결과 최대 개수
+INDICATOR_CACHE_SIZE = int(os.getenv("INDICATOR_CACHE_SIZE", "128"))
+
+DEFAULT_PARAMS = {
+    "sma": 20,
+    "ema": 20,
+    "rsi": 14,
+    "macd": (12, 26, 9),
+    "bb": (20, 2.0),
+    "atr": 14,
+}
+
+# 차트 오버레이 이름 -> 결과 컬럼
+OVERLAYS = {
+    "SMA": ["sma"],
+    "EMA": ["ema"],
+    "볼린저 밴드": ["bb_mid", "bb_upper", "bb_lower"],
+    "RSI": ["rsi"],
+    "MACD": ["macd", "macd_signal", "macd_hist"],
+    "ATR": ["atr"],
+}
+
+def params_key(params: Optional[Dict] = None) -> Tuple:
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    return tuple(sorted(params.items()))
+
+def ohlcv_from_upbit(candles: pd.DataFrame) -> pd.DataFrame:
+    """data_manager.get_upbit_candles() 결과를 OHLCV 형식으로 변환합니다."""
+    if candles.empty:
+        return pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
+    return pd.DataFrame({
+        "open": candles["opening_price"].to_numpy(float),
+        "high": candles["high_price"].to_numpy(float),
+        "low": candles["low_price"].to_numpy(float),
+        "close": candles["trade_price"].to_numpy(float),
+        "volume": candles["candle_acc_trade_volume"].to_numpy(float),
+    }, index=pd.DatetimeIndex(candles["date"], name="date"))
+
+def ohlcv_from_yahoo(hist: pd.DataFrame) -> pd.DataFrame:
+    """data_manager.get_stock_history() 결과를 OHLCV 형식으로 변환합니다."""
+    if hist.empty:
+        return pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
+    out = hist[["Open", "High", "Low", "Close", "Volume"]].astype(float)
+    out.columns = ["open", "high", "low", "close", "volume"]
+    out.index.name = "date"
+    return out
+
+def _ewm(values: np.ndarray, alpha: float, seed: Optional[float] = None) -> np.ndarray:
+    """adjust=False 지수 이동 평균. seed가 있으면 직전 값으로 이어서 계산합니다."""
+    if seed is not None and not np.isnan(seed):
+        if len(values) <= 32:
+            # 새 캔들 몇 개만 이어서 계산할 때는 pandas 호출 비용보다 단순 반복이 빠름
+            out = np.empty(len(values))
+            prev = float(seed)
+            for i, v in enumerate(values):
+                prev = prev + alpha * (v - prev)
+                out[i] = prev
+            return out
+        return pd.Series(np.concatenate(([seed], values))).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+    return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+def warmup(params: Optional[Dict] = None) -> int:
+    """모든 지표가 유효해지기까지 필요한 행 수 (이보다 앞에서 바뀌면 전체를 다시 계산)"""
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    fast, slow, signal = p["macd"]
+    return max(p["sma"], p["ema"], p["rsi"] + 1, slow + signal, p["bb"][0], p["atr"] + 1)
+
+def compute(ohlcv: pd.DataFrame, params: Optional[Dict] = None, seed: Optional[pd.Series] = None,
+            lookback: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """OHLCV 전체(또는 seed 이후 구간)의 지표를 계산합니다.
+
+    seed: 직전 행의 계산 결과 (증분 계산 시), lookback: 이동 창 계산에 필요한 직전 OHLCV 행
+    """
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    n = len(ohlcv)
+    close = ohlcv["close"].to_numpy(float)
+    high = ohlcv["high"].to_numpy(float)
+    low = ohlcv["low"].to_numpy(float)
+    s = seed if seed is not None else {}
+    prev_close = float(lookback["close"].iloc[-1]) if lookback is not None and len(lookback) else np.nan
+
+    out = {}
+    # 이동 창 지표: 직전 행을 붙여 계산한 뒤 새 구간만 사용
+    window_close = pd.Series(np.concatenate((lookback["close"].to_numpy(float), close)) if lookback is not None else close)
+    out["sma"] = window_close.rolling(p["sma"]).mean().to_numpy()[-n:]
+    bb_n, bb_k = p["bb"]
+    roll = window_close.rolling(bb_n)
+    mid, std = roll.mean().to_numpy()[-n:], roll.std(ddof=0).to_numpy()[-n:]
+    out["bb_mid"], out["bb_upper"], out["bb_lower"] = mid, mid + bb_k * std, mid - bb_k * std
+
+    # EMA 계열: 직전 값을 시드로 이어서 계산
+    out["ema"] = _ewm(close, 2 / (p["ema"] + 1), s.get("ema"))
+    fast, slow, signal = p["macd"]
+    out["_ema_fast"] = _ewm(close, 2 / (fast + 1), s.get("_ema_fast"))
+    out["_ema_slow"] = _ewm(close, 2 / (slow + 1), s.get("_ema_slow"))
+    out["macd"] = out["_ema_fast"] - out["_ema_slow"]
+    out["macd_signal"] = _ewm(out["macd"], 2 / (signal + 1), s.get("macd_signal"))
+    out["macd_hist"] = out["macd"] - out["macd_signal"]
+
+    # RSI / ATR (Wilder 평활: alpha = 1/n)
+    prev = np.concatenate(([prev_close], close[:-1]))
+    delta = close - prev
+    gain, loss = np.where(delta > 0, delta, 0.0), np.where(delta < 0, -delta, 0.0)
+    if seed is None:   # 첫 행은 이전 종가가 없으므로 제외
+        gain[0] = loss[0] = np.nan
+    out["_avg_gain"] = _ewm_skip_nan(gain, 1 / p["rsi"], s.get("_avg_gain"))
+    out["_avg_loss"] = _ewm_skip_nan(loss, 1 / p["rsi"], s.get("_avg_loss"))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = out["_avg_gain"] / out["_avg_loss"]
+        out["rsi"] = np.where(out["_avg_loss"] == 0, 100.0, 100 - 100 / (1 + rs))
+    tr = np.nanmax(np.vstack((high - low, np.abs(high - prev), np.abs(low - prev))), axis=0)
+    if seed is None:
+        tr[0] = high[0] - low[0]
+    out["atr"] = _ewm(tr, 1 / p["atr"], s.get("atr"))
+
+    result = pd.DataFrame(out, index=ohlcv.index)
+    if seed is None:
+        # 계산에 필요한 행 수가 모자란 구간은 비움
+        result.loc[result.index[:p["rsi"]], "rsi"] = np.nan
+        result.loc[result.index[:p["atr"] - 1], "atr"] = np.nan
+        result.loc[result.index[:p["ema"] - 1], "ema"] = np.nan
+        result.loc[result.index[:slow - 1], ["macd", "macd_signal", "macd_hist"]] = np.nan
+        result.loc[result.index[:slow + signal - 2], ["macd_signal", "macd_hist"]] = np.nan
+    return result
+
+def _ewm_skip_nan(values: np.ndarray, alpha: float, seed: Optional[float] = None) -> np.ndarray:
+    if seed is None and len(values) and np.isnan(values[0]):
+        return np.concatenate(([np.nan], _ewm(values[1:], alpha)))
+    return _ewm(values, alpha, seed)
+
+class IndicatorCache:
+    """(심볼, 간격, 파라미터)별 지표 결과를 보관하고 새 캔들에 대해 증분 계산하는 LRU 캐시"""
+
+    def __init__(self, max_entries: int = INDICATOR_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.incremental = 0
+        self.full = 0
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Hashable, Tuple[pd.DataFrame, pd.DataFrame]]" = OrderedDict()
+
+    def get(self, symbol: str, interval: str, ohlcv: pd.DataFrame, params: Optional[Dict] = None) -> pd.DataFrame:
+        """OHLCV에 대한 지표 결과(행 인덱스 동일)를 반환합니다."""
+        key = (symbol, interval, params_key(params))
+        with self._lock:
+            cached = self._items.get(key)
+            if cached is not None:
+                self._items.move_to_end(key)
+        result, kind = self._update(cached, ohlcv, params)
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+            self._items[key] = (ohlcv, result)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return result
+
+    def _update(self, cached, ohlcv: pd.DataFrame, params: Optional[Dict]):
+        if ohlcv.empty:
+            return compute(ohlcv, params), "full"
+        if cached is not None:
+            old_ohlcv, old_result = cached
+            # 고정 개수 조회(count=200 등)로 앞쪽 캔들이 밀려난 경우: 겹치는 구간부터 비교
+            if len(old_ohlcv) and old_ohlcv.index[0] < ohlcv.index[0]:
+                j = old_ohlcv.index.searchsorted(ohlcv.index[0])
+                if j < len(old_ohlcv) and old_ohlcv.index[j] == ohlcv.index[0]:
+                    old_ohlcv, old_result = old_ohlcv.iloc[j:], old_result.iloc[j:]
+            k = _first_change(old_ohlcv, ohlcv)
+            if k is None:
+                return old_result, "hits"
+            w = warmup(params)
+            if k >= w:
+                lookback = ohlcv.iloc[k - w:k]
+                tail = compute(ohlcv.iloc[k:], params, seed=old_result.iloc[k - 1], lookback=lookback)
+                return pd.concat([old_result.iloc[:k], tail]), "incremental"
+        return compute(ohlcv, params), "full"
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._items), "hits": self.hits, "incremental": self.incremental, "full": self.full}
+
+def _first_change(old: pd.DataFrame, new: pd.DataFrame) -> Optional[int]:
+    """기존 OHLCV와 새 OHLCV가 처음 달라지는 행 위치. 같으면 None, 앞부분이 다르면 0."""
+    m = min(len(old), len(new))
+    if m == 0 or old.index[0] != new.index[0]:
+        return 0
+    same_index = old.index[:m] == new.index[:m]
+    same_values = (old.iloc[:m].to_numpy() == new.iloc[:m].to_numpy()).all(axis=1)
+    diff = np.flatnonzero(~(same_index & same_values))
+    if diff.size:
+        return int(diff[0])
+    return None if len(old) == len(new) else m
+
+@st.cache_resource(show_spinner=False)
+def get_indicator_cache() -> IndicatorCache:
+    return IndicatorCache()
+
+def snapshot(ohlcv: pd.DataFrame, result: pd.DataFrame) -> Dict:
+    """최근 행 기준 지표 요약 (AI 컨텍스트용)"""
+    if result.empty:
+        return {}
+    last, close = result.iloc[-1], float(ohlcv["close"].iloc[-1])
+    prev = result.iloc[-2] if len(result) >= 2 else last
+    snap = {}
+    if pd.notna(last["rsi"]):
+        snap["RSI"] = float(last["rsi"])
+    if pd.notna(last["sma"]):
+        snap["SMA대비%"] = float((close / last["sma"] - 1) * 100)
+    if pd.notna(last["bb_upper"]) and last["bb_upper"] != last["bb_lower"]:
+        snap["볼린저위치%"] = float((close - last["bb_lower"]) / (last["bb_upper"] - last["bb_lower"]) * 100)
+    if pd.notna(last["macd_hist"]):
+        snap["MACD히스토그램"] = float(last["macd_hist"])
+        if pd.notna(prev["macd_hist"]) and np.sign(prev["macd_hist"]) != np.sign(last["macd_hist"]):
+            snap["MACD교차"] = "상향" if last["macd_hist"] > 0 else "하향"
+    if pd.notna(last["atr"]) and close:
+        snap["ATR%"] = float(last["atr"]) / close * 100
+    return snap
+
+def upbit_indicators(ticker: str, unit: str = "days", params: Optional[Dict] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """캐시된 업비트 캔들(차트와 같은 조회)의 (OHLCV, 지표 결과)를 반환합니다."""
+    candles = data_manager.get_upbit_candles(ticker, unit=unit, count=data_manager.UPBIT_CANDLE_COUNT)
+    ohlcv = ohlcv_from_upbit(candles)
+    return ohlcv, get_indicator_cache().get(ticker, unit, ohlcv, params)
+
+def stock_indicators(ticker: str, period: str = "1y", params: Optional[Dict] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """캐시된 Yahoo 일봉 이력(차트와 같은 조회)의 (OHLCV, 지표 결과)를 반환합니다."""
+    ohlcv = ohlcv_from_yahoo(data_manager.get_stock_history(ticker, period=period))
+    return ohlcv, get_indicator_cache().get(ticker, f"1d:{period}", ohlcv, params)
@@ -1,46 +1,262 @@
-import requests
+import os
+import re
+import json
 import time
-from typing import List, Dict
+import datetime
+import argparse
+import requests
+from typing import List, Dict, Optional
+
+import data_store
+import market_calendar
+
+# 수집 주기 (초) - 환경 변수로 조정 가능
+UPBIT_INTERVAL = float(os.getenv("COLLECTOR_UPBIT_INTERVAL", "2"))
+YAHOO_INTERVAL = float(os.getenv("COLLECTOR_YAHOO_INTERVAL", "60"))
+MOLIT_INTERVAL = float(os.getenv("COLLECTOR_MOLIT_INTERVAL", str(6 * 3600)))
+MOLIT_MONTHS = int(os.getenv("COLLECTOR_MOLIT_MONTHS", "3"))
+# 시세 이력 보관: 최근 N일은 원본 틱, 그 이전은 1분 종가만 유지하고 KEEP_DAYS가 지나면 삭제 (0이면 무기한)
+HISTORY_RAW_DAYS = float(os.getenv("COLLECTOR_HISTORY_RAW_DAYS", "7"))
+HISTORY_KEEP_DAYS = float(os.getenv("COLLECTOR_HISTORY_KEEP_DAYS", "365"))
+HISTORY_BAR_SEC = 60
+HISTORY_COMPACT_INTERVAL = float(os.getenv("COLLECTOR_HISTORY_COMPACT_INTERVAL", "3600"))
+
+CONFIG_FILE = "dashboard_config.json"
+UPBIT_API_BASE = os.getenv("UPBIT_API_BASE", "https://api.upbit.com")
+TARGET_PRICE_BTC = 100000000  # 비트코인 목표 가격 설정 (예: 1억 원)
 
 def get_crypto_prices(session: requests.Session, tickers: List[str]) -> Dict[str, float]:
     """업비트 API를 이용해 여러 코인 가격을 리스트로 가져옵니다."""
+    quotes = get_crypto_quotes(session, tickers)
+    return {ticker: q["price"] for ticker, q in quotes.items()}
+
+def get_crypto_quotes(session: requests.Session, tickers: List[str]) -> Dict[str, Dict]:
+    """업비트 API를 이용해 여러 코인의 가격과 등락률을 한 번에 가져옵니다."""
+    if not tickers:
+        return {}
     try:
         # 여러 티커를 콤마로 구분하여 하나의 문자열로 만듭니다.
         ticker_string = ",".join(tickers)
-        url = f"https://api.upbit.com/v1/ticker?markets={ticker_string}"
-        
-        response = session.get(url)
+        url = f"{UPBIT_API_BASE}/v1/ticker?markets={ticker_string}"
+
+        response = session.get(url, timeout=5)
         response.raise_for_status()  # HTTP 에러 발생 시 예외를 발생시킵니다.
-        
+
         data = response.json()
-        
-        # {티커: 가격} 형태의 딕셔너리로 변환하여 반환합니다.
-        prices = {item['market']: item['trade_price'] for item in data}
-        return prices
-        
+
+        # {티커: {가격, 등락률}} 형태의 딕셔너리로 변환하여 반환합니다.
+        return {
+            item['market']: {"price": item['trade_price'], "change": item['signed_change_rate'] * 100}
+            for item in data
+        }
+
     except requests.RequestException as e:
         print(f"\n에러 발생: {e}")
         return {} # 에러 발생 시 빈 딕셔너리 반환
 
-if __name__ == "__main__":
-    TICKERS = ["KRW-BTC", "KRW-ETH", "KRW-XRP"]  # 모니터링할 코인 목록
-    TARGET_PRICE_BTC = 100000000  # 비트코인 목표 가격 설정 (예: 1억 원)
-    print("🚀 실시간 코인 모니터링 시작 (종료: Ctrl+C)")
-    
+def get_yahoo_quotes(tickers: List[str], currency_cache: Dict[str, str]) -> Dict[str, Dict]:
+    """Yahoo Finance에서 주식/환율 시세를 가져옵니다. (통화 정보는 티커별 1회만 조회)"""
+    import yfinance as yf
+
+    quotes = {}
+    for ticker in tickers:
+        try:
+            stock = yf.Ticker(ticker)
+            if ticker not in currency_cache:
+                currency_cache[ticker] = stock.fast_info.get('currency', 'KRW')
+            hist = stock.history(period="5d")
+            if hist.empty:
+                continue
+            price = float(hist['Close'].iloc[-1])
+            change = 0.0
+            if len(hist) >= 2:
+                prev_close = float(hist['Close'].iloc[-2])
+                change = ((price - prev_close) / prev_close) * 100
+            quotes[ticker] = {"price": price, "change": change, "currency": currency_cache[ticker]}
+        except Exception as e:
+            print(f"Yahoo 시세 조회 실패 ({ticker}): {e}")
+    return quotes
+
+def _extract_ticker(name: str) -> str:
+    """'삼성전자 (005930.KS)' 형태의 표시 이름에서 티커를 추출합니다."""
+    match = re.search(r"\(([^()]+)\)\s*$", name)
+    return match.group(1).strip() if match else name.strip()
+
+def load_watch_list(config_file: str = CONFIG_FILE) -> Dict[str, List[str]]:
+    """dashboard_config.json에서 수집 대상 목록을 읽어옵니다."""
+    try:
+        with open(config_file, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        config = {}
+
+    coins = [_extract_ticker(n) for n in config.get("selected_coins", [])]
+    stocks = [_extract_ticker(n) for n in config.get("selected_stocks", [])]
+    stocks += [t.strip() for t in config.get("custom_stock", "").split(",") if t.strip()]
+    regions = sorted({fav["lawd_cd"] for fav in config.get("favorite_apts", []) if fav.get("lawd_cd")})
+
+    return {
+        "coins": list(dict.fromkeys(coins)),
+        "stocks": list(dict.fromkeys(stocks)),
+        "fx": ["KRW=X"],
+        "regions": regions,
+    }
+
+def collect_upbit(session: requests.Session, watch: Dict[str, List[str]]) -> None:
+    quotes = get_crypto_quotes(session, watch["coins"])
+    data_store.save_quotes([
+        {"symbol": t, "kind": "coin", "price": q["price"], "change": q["change"], "currency": "KRW"}
+        for t, q in quotes.items()
+    ])
+    for ticker, q in quotes.items():
+        print(f"💰 {ticker}: {q['price']:,.0f} KRW")
+
+    # 비트코인 목표가 달성 확인
+    btc = quotes.get("KRW-BTC")
+    if btc and btc["price"] >= TARGET_PRICE_BTC:
+        print("\n🎉 비트코인 목표가 달성!")
+
+def collect_yahoo(watch: Dict[str, List[str]], currency_cache: Dict[str, str]) -> None:
+    rows = []
+    for kind in ("stocks", "fx"):
+        # 휴장 중이고 장 종료 이후 스냅샷이 이미 있으면 다음 개장까지 조회하지 않음
+        tickers = [
+            t for t in watch[kind]
+            if market_calendar.is_open(market_calendar.market_for_symbol(t))
+            or data_store.get_quote(t, market_calendar.store_max_age(t, YAHOO_INTERVAL)) is None
+        ]
+        quotes = get_yahoo_quotes(tickers, currency_cache)
+        rows += [
+            {"symbol": t, "kind": "stock" if kind == "stocks" else "fx", "price": q["price"], "change": q["change"], "currency": q["currency"]}
+            for t, q in quotes.items()
+        ]
+    data_store.save_quotes(rows)
+    print(f"📈 Yahoo 시세 {len(rows)}건 저장")
+
+def collect_molit(watch: Dict[str, List[str]], service_key: str) -> None:
+    from real_estate_loader import get_apt_trade_data
+
+    today = datetime.date.today()
+    for lawd_cd in watch["regions"]:
+        for i in range(MOLIT_MONTHS):
+            # i개월 전의 년월 계산
+            year, month = today.year, today.month - i
+            while month <= 0:
+                year, month = year - 1, month + 12
+            deal_ymd = f"{year}{month:02d}"
+            df = get_apt_trade_data(service_key, lawd_cd, deal_ymd)
+            if not df.empty or df.attrs.get("total_count") is not None:
+                data_store.save_apt_month(lawd_cd, deal_ymd, df)
+                data_store.save_apt_month_meta(lawd_cd, deal_ymd, df.attrs.get("total_count"), df.attrs.get("head_hash"))
+        print(f"🏠 {lawd_cd} 최근 {MOLIT_MONTHS}개월 실거래 데이터 저장")
+
+def compact_history(since: float) -> float:
+    """원본 보관 기간이 지난 시세 이력을 1분 종가로 줄이고, 다음 실행의 시작 시각을 반환합니다."""
+    now = time.time()
+    raw_before = now - HISTORY_RAW_DAYS * 86400
+    keep_after = now - HISTORY_KEEP_DAYS * 86400 if HISTORY_KEEP_DAYS else 0
+    deleted = data_store.compact_quote_history(raw_before, keep_after, since=since, bar=HISTORY_BAR_SEC)
+    print(f"🧹 시세 이력 정리: {deleted:,}행 삭제")
+    return raw_before // HISTORY_BAR_SEC * HISTORY_BAR_SEC
+
+def scan_month(service_key: str, deal_ymd: str, sido: Optional[str] = None, max_workers: int = 8) -> Dict[str, int]:
+    """전국(또는 특정 시도)의 한 달치 실거래 데이터를 동시에 조회하여 로컬 저장소에 기록합니다.
+
+    조회된 단지명은 아파트 카탈로그에도 추가되어 전국 단지 검색에 사용됩니다.
+    """
+    import apt_catalog
+    from real_estate_loader import bulk_fetch_month, get_district_codes, MOLIT_LIMITER
+
+    districts = get_district_codes()
+    if sido:
+        districts = districts[districts['시도'] == sido]
+    lawd_cds = districts['lawd_cd'].tolist()
+    catalog = apt_catalog.get_catalog()
+
+    counts = {}
+    for done, (lawd_cd, df) in enumerate(bulk_fetch_month(service_key, lawd_cds, deal_ymd, max_workers=max_workers), 1):
+        counts[lawd_cd] = len(df)
+        if not df.empty or df.attrs.get("total_count") is not None:
+            data_store.save_apt_month(lawd_cd, deal_ymd, df)
+            data_store.save_apt_month_meta(lawd_cd, deal_ymd, df.attrs.get("total_count"), df.attrs.get("head_hash"))
+        if not df.empty:
+            catalog.upsert(lawd_cd, df['아파트'].unique().tolist())
+        print(f"[{done}/{len(lawd_cds)}] {lawd_cd}: {len(df)}건")
+
+    print(f"🏠 {deal_ymd} 스캔 완료: {len(lawd_cds)}개 지역, {sum(counts.values())}건 (남은 일일 호출: {MOLIT_LIMITER.remaining})")
+    return counts
+
+def run_collector(config_file: str = CONFIG_FILE, once: bool = False) -> None:
+    """설정 파일의 관심 목록을 기준으로 각 데이터 소스를 주기적으로 수집합니다."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    service_key = os.getenv("DATA_GO_KR_API_KEY")
+
+    schedule = [
+        ("upbit", UPBIT_INTERVAL),
+        ("yahoo", YAHOO_INTERVAL),
+        ("molit", MOLIT_INTERVAL),
+        ("history", HISTORY_COMPACT_INTERVAL),
+    ]
+    next_run = {name: 0.0 for name, _ in schedule}
+    compacted_until = 0.0   # 이 시각 이전 이력은 이미 1분 종가로 정리됨 (시작 시 한 번 전체 확인)
+    currency_cache: Dict[str, str] = {}
+    watch, config_mtime = {}, None
+
     # 세션을 사용하여 TCP 연결 재사용 (성능 최적화)
     with requests.Session() as session:
         while True:
-            prices = get_crypto_prices(session, TICKERS)
-            
-            if prices:
-                for ticker, price in prices.items():
-                    print(f"💰 {ticker}: {price:,.0f} KRW")
-
-                # 비트코인 목표가 달성 확인
-                btc_price = prices.get("KRW-BTC")
-                if btc_price and btc_price >= TARGET_PRICE_BTC:
-                    print("\n🎉 비트코인 목표가 달성!")
-                
-                print("-" * 30) # 구분선
-                
-            time.sleep(2)
\ No newline at end of file
+            # 설정 파일이 바뀌었을 때만 관심 목록을 다시 읽음
+            mtime = os.path.getmtime(config_file) if os.path.exists(config_file) else None
+            if mtime != config_mtime:
+                watch, config_mtime = load_watch_list(config_file), mtime
+                print(f"📋 관심 목록 로드: 코인 {len(watch['coins'])}, 주식 {len(watch['stocks'])}, 지역 {len(watch['regions'])}")
+
+            now = time.time()
+            for name, interval in schedule:
+                if now < next_run[name]:
+                    continue
+                next_run[name] = now + interval
+                try:
+                    if name == "upbit":
+                        collect_upbit(session, watch)
+                    elif name == "yahoo":
+                        collect_yahoo(watch, currency_cache)
+                    elif name == "molit" and service_key:
+                        collect_molit(watch, service_key)
+                    elif name == "history":
+                        compacted_until = compact_history(compacted_until)
+                except Exception as e:
+                    print(f"{name} 수집 중 오류: {e}")
+
+            if once:
+                return
+            time.sleep(max(0.0, min(next_run.values()) - time.time()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="대시보드용 시세/실거래 데이터 수집기")
+    parser.add_argument("--config", default=CONFIG_FILE, help="관심 목록 설정 파일 경로")
+    parser.add_argument("--db", default=None, help="로컬 저장소(SQLite) 파일 경로")
+    parser.add_argument("--once", action="store_true", help="한 번만 수집하고 종료")
+    parser.add_argument("--scan", metavar="YYYYMM", help="전국 시군구의 해당 월 실거래 데이터를 일괄 수집하고 종료")
+    parser.add_argument("--sido", default=None, help="--scan 대상 시도 (예: 서울특별시)")
+    parser.add_argument("--workers", type=int, default=8, help="--scan 동시 요청 수")
+    args = parser.parse_args()
+
+    if args.db:
+        data_store.DB_FILE = args.db
+
+    if args.scan:
+        from dotenv import load_dotenv
+        load_dotenv()
+        service_key = os.getenv("DATA_GO_KR_API_KEY")
+        if not service_key:
+            parser.error("DATA_GO_KR_API_KEY 환경 변수가 필요합니다.")
+        scan_month(service_key, args.scan, sido=args.sido, max_workers=args.workers)
+        raise SystemExit(0)
+
+    print("🚀 데이터 수집기 시작 (종료: Ctrl+C)")
+    try:
+        run_collector(args.config, once=args.once)
+    except KeyboardInterrupt:
+        print("\n수집기를 종료합니다.")
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import datetime
+from functools import lru_cache
+from typing import Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+KST = ZoneInfo("Asia/Seoul")
+NEW_YORK = ZoneInfo("America/New_York")
+
+# KRX 휴장일 (음력 명절/선거일 등은 규칙으로 계산할 수 없어 연도별로 관리)
+# 추가 휴장일은 KRX_HOLIDAYS_FILE(JSON 날짜 목록)로 보완할 수 있습니다.
+# 목록에 없는 휴장일은 개장일로 취급되어 평소처럼 갱신될 뿐이므로 안전합니다.
+KRX_HOLIDAYS = {
+    # 2025
+    "2025-01-01", "2025-01-27", "2025-01-28", "2025-01-29", "2025-01-30", "2025-03-03",
+    "2025-05-01", "2025-05-05", "2025-05-06", "2025-06-03", "2025-06-06", "2025-08-15",
+    "2025-10-03", "2025-10-06", "2025-10-07", "2025-10-08", "2025-10-09", "2025-12-25", "2025-12-31",
+    # 2026
+    "2026-01-01", "2026-02-16", "2026-02-17", "2026-02-18", "2026-03-02", "2026-05-01",
+    "2026-05-05", "2026-05-25", "2026-06-03", "2026-08-17", "2026-09-24", "2026-09-25",
+    "2026-10-05", "2026-10-09", "2026-12-25", "2026-12-31",
+    # 2027
+    "2027-01-01", "2027-02-08", "2027-02-09", "2027-03-01", "2027-05-05", "2027-05-13",
+    "2027-08-16", "2027-09-14", "2027-09-15", "2027-09-16", "2027-10-04", "2027-10-11",
+    "2027-12-27", "2027-12-31",
+}
+KRX_HOLIDAYS_FILE = os.getenv("KRX_HOLIDAYS_FILE", "")
+
+# 시장별 정규장 (현지 시각)
+KRX_OPEN, KRX_CLOSE = datetime.time(9, 0), datetime.time(15, 30)
+US_OPEN, US_CLOSE = datetime.time(9, 30), datetime.time(16, 0)
+FX_ROLL = datetime.time(17, 0)  # 외환시장: 일요일 17:00 ~ 금요일 17:00 (뉴욕)
+
+MAX_LOOKAHEAD_DAYS = 14
+# 장 종료 직후에는 Yahoo 시세가 15~20분 늦게 들어오므로, 종료 후 이 시간(초)이 지나야 종가로 확정
+CLOSE_GRACE_SEC = float(os.getenv("MARKET_CLOSE_GRACE_SEC", "1800"))
+
+@lru_cache(maxsize=1)
+def _krx_holidays() -> Set[datetime.date]:
+    days = set(KRX_HOLIDAYS)
+    if KRX_HOLIDAYS_FILE:
+        try:
+            with open(KRX_HOLIDAYS_FILE, "r", encoding="utf-8") as f:
+                days.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"KRX holiday file load failed: {e}")
+    return {datetime.date.fromisoformat(d) for d in days}
+
+@lru_cache(maxsize=8)
+def _check_krx_year(year: int) -> None:
+    """휴장일 목록에 없는 연도는 한 번만 경고합니다. (명절/대체공휴일이 개장일로 취급됨)"""
+    if not any(d.year == year for d in _krx_holidays()):
+        print(f"KRX holidays for {year} are not listed; add them to KRX_HOLIDAYS or KRX_HOLIDAYS_FILE")
+
+def _observed(day: datetime.date) -> datetime.date:
+    """토요일 휴일은 금요일, 일요일 휴일은 월요일에 쉽니다. (NYSE 규칙)"""
+    if day.weekday() == 5:
+        return day - datetime.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + datetime.timedelta(days=1)
+    return day
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> datetime.date:
+    """해당 월의 n번째 요일 (n < 0이면 뒤에서부터)"""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+
+def _easter(year: int) -> datetime.date:
+    """그레고리력 부활절 (Anonymous Gregorian algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return datetime.date(year, month, day)
+
+@lru_cache(maxsize=8)
+def _nyse_holidays(year: int) -> Set[datetime.date]:
+    days = {
+        _nth_weekday(year, 1, 0, 3),              # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),              # Presidents' Day
+        _easter(year) - datetime.timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),             # Memorial Day
+        _observed(datetime.date(year, 7, 4)),     # Independence Day
+        _nth_weekday(year, 9, 0, 1),              # Labor Day
+        _nth_weekday(year, 11, 3, 4),             # Thanksgiving
+        _observed(datetime.date(year, 12, 25)),   # Christmas
+    }
+    if year >= 2022:
+        days.add(_observed(datetime.date(year, 6, 19)))  # Juneteenth
+    # 새해 첫날이 토요일이면 전년도 12/31에 쉬지 않음 (NYSE 규칙)
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    return days
+
+def market_for_symbol(symbol: str) -> Optional[str]:
+    """심볼이 속한 시장을 반환합니다. (KRX / US / FX / None=상시 거래 또는 미지원)"""
+    s = symbol.upper()
+    if s.endswith((".KS", ".KQ")) or s in ("^KS11", "^KQ11", "^KS200"):
+        return "KRX"
+    if s.endswith("=X"):
+        return "FX"
+    # 코인(KRW-BTC, BTC-USD), 선물(=F), 해외 거래소 접미사 등은 달력을 적용하지 않음
+    if "-" in s or "=" in s or "." in s:
+        return None
+    return "US"
+
+def session_bounds(market: str, day: datetime.date) -> Optional[Tuple[datetime.datetime, datetime.datetime]]:
+    """해당 날짜(현지 기준)의 거래 시간 (시작, 종료)을 반환합니다. 휴장일이면 None."""
+    weekday = day.weekday()
+    if market == "KRX":
+        _check_krx_year(day.year)
+        if weekday >= 5 or day in _krx_holidays():
+            return None
+        return (datetime.datetime.combine(day, KRX_OPEN, KST), datetime.datetime.combine(day, KRX_CLOSE, KST))
+    if market == "US":
+        if weekday >= 5 or day in _nyse_holidays(day.year):
+            return None
+        return (datetime.datetime.combine(day, US_OPEN, NEW_YORK), datetime.datetime.combine(day, US_CLOSE, NEW_YORK))
+    if market == "FX":
+        start = datetime.datetime.combine(day, datetime.time(0, 0), NEW_YORK)
+        end = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time(0, 0), NEW_YORK)
+        if weekday == 5:
+            return None
+        if weekday == 6:
+            start = datetime.datetime.combine(day, FX_ROLL, NEW_YORK)
+        elif weekday == 4:
+            end = datetime.datetime.combine(day, FX_ROLL, NEW_YORK)
+        return start, end
+    raise ValueError(f"Unknown market: {market}")
+
+def _local_today(market: str, now: datetime.datetime) -> datetime.date:
+    return now.astimezone(KST if market == "KRX" else NEW_YORK).date()
+
+def is_open(market: Optional[str], now: Optional[float] = None) -> bool:
+    if market is None:
+        return True
+    now_dt = datetime.datetime.fromtimestamp(time.time() if now is None else now, datetime.timezone.utc)
+    bounds = session_bounds(market, _local_today(market, now_dt))
+    return bounds is not None and bounds[0] <= now_dt < bounds[1]
+
+def next_open(market: str, now: Optional[float] = None) -> float:
+    """다음 개장 시각 (epoch). 이미 개장 중이면 현재 시각."""
+    now_ts = time.time() if now is None else now
+    now_dt = datetime.datetime.fromtimestamp(now_ts, datetime.timezone.utc)
+    today = _local_today(market, now_dt)
+    for i in range(MAX_LOOKAHEAD_DAYS):
+        bounds = session_bounds(market, today + datetime.timedelta(days=i))
+        if bounds is None or bounds[1] <= now_dt:
+            continue
+        return max(now_ts, bounds[0].timestamp())
+    return now_ts + 86400
+
+def last_close(market: str, now: Optional[float] = None) -> float:
+    """가장 최근에 끝난 거래 시간의 종료 시각 (epoch)"""
+    now_ts = time.time() if now is None else now
+    now_dt = datetime.datetime.fromtimestamp(now_ts, datetime.timezone.utc)
+    today = _local_today(market, now_dt)
+    for i in range(MAX_LOOKAHEAD_DAYS):
+        bounds = session_bounds(market, today - datetime.timedelta(days=i))
+        if bounds is not None and bounds[1] <= now_dt:
+            return bounds[1].timestamp()
+    return now_ts - 86400
+
+def next_change_time(symbol: str, now: Optional[float] = None) -> float:
+    """심볼의 가격이 다음으로 바뀔 수 있는 시각 (epoch). 거래 중이거나 상시 거래 심볼이면 현재 시각."""
+    now_ts = time.time() if now is None else now
+    market = market_for_symbol(symbol)
+    if market is None or is_open(market, now_ts):
+        return now_ts
+    return next_open(market, now_ts)
+
+def settled_since(market: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """휴장 중이고 종가가 확정된 경우, 확정 시각(마지막 장 종료 + CLOSE_GRACE_SEC, epoch). 아니면 None"""
+    now_ts = time.time() if now is None else now
+    if market is None or is_open(market, now_ts):
+        return None
+    settled = last_close(market, now_ts) + CLOSE_GRACE_SEC
+    return settled if settled <= now_ts else None
+
+def cache_bucket(symbol: str, ttl: float, now: Optional[float] = None) -> str:
+    """캐시 키에 넣을 시간 구간 값
+
+    거래 중(장 종료 후 유예 시간 포함)에는 ttl초마다 바뀌고, 종가가 확정된 뒤에는 다음 개장까지 고정되어
+    외부 호출이 발생하지 않습니다.
+    """
+    now_ts = time.time() if now is None else now
+    market = market_for_symbol(symbol)
+    if settled_since(market, now_ts) is None:
+        return f"open:{int(now_ts // ttl)}"
+    return f"closed:{int(last_close(market, now_ts))}"
+
+def store_max_age(symbol: str, max_age: float, now: Optional[float] = None) -> float:
+    """로컬 저장소 스냅샷의 허용 경과 시간. 종가가 확정된 뒤에는 확정 시각 이후 저장된 스냅샷을 그대로 사용합니다."""
+    now_ts = time.time() if now is None else now
+    settled = settled_since(market_for_symbol(symbol), now_ts)
+    if settled is None:
+        return max_age
+    return max(max_age, now_ts - settled)
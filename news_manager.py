@@ -0,0 +1,219 @@
+import os
+import time
+import datetime
+import threading
+import email.utils
+from collections import OrderedDict
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+import streamlit as st
+
+import profiler
+
+GOOGLE_NEWS_RSS_URL = os.getenv("GOOGLE_NEWS_RSS_URL", "https://news.google.com/rss/search")
+# 설정하면 yfinance 대신 Yahoo 검색 API 형식(/v1/finance/search)의 주소에서 뉴스를 가져옵니다.
+YAHOO_SEARCH_BASE = os.getenv("YAHOO_SEARCH_BASE", "")
+
+# 뉴스 캐시 유효 시간 (초). 만료 후에는 ETag/Last-Modified로 재검증합니다.
+NEWS_TTL = 600
+# 보관할 최대 검색어 수 (초과 시 가장 오래 사용하지 않은 검색어부터 제거)
+NEWS_CACHE_SIZE = int(os.getenv("NEWS_CACHE_SIZE", "256"))
+
+class NewsService:
+    """검색어별 뉴스를 메모리에 캐시하고 백그라운드에서 미리 가져오는 서비스"""
+
+    def __init__(self, ttl: float = NEWS_TTL, max_workers: int = 4, timeout: float = 5,
+                 max_entries: int = NEWS_CACHE_SIZE):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._inflight: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news")
+        self._session = requests.Session()
+
+    @staticmethod
+    def _key(query: str, ticker: Optional[str]) -> str:
+        return f"{query}|{ticker or ''}"
+
+    def _is_fresh(self, entry: Optional[Dict]) -> bool:
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttl
+
+    def get_news(self, query: str, ticker: Optional[str] = None, limit: int = 5) -> Optional[List[Dict]]:
+        """캐시된 뉴스를 반환합니다. 캐시가 없을 때만 가져올 때까지 기다립니다.
+
+        조회에 실패하고 캐시도 없으면 None을 반환합니다.
+        """
+        key = self._key(query, ticker)
+        with self._lock:
+            entry = self._cache.get(key)
+            future = self._inflight.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+        if self._is_fresh(entry):
+            return entry["items"][:limit]
+        if entry is not None:
+            # 만료된 캐시는 즉시 반환하고 재검증은 백그라운드에서 수행
+            self.prefetch([(query, ticker)])
+            return entry["items"][:limit]
+
+        # 백그라운드 프리페치가 진행 중이면 그 결과를 기다림 (중복 요청 방지)
+        if future is not None:
+            try:
+                future.result(timeout=self.timeout)
+            except Exception:
+                pass
+        else:
+            self._refresh(query, ticker)
+
+        with self._lock:
+            entry = self._cache.get(key)
+        return entry["items"][:limit] if entry else None
+
+    def prefetch(self, targets: List[Tuple[str, Optional[str]]]) -> None:
+        """(검색어, 티커) 목록의 뉴스를 백그라운드에서 동시에 가져옵니다. (호출은 즉시 반환)"""
+        for query, ticker in targets:
+            key = self._key(query, ticker)
+            with self._lock:
+                if self._is_fresh(self._cache.get(key)) or key in self._inflight:
+                    continue
+                future = self._executor.submit(self._refresh, query, ticker)
+                self._inflight[key] = future
+            future.add_done_callback(lambda _f, k=key: self._done(k))
+
+    def _done(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _refresh(self, query: str, ticker: Optional[str]) -> None:
+        key = self._key(query, ticker)
+        with self._lock:
+            entry = self._cache.get(key)
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            with profiler.upstream("google_news", "rss") as call:
+                response = self._session.get(
+                    GOOGLE_NEWS_RSS_URL,
+                    params={"q": query, "hl": "ko", "gl": "KR", "ceid": "KR:ko"},
+                    headers=headers,
+                    timeout=self.timeout
+                )
+                call.nbytes = len(response.content)
+        except requests.RequestException as e:
+            print(f"News fetch failed ({query}): {e}")
+            return
+
+        if response.status_code == 304 and entry:
+            # RSS 변경 없음: 파싱 없이 유효 시간만 연장
+            # Yahoo 뉴스는 재검증이 없으므로 다시 가져와 합침 (실패하면 이전 결과 유지)
+            items = entry["items"]
+            if ticker:
+                items = merge_news(entry["rss_items"], get_yahoo_news(ticker) or entry["items"])
+            with self._lock:
+                entry["items"] = items
+                entry["fetched_at"] = time.time()
+            return
+        if response.status_code != 200:
+            return
+
+        rss_items = parse_rss(response.content)
+        items = merge_news(rss_items, get_yahoo_news(ticker)) if ticker else rss_items
+
+        with self._lock:
+            self._cache[key] = {
+                "items": items,
+                "rss_items": rss_items,
+                "fetched_at": time.time(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+def parse_rss(content: bytes) -> List[Dict]:
+    """Google News RSS를 파싱하여 뉴스 항목 리스트로 변환합니다."""
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError:
+        return []
+
+    items = []
+    for item in root.iterfind('.//item'):
+        link = item.findtext('link')
+        if not link:
+            continue
+        pub_date = item.findtext('pubDate') or ""
+        try:
+            ts = email.utils.parsedate_to_datetime(pub_date).timestamp()
+        except (TypeError, ValueError):
+            ts = 0.0
+        items.append({
+            "title": item.findtext('title') or "",
+            "link": link,
+            "source": item.findtext('source') or "Google News",
+            "published": pub_date,
+            "ts": ts,
+        })
+    return items
+
+def get_yahoo_news(ticker: str) -> List[Dict]:
+    """yfinance의 Ticker.news를 뉴스 항목 형식으로 변환합니다. (구/신 응답 형식 모두 지원)"""
+    try:
+        if YAHOO_SEARCH_BASE:
+            with profiler.upstream("yahoo", "news") as call:
+                response = requests.get(f"{YAHOO_SEARCH_BASE}/v1/finance/search",
+                                        params={"q": ticker, "newsCount": 10, "quotesCount": 0}, timeout=10)
+                call.nbytes = len(response.content)
+            raw = response.json().get("news") or []
+        else:
+            import yfinance as yf
+            with profiler.upstream("yahoo", "news"):
+                raw = yf.Ticker(ticker).news or []
+    except Exception:
+        return []
+
+    items = []
+    for n in raw:
+        content = n.get("content") or n
+        link = n.get("link") or (content.get("canonicalUrl") or {}).get("url")
+        if not link:
+            continue
+        ts = n.get("providerPublishTime")
+        if ts is None and content.get("pubDate"):
+            try:
+                ts = datetime.datetime.fromisoformat(content["pubDate"].replace("Z", "+00:00")).timestamp()
+            except ValueError:
+                ts = None
+        items.append({
+            "title": content.get("title", ""),
+            "link": link,
+            "source": n.get("publisher") or (content.get("provider") or {}).get("displayName") or "Yahoo Finance",
+            "published": "",
+            "ts": float(ts or 0.0),
+        })
+    return items
+
+def merge_news(*sources: List[Dict]) -> List[Dict]:
+    """여러 뉴스 목록을 링크 기준으로 중복 제거하고 최신순으로 정렬합니다."""
+    seen = {}
+    for items in sources:
+        for item in items:
+            seen.setdefault(item["link"], item)
+    return sorted(seen.values(), key=lambda x: x["ts"], reverse=True)
+
+@st.cache_resource(show_spinner=False)
+def get_news_service() -> NewsService:
+    """세션 간에 공유되는 뉴스 서비스 인스턴스"""
+    return NewsService()
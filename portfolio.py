@@ -0,0 +1,160 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 보유 수량/평단가 기반 다통화 포트폴리오 평가 (원화 기준)
+#
+# 포지션 값은 NumPy 배열(수량, 평단가, 현재가, 통화 인덱스)로 보관하고, 시세 한 건이 바뀌면
+# 해당 행만, 환율이 바뀌면 그 통화의 행만 다시 계산하여 합계를 증분 갱신합니다.
+
+# Yahoo가 보조 단위로 시세를 주는 통화 -> (기준 통화, 배율)
+MINOR_UNITS = {"GBp": ("GBP", 0.01), "GBX": ("GBP", 0.01), "ZAc": ("ZAR", 0.01), "ILA": ("ILS", 0.01)}
+
+ASSET_TYPES = ("coin", "stock", "real_estate")
+
+def normalize_currency(currency: Optional[str]) -> Tuple[str, float]:
+    """(기준 통화, 가격 배율)을 반환합니다. 예: GBp -> ('GBP', 0.01)"""
+    if not currency:
+        return "KRW", 1.0
+    return MINOR_UNITS.get(currency, (currency.upper(), 1.0))
+
+def asset_type_of(tile_type: str) -> str:
+    """요약 타일 유형(coin/stock_rec/stock_custom/real_estate)을 자산군으로 변환합니다."""
+    return "stock" if tile_type.startswith("stock") else tile_type
+
+class PortfolioBook:
+    """포지션 배열과 합계를 보관하는 평가 장부 (세션별 1개)
+
+    positions: [{"key", "label", "type", "quantity", "cost"}, ...]
+    cost는 해당 자산 통화 기준 1단위 평균 매입가입니다.
+    """
+
+    def __init__(self, positions: List[Dict]):
+        self.keys = [p["key"] for p in positions]
+        self.labels = [p.get("label", p["key"]) for p in positions]
+        self.types = np.array([ASSET_TYPES.index(asset_type_of(p.get("type", "stock"))) for p in positions], dtype=np.int8)
+        self.index = {k: i for i, k in enumerate(self.keys)}
+        n = len(positions)
+        self.quantity = np.array([float(p.get("quantity") or 0) for p in positions])
+        self.cost = np.array([float(p.get("cost") or 0) for p in positions])
+        self.price = np.full(n, np.nan)
+        self.unit = np.ones(n)                  # 보조 단위 배율 (GBp 등)
+        self.currencies: List[str] = ["KRW"]
+        self.fx = np.array([1.0])               # 통화 인덱스별 원화 환율
+        self.currency_idx = np.zeros(n, dtype=np.int32)
+        self.value = np.zeros(n)                # 원화 평가액 (현재가 미확인 포지션은 0)
+        self.cost_krw = np.zeros(n)
+        self.total_value = 0.0
+        self.total_cost = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _currency_slot(self, currency: str) -> int:
+        if currency not in self.currencies:
+            self.currencies.append(currency)
+            self.fx = np.append(self.fx, np.nan)
+        return self.currencies.index(currency)
+
+    def _recompute(self, rows) -> None:
+        """지정한 행만 다시 계산하고 합계를 차이만큼 갱신합니다."""
+        rate = self.fx[self.currency_idx[rows]] * self.unit[rows]
+        priced = ~np.isnan(self.price[rows]) & ~np.isnan(rate)
+        new_value = np.where(priced, self.quantity[rows] * self.price[rows] * rate, 0.0)
+        new_cost = np.where(priced, self.quantity[rows] * self.cost[rows] * rate, 0.0)
+        self.total_value += float(new_value.sum() - self.value[rows].sum())
+        self.total_cost += float(new_cost.sum() - self.cost_krw[rows].sum())
+        self.value[rows] = new_value
+        self.cost_krw[rows] = new_cost
+
+    def set_currency(self, key: str, currency: Optional[str]) -> None:
+        i = self.index.get(key)
+        if i is None:
+            return
+        base, unit = normalize_currency(currency)
+        with self._lock:
+            self.currency_idx[i] = self._currency_slot(base)
+            self.unit[i] = unit
+            self._recompute(np.array([i]))
+
+    def update_price(self, key: str, price: Optional[float], currency: Optional[str] = None) -> bool:
+        """시세 한 건을 반영합니다. 값이 바뀌지 않았으면 아무것도 다시 계산하지 않습니다."""
+        i = self.index.get(key)
+        if i is None or not price:
+            return False
+        with self._lock:
+            if currency is not None:
+                base, unit = normalize_currency(currency)
+                slot = self._currency_slot(base)
+                if slot != self.currency_idx[i] or unit != self.unit[i]:
+                    self.currency_idx[i], self.unit[i] = slot, unit
+                    self.price[i] = np.nan   # 통화가 바뀌면 아래에서 반드시 다시 계산
+            if self.price[i] == price:
+                return False
+            self.price[i] = price
+            self._recompute(np.array([i]))
+            return True
+
+    def update_fx(self, rates: Dict[str, float]) -> None:
+        """통화별 원화 환율을 반영합니다. 바뀐 통화의 포지션만 벡터 연산으로 다시 계산합니다."""
+        with self._lock:
+            for currency, rate in rates.items():
+                if not rate or currency not in self.currencies:
+                    continue
+                slot = self.currencies.index(currency)
+                if self.fx[slot] == rate:
+                    continue
+                self.fx[slot] = rate
+                rows = np.flatnonzero(self.currency_idx == slot)
+                if rows.size:
+                    self._recompute(rows)
+
+    def revalue(self) -> None:
+        """전체 포지션을 한 번에 다시 계산합니다. (부동소수점 누적 오차 정리용)"""
+        with self._lock:
+            self.value[:] = 0.0
+            self.cost_krw[:] = 0.0
+            self.total_value = self.total_cost = 0.0
+            if len(self):
+                self._recompute(np.arange(len(self)))
+
+    def missing_currencies(self) -> List[str]:
+        return [c for c, r in zip(self.currencies, self.fx) if np.isnan(r)]
+
+    def summary(self) -> Dict:
+        """총 평가액/손익/자산군별 비중 (원화)"""
+        with self._lock:
+            total, cost = self.total_value, self.total_cost
+            by_type = np.bincount(self.types, weights=self.value, minlength=len(ASSET_TYPES)) if len(self) else np.zeros(len(ASSET_TYPES))
+            weights = self.value / total if total else np.zeros(len(self))
+            return {
+                "total_value": total,
+                "total_cost": cost,
+                "pnl": total - cost,
+                "pnl_pct": (total - cost) / cost * 100 if cost else 0.0,
+                "allocation": {t: float(v / total) if total else 0.0 for t, v in zip(ASSET_TYPES, by_type)},
+                "positions": [
+                    {"key": k, "label": l, "value": float(v), "pnl": float(v - c), "weight": float(w)}
+                    for k, l, v, c, w in zip(self.keys, self.labels, self.value, self.cost_krw, weights)
+                    if v
+                ],
+            }
+
+def build_positions(holdings: Dict[str, Dict], tiles: Iterable[Dict]) -> List[Dict]:
+    """설정의 보유 내역(타일 키 -> 수량/평단가)과 현재 타일 목록으로 포지션 목록을 만듭니다."""
+    positions = []
+    for tile in tiles:
+        holding = holdings.get(tile["key"])
+        if not holding or not holding.get("quantity"):
+            continue
+        positions.append({
+            "key": tile["key"], "label": tile["label"], "type": tile["type"],
+            "quantity": holding["quantity"], "cost": holding.get("cost", 0),
+        })
+    return positions
+
+def book_signature(positions: List[Dict]) -> tuple:
+    """보유 내역이 바뀌었는지 판단하기 위한 서명 (바뀌면 장부를 새로 만듦)"""
+    return tuple((p["key"], float(p["quantity"]), float(p.get("cost") or 0)) for p in positions)
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import threading
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# DASHBOARD_PROFILE=1 일 때만 계측합니다. (꺼져 있으면 각 계측 지점은 플래그 확인만 수행)
+_enabled = os.getenv("DASHBOARD_PROFILE", "0").lower() in ("1", "true", "yes")
+# 계측 기록을 JSON Lines로 추가할 파일 경로 (선택)
+METRICS_JSONL = os.getenv("DASHBOARD_METRICS_JSONL", "")
+# Prometheus 텍스트 형식(/metrics)을 제공할 포트 (선택)
+METRICS_PORT = int(os.getenv("DASHBOARD_METRICS_PORT", "0"))
+# /metrics는 인증이 없으므로 기본은 로컬 접속만 허용. 외부 스크레이퍼용으로는 명시적으로 지정 (예: 0.0.0.0)
+METRICS_BIND = os.getenv("DASHBOARD_METRICS_BIND", "127.0.0.1")
+
+def enabled() -> bool:
+    return _enabled
+
+def set_enabled(flag: bool) -> None:
+    global _enabled
+    _enabled = flag
+
+class RunProfile:
+    """한 번의 스크립트 실행(rerun) 동안의 단계별 시간과 외부 호출 기록"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages: List[Dict] = []
+        self.calls: List[Dict] = []
+        self._last_mark = time.perf_counter()
+
+    @property
+    def total_sec(self) -> float:
+        return sum(s["sec"] for s in self.stages)
+
+class _Metrics:
+    """프로세스 전체 누적 지표 (Prometheus 내보내기용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, List[float]] = {}                # name -> [count, sec]
+        self.calls: Dict[tuple, List[float]] = {}               # (provider, cache) -> [count, sec, bytes]
+        self._jsonl_lock = threading.Lock()
+
+    def add_stage(self, name: str, sec: float) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += sec
+
+    def add_call(self, provider: str, cache_hit: bool, sec: float, nbytes: int) -> None:
+        with self._lock:
+            entry = self.calls.setdefault((provider, "hit" if cache_hit else "miss"), [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += sec
+            entry[2] += nbytes
+
+    def write_jsonl(self, record: Dict) -> None:
+        if not METRICS_JSONL:
+            return
+        try:
+            with self._jsonl_lock, open(METRICS_JSONL, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Metrics write failed: {e}")
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            stages = {k: list(v) for k, v in self.stages.items()}
+            calls = {k: list(v) for k, v in self.calls.items()}
+        lines = [
+            "# HELP dashboard_stage_seconds Time spent per app.py stage.",
+            "# TYPE dashboard_stage_seconds summary",
+        ]
+        for name, (count, sec) in sorted(stages.items()):
+            lines.append(f'dashboard_stage_seconds_sum{{stage="{name}"}} {sec:.6f}')
+            lines.append(f'dashboard_stage_seconds_count{{stage="{name}"}} {count}')
+        lines += [
+            "# HELP dashboard_upstream_seconds Latency of upstream calls by provider and cache result.",
+            "# TYPE dashboard_upstream_seconds summary",
+        ]
+        for (provider, cache), (count, sec, _) in sorted(calls.items()):
+            lines.append(f'dashboard_upstream_seconds_sum{{provider="{provider}",cache="{cache}"}} {sec:.6f}')
+            lines.append(f'dashboard_upstream_seconds_count{{provider="{provider}",cache="{cache}"}} {count}')
+        lines += [
+            "# HELP dashboard_upstream_bytes_total Response bytes received from upstream providers.",
+            "# TYPE dashboard_upstream_bytes_total counter",
+        ]
+        for (provider, cache), (_, _, nbytes) in sorted(calls.items()):
+            if cache == "miss":
+                lines.append(f'dashboard_upstream_bytes_total{{provider="{provider}"}} {nbytes}')
+        return "\n".join(lines) + "\n"
+
+METRICS = _Metrics()
+_local = threading.local()
+
+def begin_run() -> Optional[RunProfile]:
+    """현재 스레드(스크립트 실행)의 프로파일을 새로 시작합니다. 비활성화 상태면 None."""
+    if not _enabled:
+        _local.run = None
+        return None
+    _local.run = RunProfile()
+    return _local.run
+
+def current_run() -> Optional[RunProfile]:
+    return getattr(_local, "run", None)
+
+def _add_stage(name: str, sec: float) -> None:
+    run = current_run()
+    if run is not None:
+        run.stages.append({"stage": name, "sec": sec})
+    METRICS.add_stage(name, sec)
+    METRICS.write_jsonl({"type": "stage", "ts": time.time(), "stage": name, "sec": round(sec, 6)})
+
+def checkpoint(name: str) -> None:
+    """직전 checkpoint(또는 begin_run, stage 종료) 이후 경과 시간을 name 단계로 기록합니다."""
+    if not _enabled:
+        return
+    run = current_run()
+    if run is None:
+        return
+    now = time.perf_counter()
+    sec, run._last_mark = now - run._last_mark, now
+    _add_stage(name, sec)
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        now = time.perf_counter()
+        _add_stage(self.name, now - self.start)
+        # 이미 기록한 구간이 다음 checkpoint에 중복 합산되지 않도록 기준 시각 이동
+        run = current_run()
+        if run is not None:
+            run._last_mark = now
+        return False
+
+class _Null:
+    """계측이 꺼져 있을 때 사용하는 아무 일도 하지 않는 컨텍스트"""
+    nbytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NULL = _Null()
+
+def stage(name: str):
+    """with profiler.stage("news"): ... 형태로 블록 실행 시간을 기록합니다."""
+    return _Stage(name) if _enabled else _NULL
+
+def timed(name: str):
+    """함수 전체를 하나의 단계로 기록하는 데코레이터 (프래그먼트 단독 재실행도 기록됨)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class _Upstream:
+    __slots__ = ("provider", "endpoint", "nbytes", "start")
+
+    def __init__(self, provider: str, endpoint: str):
+        self.provider = provider
+        self.endpoint = endpoint
+        self.nbytes = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_call(self.provider, cache_hit=False, latency=time.perf_counter() - self.start,
+                    nbytes=self.nbytes, endpoint=self.endpoint)
+        return False
+
+def upstream(provider: str, endpoint: str = ""):
+    """외부 API 호출 구간을 기록합니다. 응답 크기는 블록 안에서 call.nbytes에 설정합니다."""
+    return _Upstream(provider, endpoint) if _enabled else _NULL
+
+def record_call(provider: str, cache_hit: bool, latency: float, nbytes: int = 0, endpoint: str = "") -> None:
+    if not cache_hit:
+        _local.upstream_count = getattr(_local, "upstream_count", 0) + 1
+    run = current_run()
+    record = {"provider": provider, "endpoint": endpoint, "cache_hit": cache_hit,
+              "bytes": nbytes, "sec": round(latency, 6)}
+    if run is not None:
+        run.calls.append(record)
+    METRICS.add_call(provider, cache_hit, latency, nbytes)
+    METRICS.write_jsonl({"type": "upstream", "ts": time.time(), **record})
+
+def cached(provider: str):
+    """캐시된 조회 함수에 적용하는 데코레이터
+
+    호출 중에 실제 외부 요청(upstream)이 없었으면 캐시(st.cache_data 또는 로컬 저장소) 적중으로 기록합니다.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            before = getattr(_local, "upstream_count", 0)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            if getattr(_local, "upstream_count", 0) == before:
+                record_call(provider, cache_hit=True, latency=time.perf_counter() - start, endpoint=func.__name__)
+            return result
+        # st.cache_data의 clear() 등 원래 함수의 속성을 그대로 사용
+        wrapper.clear = getattr(func, "clear", None)
+        return wrapper
+    return decorator
+
+def prometheus_text() -> str:
+    return METRICS.prometheus_text()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+def serve_metrics(port: int = METRICS_PORT, host: str = METRICS_BIND) -> None:
+    """Prometheus 스크레이프용 /metrics 엔드포인트를 백그라운드 스레드로 한 번만 시작합니다. (기본 127.0.0.1)"""
+    global _server
+    if not port:
+        return
+    with _server_lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            print(f"Metrics server start failed: {e}")
+            return
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
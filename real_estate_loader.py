@@ -1,14 +1,121 @@
+import os
+import json
+import time
+import hashlib
+import datetime
+import threading
 import requests
 import pandas as pd
 import xml.etree.ElementTree as ET
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import profiler
+
+# [NEW] 전국 시군구 법정동 코드 (LAWD_CD 앞 5자리) 데이터 파일
+DISTRICT_CODES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "district_codes.json")
+
+# 시도 약칭 (예: 서울 강남구)
+SIDO_SHORT_NAMES = {
+    "서울특별시": "서울", "부산광역시": "부산", "대구광역시": "대구", "인천광역시": "인천",
+    "광주광역시": "광주", "대전광역시": "대전", "울산광역시": "울산", "세종특별자치시": "세종",
+    "경기도": "경기", "강원특별자치도": "강원", "충청북도": "충북", "충청남도": "충남",
+    "전북특별자치도": "전북", "전라남도": "전남", "경상북도": "경북", "경상남도": "경남",
+    "제주특별자치도": "제주",
+}
+
+class QuotaLimiter:
+    """공공데이터포털 API 호출 속도(초당) 및 일일 호출 한도 제한기 (스레드 안전)"""
+
+    def __init__(self, rate_per_sec: float, daily_quota: int):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self.daily_quota = daily_quota
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._day = None
+        self._used = 0
+
+    def acquire(self) -> bool:
+        """호출 슬롯을 확보할 때까지 기다립니다. 일일 한도를 초과했으면 False를 반환합니다."""
+        kst_today = (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=9)).date()
+        with self._lock:
+            if self._day != kst_today:
+                self._day, self._used = kst_today, 0
+            if self.daily_quota and self._used >= self.daily_quota:
+                return False
+            self._used += 1
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    @property
+    def remaining(self) -> Optional[int]:
+        return self.daily_quota - self._used if self.daily_quota else None
+
+# 국토교통부 API 공용 호출 제한기 (환경 변수로 조정)
+MOLIT_LIMITER = QuotaLimiter(
+    rate_per_sec=float(os.getenv("MOLIT_RATE_PER_SEC", "5")),
+    daily_quota=int(os.getenv("MOLIT_DAILY_QUOTA", "10000")),
+)
+
+# 국토교통부 아파트매매 실거래가 상세 자료 조회 URL
+MOLIT_APT_TRADE_URL = os.getenv(
+    "MOLIT_APT_TRADE_URL", "http://apis.data.go.kr/1613000/RTMSDataSvcAptTradeDev/getRTMSDataSvcAptTradeDev"
+)
+
+def _item_hash(item) -> str:
+    """거래 항목 XML의 내용 해시 (변경 감지용)"""
+    fields = sorted((child.tag, (child.text or "").strip()) for child in item)
+    return hashlib.sha1(repr(fields).encode("utf-8")).hexdigest()
+
+def _total_count(root) -> Optional[int]:
+    text = root.findtext("body/totalCount")
+    return int(text) if text and text.strip().isdigit() else None
+
+def probe_month(service_key: str, lawd_cd: str, deal_ymd: str) -> Optional[Dict]:
+    """numOfRows=1로 해당 월의 전체 건수(totalCount)와 첫 항목 해시만 조회합니다.
+
+    전체 다운로드 없이 저장된 데이터가 바뀌었는지 확인하는 용도이며, 실패 시 None을 반환합니다.
+    """
+    if not MOLIT_LIMITER.acquire():
+        return None
+    params = {
+        "serviceKey": requests.utils.unquote(service_key),
+        "LAWD_CD": lawd_cd,
+        "DEAL_YMD": deal_ymd,
+        "numOfRows": "1",
+        "pageNo": "1"
+    }
+    try:
+        with profiler.upstream("molit", "probe") as call:
+            response = requests.get(MOLIT_APT_TRADE_URL, params=params, timeout=10)
+            call.nbytes = len(response.content)
+        if response.status_code != 200:
+            return None
+        root = ET.fromstring(response.content)
+        result_code = root.findtext("header/resultCode")
+        if result_code is not None and result_code not in ["00", "000"]:
+            return None
+        total_count = _total_count(root)
+        if total_count is None:
+            return None
+        head = root.find("body/items/item")
+        return {"total_count": total_count, "head_hash": _item_hash(head) if head is not None else None}
+    except (requests.RequestException, ET.ParseError) as e:
+        print(f"Probe failed ({lawd_cd} {deal_ymd}): {e}")
+        return None
 
 def get_apt_trade_data(service_key: str, lawd_cd: str, deal_ymd: str) -> pd.DataFrame:
     """
     국토교통부 아파트매매 실거래가 API를 조회하여 DataFrame으로 반환합니다.
+    변경 감지를 위해 df.attrs에 total_count, head_hash를 함께 기록합니다.
     """
-    # 국토교통부 아파트매매 실거래가 상세 자료 조회 URL
-    url = "http://apis.data.go.kr/1613000/RTMSDataSvcAptTradeDev/getRTMSDataSvcAptTradeDev"
+    url = MOLIT_APT_TRADE_URL
     
     params = {
         "serviceKey": requests.utils.unquote(service_key), # API 키 디코딩 적용
@@ -18,8 +125,15 @@ def get_apt_trade_data(service_key: str, lawd_cd: str, deal_ymd: str) -> pd.Data
         "pageNo": "1"        # 페이지 번호
     }
     
+    # [NEW] 호출 속도/일일 한도 제한
+    if not MOLIT_LIMITER.acquire():
+        print(f"MOLIT daily quota exhausted, skipping {lawd_cd} {deal_ymd}")
+        return pd.DataFrame()
+
     try:
-        response = requests.get(url, params=params)
+        with profiler.upstream("molit", "trades") as call:
+            response = requests.get(url, params=params)
+            call.nbytes = len(response.content)
         
         # 응답 상태 확인
         if response.status_code != 200:
@@ -41,9 +155,12 @@ def get_apt_trade_data(service_key: str, lawd_cd: str, deal_ymd: str) -> pd.Data
                 return pd.DataFrame()
         
         items = root.findall("body/items/item")
+        meta = {"total_count": _total_count(root), "head_hash": _item_hash(items[0]) if items else None}
 
         if not items:
-            return pd.DataFrame()
+            df = pd.DataFrame()
+            df.attrs.update(meta)
+            return df
 
         data_list = []
         for item in items:
@@ -74,6 +191,7 @@ def get_apt_trade_data(service_key: str, lawd_cd: str, deal_ymd: str) -> pd.Data
             })
             
         df = pd.DataFrame(data_list)
+        df.attrs.update(meta)
         
         return df
         
@@ -82,49 +200,50 @@ def get_apt_trade_data(service_key: str, lawd_cd: str, deal_ymd: str) -> pd.Data
         traceback.print_exc()
         return pd.DataFrame()
 
+@lru_cache(maxsize=1)
+def _district_table() -> Tuple[Tuple[Dict, ...], Dict[str, Dict], Dict[str, List[Dict]]]:
+    """시군구 코드 파일을 한 번만 읽어 코드/이름 인덱스를 만듭니다."""
+    with open(DISTRICT_CODES_FILE, "r", encoding="utf-8") as f:
+        rows = tuple(json.load(f))
+
+    by_code = {row["lawd_cd"]: row for row in rows}
+    by_name: Dict[str, List[Dict]] = {}
+    for row in rows:
+        sido, sigungu = row["시도"], row["시군구"]
+        keys = {f"{sido} {sigungu}", f"{SIDO_SHORT_NAMES.get(sido, sido)} {sigungu}", sigungu}
+        for key in keys:
+            by_name.setdefault(key, []).append(row)
+    return rows, by_code, by_name
+
 def get_district_codes() -> pd.DataFrame:
     """
     대한민국 행정구역(시군구) 코드를 가져옵니다.
-    제공된 딕셔너리 데이터를 기반으로 DataFrame을 생성합니다.
+    district_codes.json(전국 시군구 코드)을 기반으로 DataFrame을 생성합니다.
     """
-    # 지역 명칭을 키로, 코드를 값으로 하는 딕셔너리
-    REGION_CODES = {
-        # 서울특별시
-        "서울 강남구": "11680",
-        "서울 서초구": "11650",
-        "서울 송파구": "11710",
-        "서울 마포구": "11440",
-        "서울 용산구": "11170",
-        "서울 성동구": "11200",
-        "서울 종로구": "11110",
-        
-        # 대구광역시
-        "대구 수성구": "27260",
-        "대구 중구": "27110",
-        "대구 동구": "27140",
-        "대구 서구": "27170",
-        "대구 남구": "27200",
-        "대구 북구": "27230",
-        "대구 달서구": "27290",
-        "대구 달성군": "27710"
-    }
-    
-    data = []
-    for name, code in REGION_CODES.items():
-        parts = name.split()
-        if len(parts) >= 2:
-            sido = parts[0]
-            sigungu = " ".join(parts[1:])
-            
-            # UI 편의를 위해 시도 명칭 확장 (서울 -> 서울특별시)
-            if sido == "서울": sido = "서울특별시"
-            elif sido == "대구": sido = "대구광역시"
-            
-            data.append({
-                "시도": sido,
-                "시군구": sigungu,
-                "lawd_cd": code
-            })
-    
-    df = pd.DataFrame(data)
-    return df.sort_values(by=['시도', '시군구'])
\ No newline at end of file
+    rows, _, _ = _district_table()
+    df = pd.DataFrame(list(rows), columns=["시도", "시군구", "lawd_cd"])
+    return df.sort_values(by=['시도', '시군구'])
+
+def get_district_by_code(lawd_cd: str) -> Optional[Dict]:
+    """코드로 시군구 정보({시도, 시군구, lawd_cd})를 찾습니다."""
+    return _district_table()[1].get(lawd_cd)
+
+def find_district_codes(name: str) -> List[Dict]:
+    """이름으로 시군구를 찾습니다. ('서울특별시 강남구', '서울 강남구', '강남구' 모두 가능)"""
+    return list(_district_table()[2].get(" ".join(name.split()), []))
+
+def get_district_name(lawd_cd: str) -> str:
+    """코드를 '시도 시군구' 형태의 표시 이름으로 변환합니다. (없으면 코드 그대로)"""
+    row = get_district_by_code(lawd_cd)
+    return f"{row['시도']} {row['시군구']}" if row else lawd_cd
+
+def bulk_fetch_month(service_key: str, lawd_cds: List[str], deal_ymd: str,
+                     max_workers: int = 8) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """여러 지역의 같은 달 실거래 데이터를 동시에 조회합니다. (MOLIT_LIMITER 적용)
+
+    완료되는 순서대로 (lawd_cd, DataFrame)을 반환합니다.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(get_apt_trade_data, service_key, cd, deal_ymd): cd for cd in lawd_cds}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
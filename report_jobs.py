@@ -0,0 +1,139 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Iterator, List, Optional
+
+import streamlit as st
+
+# 동시에 실행할 수 있는 리포트 생성 작업 수 (전체 세션 공통)
+MAX_CONCURRENT_JOBS = int(os.getenv("AI_MAX_CONCURRENT_JOBS", "2"))
+# 완료된 작업 결과 보관 시간 (초)
+JOB_RESULT_TTL = int(os.getenv("AI_JOB_RESULT_TTL", "86400"))
+
+# 작업 상태
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+STATUS_LABELS = {
+    QUEUED: "⏳ 대기 중",
+    RUNNING: "✍️ 생성 중",
+    DONE: "✅ 완료",
+    FAILED: "❌ 실패",
+    CANCELLED: "🚫 취소됨",
+}
+
+class ReportJob:
+    """백그라운드 리포트 생성 작업 하나의 상태와 (부분) 결과"""
+
+    def __init__(self, label: str, owner: Optional[str]):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.owner = owner
+        self.status = QUEUED
+        self.text = ""
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+class ReportJobQueue:
+    """리포트 생성을 스크립트 실행과 분리하여 처리하는 작업 큐 (세션 간 공유)
+
+    작업은 텍스트 조각을 반환하는 제너레이터 함수로 제출하며, 조각이 도착할 때마다
+    부분 결과가 갱신되므로 UI는 상태를 폴링하여 진행 상황을 표시할 수 있습니다.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_JOBS, result_ttl: float = JOB_RESULT_TTL):
+        self.result_ttl = result_ttl
+        self._jobs: Dict[str, ReportJob] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="report")
+
+    def submit(self, label: str, work: Callable[[], Iterator[str]], owner: Optional[str] = None) -> str:
+        """작업을 큐에 넣고 작업 ID를 반환합니다."""
+        job = ReportJob(label, owner)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, work)
+        return job.id
+
+    def _finish(self, job: ReportJob, status: str, error: Optional[str] = None) -> None:
+        """종료 상태를 기록합니다. 취소 요청이 있었으면 완료 대신 취소로 처리합니다. (잠금 보유 상태에서 호출)"""
+        if status == DONE and job.cancel_event.is_set():
+            status = CANCELLED
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+
+    def _run(self, job: ReportJob, work: Callable[[], Iterator[str]]) -> None:
+        # [FIX] 상태/텍스트는 UI가 읽는 동안 작업 스레드에서 바뀌므로 큐 잠금 아래에서만 변경
+        with self._lock:
+            if job.cancel_event.is_set():
+                self._finish(job, CANCELLED)
+                return
+            job.status = RUNNING
+        stream = None
+        try:
+            stream = work()
+            for chunk in stream:
+                with self._lock:
+                    if job.cancel_event.is_set():
+                        self._finish(job, CANCELLED)
+                        return
+                    job.text += chunk
+            with self._lock:
+                self._finish(job, DONE)
+        except Exception as e:
+            with self._lock:
+                self._finish(job, FAILED, str(e))
+        finally:
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, owner: Optional[str] = None) -> List[ReportJob]:
+        """작업 목록을 최신순으로 반환합니다. owner를 지정하면 해당 세션의 작업만 반환합니다."""
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if owner is None or j.owner == owner]
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        """대기 중이면 즉시, 실행 중이면 다음 조각 수신 시점에 작업을 취소합니다."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            job.cancel_event.set()
+            if job.future is not None and job.future.cancel():
+                self._finish(job, CANCELLED)
+        return True
+
+    def remove(self, job_id: str) -> None:
+        self.cancel(job_id)
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def _prune(self) -> None:
+        now = time.time()
+        expired = [jid for jid, j in self._jobs.items() if j.finished_at and now - j.finished_at > self.result_ttl]
+        for jid in expired:
+            del self._jobs[jid]
+
+@st.cache_resource
+def get_job_queue() -> ReportJobQueue:
+    return ReportJobQueue()
+
+def current_session_id() -> Optional[str]:
+    """현재 Streamlit 세션 ID (작업 소유자 구분용)"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
@@ -0,0 +1,304 @@
+import threading
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import data_manager
+import portfolio
+import utils
+
+# 자산 간 상관관계 / 베타 / 변동성 / VaR (원화 기준 일간 로그 수익률)
+#
+# 코인은 매일, 주식은 거래소 영업일에만 거래되므로 모든 시계열을 평일 달력에 맞춥니다.
+# 주말 코인 변동은 다음 월요일 수익률에 합쳐지고, 휴장일의 주식은 직전 종가를 유지(수익률 0)합니다.
+# 외화 자산과 벤치마크는 같은 방식으로 맞춘 환율(USD는 KRW=X)을 곱해 원화로 환산합니다.
+# 공분산은 결측(상장 이전 등)을 제외한 쌍별 합계 행렬로 보관하여, 한 시계열에 새 봉이 들어오면
+# 그 자산의 행/열만 다시 계산하고, 달력이 밀리면 빠진 행은 빼고 새 행만 더합니다.
+
+# 분석 기간 -> (평일 수, Yahoo 조회 기간). 3년/5년은 차트 '5년' 조회와 같은 캐시를 사용
+WINDOWS = {"1년": (252, "1y"), "3년": (756, "5y"), "5년": (1260, "5y")}
+TRADING_DAYS = 252
+# 벤치마크 이름 -> (Yahoo 티커, 통화)
+BENCHMARKS = {"KOSPI": ("^KS11", "KRW"), "S&P500": ("^GSPC", "USD")}
+BETA_WINDOW = 60         # 롤링 베타 창 (평일 수)
+MIN_OVERLAP = 20         # 상관계수/베타를 계산할 최소 공통 관측 수
+STALE_DAYS = 7           # 이보다 오래된 종가는 이어 쓰지 않음 (거래정지/상장폐지)
+MAX_SHIFT = 20           # 달력이 이 이상 밀리면 증분 대신 전체 재계산
+REBUILD_EVERY = 500      # 증분 갱신 누적 오차 정리를 위한 전체 재계산 주기
+
+def daily_close(prices: pd.Series) -> pd.Series:
+    """시간대/시각이 섞인 종가 시계열을 날짜(시간대 없음) 인덱스의 일별 종가로 정리합니다."""
+    prices = prices.dropna()
+    if prices.empty:
+        return pd.Series(dtype=float)
+    index = pd.DatetimeIndex(prices.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)   # 거래소 현지 날짜 유지
+    s = pd.Series(prices.to_numpy(float), index=index.normalize()).sort_index(kind="stable")
+    return s[~s.index.duplicated(keep="last")]
+
+def to_krw(prices: pd.Series, currency: Optional[str], fx: Optional[pd.Series]) -> pd.Series:
+    """현지 통화 일별 종가를 같은 날짜(없으면 직전)의 원화 환율로 환산합니다."""
+    base, unit = portfolio.normalize_currency(currency)
+    if base == "KRW":
+        return prices * unit
+    if fx is None or fx.empty or prices.empty:
+        return pd.Series(dtype=float)
+    rate = fx.reindex(prices.index, method="ffill", tolerance=pd.Timedelta(days=STALE_DAYS))
+    return (prices * unit * rate).dropna()
+
+def align(prices: pd.Series, calendar: pd.DatetimeIndex) -> np.ndarray:
+    """일별 종가를 평일 달력에 맞춥니다. (해당 날짜가 없으면 STALE_DAYS 이내의 직전 종가)"""
+    if prices.empty:
+        return np.full(len(calendar), np.nan)
+    dates = prices.index.to_numpy()
+    days = calendar.to_numpy()
+    pos = np.searchsorted(dates, days, side="right") - 1
+    out = prices.to_numpy(float)[np.maximum(pos, 0)]
+    out[(pos < 0) | (days - dates[np.maximum(pos, 0)] > np.timedelta64(STALE_DAYS, "D"))] = np.nan
+    return out
+
+def weekdays(end: pd.Timestamp, periods: int) -> pd.DatetimeIndex:
+    """end(포함) 이전의 평일 periods개 (pd.bdate_range와 같지만 벡터 연산으로 생성)"""
+    days = pd.date_range(end=pd.Timestamp(end).normalize(), periods=periods * 7 // 5 + 7, freq="D")
+    return days[days.dayofweek < 5][-periods:]
+
+def _signature(prices: pd.Series) -> tuple:
+    if prices.empty:
+        return (0,)
+    return (len(prices), prices.index[0], prices.index[-1], float(prices.iloc[-1]))
+
+def _log_returns(prices: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.log(prices[1:] / prices[:-1])
+
+def _masked(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    valid = np.isfinite(returns)
+    return np.where(valid, returns, 0.0), valid.astype(float)
+
+class RiskModel:
+    """평일 달력에 맞춘 원화 수익률 행렬과 쌍별 공분산 합계 (분석 기간별 1개)
+
+    쌍별 합계 (i행 j열은 i, j가 모두 관측된 날만 집계):
+      _n = 공통 관측 수, _s = i 수익률 합, _q = i 수익률 제곱합, _p = i·j 교차곱 합
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.names: List[str] = []
+        self.calendar: Optional[pd.DatetimeIndex] = None
+        self.prices = np.empty((0, 0))
+        self.returns = np.empty((0, 0))
+        self.hits = 0
+        self.incremental = 0
+        self.full = 0
+        self._signatures: Dict[str, tuple] = {}
+        self._n = self._s = self._q = self._p = np.empty((0, 0))
+        self._since_rebuild = 0
+        self._lock = threading.Lock()
+
+    def update(self, series: Dict[str, pd.Series], end: Optional[pd.Timestamp] = None) -> str:
+        """{이름: 원화 일별 종가}를 반영하고 처리 방식('hits'/'incremental'/'full')을 반환합니다."""
+        with self._lock:
+            kind = self._update(series, end)
+            setattr(self, kind, getattr(self, kind) + 1)
+            return kind
+
+    def _update(self, series: Dict[str, pd.Series], end) -> str:
+        names = list(series)
+        if end is None:
+            end = max((s.index[-1] for s in series.values() if len(s)), default=pd.Timestamp.today().normalize())
+        calendar = weekdays(end, self.window + 1)
+        signatures = {k: _signature(s) for k, s in series.items()}
+
+        shift = None
+        if self.calendar is not None and names == self.names and self._since_rebuild < REBUILD_EVERY:
+            shift = int(self.calendar.get_indexer([calendar[0]])[0])
+            if not 0 <= shift <= MAX_SHIFT:
+                shift = None
+        if shift is None:
+            self._rebuild(names, calendar, series, signatures)
+            return "full"
+
+        changed = [i for i, k in enumerate(names) if signatures[k] != self._signatures[k]]
+        if not shift and not changed:
+            return "hits"
+
+        prices = self.prices
+        if shift:
+            prices = np.vstack([prices[shift:], np.empty((shift, len(names)))])
+            for i, k in enumerate(names):
+                prices[-shift:, i] = align(series[k], calendar[-shift:])
+        for i in changed:
+            prices[:, i] = align(series[names[i]], calendar)
+        returns = _log_returns(prices)
+
+        if shift:
+            # 달력에서 빠진 행은 빼고 새로 들어온 행만 더함 (O(shift·N²))
+            self._add_rows(self.returns[:shift], -1.0)
+            self._add_rows(returns[-shift:], 1.0)
+        if changed:
+            # 새 봉이 들어온 자산은 해당 행/열만 다시 계산 (O(T·N·변경 수))
+            self._recompute_columns(returns, np.array(changed))
+
+        self.calendar, self.prices, self.returns = calendar, prices, returns
+        self._signatures = signatures
+        self._since_rebuild += 1
+        return "incremental"
+
+    def _rebuild(self, names, calendar, series, signatures) -> None:
+        n = len(names)
+        prices = np.empty((len(calendar), n))
+        for i, k in enumerate(names):
+            prices[:, i] = align(series[k], calendar)
+        self.names, self.calendar, self.prices = names, calendar, prices
+        self.returns = _log_returns(prices)
+        self._n, self._s, self._q, self._p = (np.zeros((n, n)) for _ in range(4))
+        self._recompute_columns(self.returns, np.arange(n))
+        self._signatures = signatures
+        self._since_rebuild = 0
+
+    def _add_rows(self, block: np.ndarray, sign: float) -> None:
+        x, m = _masked(block)
+        self._n += sign * (m.T @ m)
+        self._s += sign * (x.T @ m)
+        self._q += sign * ((x * x).T @ m)
+        self._p += sign * (x.T @ x)
+
+    def _recompute_columns(self, returns: np.ndarray, cols: np.ndarray) -> None:
+        x, m = _masked(returns)
+        x2 = x * x
+        self._n[:, cols] = m.T @ m[:, cols]
+        self._n[cols, :] = self._n[:, cols].T
+        self._s[:, cols] = x.T @ m[:, cols]
+        self._s[cols, :] = x[:, cols].T @ m
+        self._q[:, cols] = x2.T @ m[:, cols]
+        self._q[cols, :] = x2[:, cols].T @ m
+        self._p[:, cols] = x.T @ x[:, cols]
+        self._p[cols, :] = self._p[:, cols].T
+
+    def covariance(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(쌍별 공분산, 쌍별 상관계수). 공통 관측이 MIN_OVERLAP 미만인 쌍은 NaN"""
+        with self._lock:
+            n, s, q, p = self._n, self._s, self._q, self._p
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cov = (p - s * s.T / n) / (n - 1)
+                var = (q - s * s / n) / (n - 1)   # var[i, j]: j와 겹치는 구간에서 i의 분산
+                corr = np.clip(cov / np.sqrt(var * var.T), -1.0, 1.0)
+        sparse = n < MIN_OVERLAP
+        cov[sparse] = np.nan
+        corr[sparse] = np.nan
+        return cov, corr
+
+    def correlation_frame(self, labels: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        labels = labels or {}
+        names = [labels.get(k, k) for k in self.names]
+        return pd.DataFrame(self.covariance()[1], index=names, columns=names)
+
+    def volatility(self) -> np.ndarray:
+        """자산별 연율화 변동성"""
+        return np.sqrt(np.diag(self.covariance()[0]) * TRADING_DAYS)
+
+    def rolling_beta(self, benchmark: str, window: int = BETA_WINDOW) -> pd.DataFrame:
+        """모든 자산의 벤치마크 대비 롤링 베타 (행: 창의 마지막 날짜, 열: 자산)"""
+        with self._lock:
+            returns, calendar, names = self.returns, self.calendar, self.names
+        b = names.index(benchmark)
+        if len(returns) < window:
+            return pd.DataFrame(columns=names)
+        valid = np.isfinite(returns) & np.isfinite(returns[:, [b]])
+        x = np.where(valid, returns, 0.0)
+        y = np.where(valid, returns[:, [b]], 0.0)
+
+        def rolling_sum(a):
+            c = np.cumsum(np.vstack([np.zeros((1, a.shape[1])), a]), axis=0)
+            return c[window:] - c[:-window]
+
+        n = rolling_sum(valid.astype(float))
+        sx, sy, sxy, syy = rolling_sum(x), rolling_sum(y), rolling_sum(x * y), rolling_sum(y * y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = (sxy - sx * sy / n) / (syy - sy * sy / n)
+        beta[n < MIN_OVERLAP] = np.nan
+        return pd.DataFrame(beta, index=calendar[1:][window - 1:], columns=names)
+
+    def portfolio_risk(self, values: Dict[str, float], confidence=(0.95, 0.99)) -> Optional[Dict]:
+        """보유 평가액(원) 비중으로 포트폴리오 일간 변동성과 1일 VaR(모수적/역사적, 원)을 계산합니다."""
+        cov, _ = self.covariance()
+        cols = [i for i, k in enumerate(self.names) if values.get(k)]
+        if not cols:
+            return None
+        amounts = np.array([values[self.names[i]] for i in cols], dtype=float)
+        total = float(amounts.sum())
+        w = amounts / total
+        sigma = float(np.sqrt(max(w @ np.nan_to_num(cov[np.ix_(cols, cols)]) @ w, 0.0)))
+        simple = np.expm1(self.returns[:, cols])
+        observed = np.isfinite(simple).any(axis=1)
+        history = np.where(np.isfinite(simple), simple, 0.0)[observed] @ w
+        return {
+            "total": total,
+            "daily_vol": sigma,
+            "annual_vol": sigma * np.sqrt(TRADING_DAYS),
+            "var": {
+                c: {
+                    "parametric": NormalDist().inv_cdf(c) * sigma * total,
+                    "historical": float(-np.percentile(history, (1 - c) * 100)) * total if history.size else float("nan"),
+                }
+                for c in confidence
+            },
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"assets": len(self.names), "rows": len(self.returns), "hits": self.hits,
+                    "incremental": self.incremental, "full": self.full}
+
+def benchmark_key(name: str) -> str:
+    return f"benchmark:{name}"
+
+def _close_series(hist: pd.DataFrame) -> pd.Series:
+    return daily_close(hist["Close"]) if not hist.empty and "Close" in hist else pd.Series(dtype=float)
+
+def load_prices(assets: List[Dict], window_label: str) -> Tuple[Dict[str, pd.Series], Dict[str, str]]:
+    """타일(코인/주식/환율)과 벤치마크의 원화 일별 종가 {키: 시계열}와 {키: 표시 이름}을 반환합니다.
+
+    차트/시세와 같은 캐시 조회(get_stock_history, get_stock_price)를 재사용하고, 코인은 장기 일봉을 받습니다.
+    """
+    rows, yf_period = WINDOWS[window_label]
+    coin_days = rows * 7 // 5 + 10
+
+    def load(spec):
+        if spec["type"] == "coin":
+            candles = data_manager.get_upbit_daily_history(spec["ticker"], days=coin_days)
+            if candles.empty:
+                return pd.Series(dtype=float), "KRW"
+            return daily_close(candles.set_index("date")["trade_price"]), "KRW"
+        hist = data_manager.get_stock_history(spec["ticker"], period=yf_period)
+        if spec["type"] == "exchange":
+            return _close_series(hist), "KRW"
+        currency = spec.get("currency") or data_manager.get_stock_price(spec["ticker"])[2]
+        return _close_series(hist), currency
+
+    specs = [a for a in assets if a["type"] in ("coin", "stock_rec", "stock_custom", "exchange") and a.get("ticker")]
+    specs += [{"key": benchmark_key(name), "label": name, "type": "benchmark", "ticker": ticker, "currency": currency}
+              for name, (ticker, currency) in BENCHMARKS.items()]
+    loaded = utils.run_concurrently([lambda spec=spec: load(spec) for spec in specs])
+
+    # 필요한 통화의 원화 환율 이력 (같은 조회 기간)
+    bases = sorted({portfolio.normalize_currency(r[1])[0] for r in loaded if r} - {"KRW"})
+    fx_hist = utils.run_concurrently([
+        lambda base=base: _close_series(data_manager.get_stock_history(data_manager.fx_ticker(base), period=yf_period))
+        for base in bases
+    ])
+    fx = dict(zip(bases, fx_hist))
+
+    series, labels = {}, {}
+    for spec, result in zip(specs, loaded):
+        if result is None:
+            continue
+        krw = to_krw(result[0], result[1], fx.get(portfolio.normalize_currency(result[1])[0]))
+        if len(krw) >= MIN_OVERLAP:
+            series[spec["key"]] = krw
+            labels[spec["key"]] = spec["label"]
+    return series, labels
@@ -0,0 +1,56 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# 업비트 전체 KRW 마켓 스크리너
+#
+# data_manager.get_upbit_snapshot()의 스냅샷 한 장(모든 세션이 공유)으로 등락률, 24시간 거래대금,
+# 당일 변동폭을 벡터 연산으로 계산하고, 상위 N개만 부분 정렬(argpartition)로 골라냅니다.
+
+# 정렬 기준 이름 -> (컬럼, 내림차순 여부)
+SORT_KEYS = {
+    "상승률": ("change_pct", True),
+    "하락률": ("change_pct", False),
+    "거래대금": ("value_24h", True),
+    "변동폭": ("range_pct", True),
+    "종합": ("score", True),
+}
+# 24시간 거래대금 하한 기본값 (억 원). 거래가 거의 없는 마켓의 급등락을 제외
+DEFAULT_MIN_VALUE_EOK = 10
+
+def enrich(snapshot: pd.DataFrame, names: Dict[str, str]) -> pd.DataFrame:
+    """스냅샷에 스크리닝 지표를 추가합니다. names: {마켓 코드: 대시보드 코인 이름}
+
+    종합 점수는 |등락률|, 거래대금, 변동폭 백분위 순위의 평균(0~100)입니다.
+    """
+    price = snapshot['trade_price'].to_numpy(float)
+    prev = snapshot['prev_closing_price'].to_numpy(float)
+    change = snapshot['signed_change_rate'].to_numpy(float) * 100
+    value = snapshot['acc_trade_price_24h'].to_numpy(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        range_pct = (snapshot['high_price'].to_numpy(float) - snapshot['low_price'].to_numpy(float)) / prev * 100
+    out = pd.DataFrame({
+        "market": snapshot['market'].to_numpy(),
+        "label": snapshot['market'].map(names).fillna(snapshot['market']).to_numpy(),
+        "price": price,
+        "change_pct": change,
+        "value_24h": value,
+        "range_pct": range_pct,
+    })
+    ranks = pd.DataFrame({"change": np.abs(change), "value": value, "range": range_pct}).rank(pct=True)
+    out["score"] = ranks.mean(axis=1).to_numpy() * 100
+    return out
+
+def top(enriched: pd.DataFrame, by: str, limit: int = 20, min_value: float = DEFAULT_MIN_VALUE_EOK * 1e8) -> pd.DataFrame:
+    """거래대금 하한을 넘는 마켓 중 정렬 기준 상위 limit개 (결측값은 맨 뒤)"""
+    column, descending = SORT_KEYS[by]
+    df = enriched[np.nan_to_num(enriched["value_24h"].to_numpy(float)) >= min_value]
+    key = df[column].to_numpy(float)
+    key = np.where(np.isnan(key), np.inf, -key if descending else key)
+    k = min(limit, len(key))
+    if k == 0:
+        return df.iloc[0:0]
+    idx = np.argpartition(key, k - 1)[:k]
+    idx = idx[np.argsort(key[idx], kind="stable")]
+    return df.iloc[idx].reset_index(drop=True)
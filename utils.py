@@ -1,10 +1,14 @@
 import streamlit as st
 import os
-import json
 import time
-import requests
 import datetime
-import xml.etree.ElementTree as ET
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+import config_store
+import apt_catalog
+
+logger = logging.getLogger(__name__)
 
 # 주요 주식 추천 목록
 STOCK_RECOMMENDATIONS = {
@@ -23,14 +27,15 @@ STOCK_RECOMMENDATIONS = {
 CONFIG_FILE = "dashboard_config.json"
 APT_LIST_FILE = "apt_list.json"
 
+@st.cache_resource(show_spinner=False)
+def load_env() -> bool:
+    """[NEW] .env 파일은 프로세스당 한 번만 읽습니다. (재실행마다 파일을 다시 파싱하지 않음)"""
+    from dotenv import load_dotenv
+    return load_dotenv()
+
 def load_config():
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+    # [CHANGED] 파일이 바뀌지 않았으면 메모리 사본을 반환 (재파싱 없음)
+    return config_store.get_store(CONFIG_FILE).load()
 
 def save_config():
     config = {
@@ -39,14 +44,12 @@ def save_config():
         "selected_stocks": st.session_state.get("selected_stocks_state", []),
         "custom_stock": st.session_state.get("custom_stock_state", ""),
         "dashboard_order": st.session_state.get("dashboard_order", []),
-        "selected_ai_model": st.session_state.get("selected_ai_model", "models/gemini-1.5-flash")
+        "selected_ai_model": st.session_state.get("selected_ai_model", "models/gemini-1.5-flash"),
+        "holdings": st.session_state.get("holdings", {})
     }
     
-    try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        print(f"Config save failed: {e}")
+    # [CHANGED] 연속 변경을 모아 디바운스 후 원자적으로 저장 (파일 잠금 사용)
+    config_store.get_store(CONFIG_FILE).save(config)
 
 def check_password():
     password = os.getenv("APP_PASSWORD")
@@ -97,73 +100,79 @@ def check_password():
     else:
         return True
 
-def display_news(keyword):
-    """Google News RSS를 검색하여 뉴스를 표시하는 함수"""
+def get_news_query(metric):
+    """대시보드 항목에서 뉴스 검색어를 추출합니다. (이모지 제거 및 괄호 앞부분 추출)"""
+    if metric['type'] == 'exchange':
+        return "원달러 환율"
+    query = metric['label']
+    for emoji in ["🪙", "📈", "💵", "🏠"]:
+        query = query.replace(emoji, "")
+    return query.split('(')[0].strip()
+
+def display_news(keyword, ticker=None):
+    """Google News RSS(+ Yahoo Finance) 뉴스를 캐시에서 불러와 표시하는 함수"""
+    import news_manager
+
     try:
         st.caption(f"'{keyword}' 관련 최신 뉴스 (Google News)")
-        url = f"https://news.google.com/rss/search?q={keyword}&hl=ko&gl=KR&ceid=KR:ko"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            root = ET.fromstring(response.content)
-            items = root.findall('.//item')
-            
-            if items:
-                for item in items[:5]:
-                    title = item.find('title').text
-                    link = item.find('link').text
-                    pub_date = item.find('pubDate').text
-                    source_elem = item.find('source')
-                    source = source_elem.text if source_elem is not None else "Google News"
-                    
-                    with st.container(border=True):
-                        st.markdown(f"**[{title}]({link})**")
-                        try:
-                            dt = datetime.datetime.strptime(pub_date, "%a, %d %b %Y %H:%M:%S %Z")
-                            date_str = dt.strftime('%Y-%m-%d %H:%M')
-                            st.caption(f"{source} | {date_str}")
-                        except:
-                            st.caption(f"{source} | {pub_date}")
-            else:
-                st.info("관련 뉴스가 없습니다.")
-        else:
+        items = news_manager.get_news_service().get_news(keyword, ticker=ticker, limit=5)
+
+        if items is None:
             st.warning("뉴스 데이터를 가져오지 못했습니다.")
+        elif items:
+            for item in items:
+                with st.container(border=True):
+                    st.markdown(f"**[{item['title']}]({item['link']})**")
+                    if item['ts']:
+                        date_str = datetime.datetime.fromtimestamp(item['ts']).strftime('%Y-%m-%d %H:%M')
+                        st.caption(f"{item['source']} | {date_str}")
+                    else:
+                        st.caption(f"{item['source']} | {item['published']}")
+        else:
+            st.info("관련 뉴스가 없습니다.")
     except Exception as e:
         st.error(f"뉴스 로딩 중 오류: {e}")
 
 def get_apt_list(lawd_cd):
-    """저장된 아파트 목록 파일에서 해당 지역의 아파트 리스트를 불러옵니다."""
-    if os.path.exists(APT_LIST_FILE):
-        try:
-            with open(APT_LIST_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get(lawd_cd, [])
-        except:
-            return []
-    return []
+    """저장된 아파트 목록에서 해당 지역의 아파트 리스트를 불러옵니다."""
+    # [CHANGED] 로컬 저장소 기반 카탈로그 사용 (변경이 없으면 메모리 인덱스 재사용)
+    try:
+        return apt_catalog.get_catalog(APT_LIST_FILE).get_names(lawd_cd)
+    except Exception as e:
+        print(f"Failed to load apt list: {e}")
+        return []
 
 def update_apt_list(lawd_cd, new_list):
-    """새로운 아파트 목록을 기존 파일에 병합하여 저장합니다."""
-    data = {}
-    if os.path.exists(APT_LIST_FILE):
-        try:
-            with open(APT_LIST_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except:
-            data = {}
-    
-    current_list = data.get(lawd_cd, [])
-    # 기존 목록과 새 목록을 합치고 중복 제거 후 정렬
-    updated_set = set(current_list)
-    updated_set.update(new_list)
-    updated_list = sorted(list(updated_set))
-    
-    data[lawd_cd] = updated_list
-    
+    """새로운 아파트 목록을 지역 카탈로그에 추가(upsert)합니다."""
     try:
-        with open(APT_LIST_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        return apt_catalog.get_catalog(APT_LIST_FILE).upsert(lawd_cd, new_list)
     except Exception as e:
         print(f"Failed to save apt list: {e}")
-        
-    return updated_list
+        return get_apt_list(lawd_cd)
+
+def search_apts(query, lawd_cd=None, limit=50):
+    """아파트 이름을 접두어/자모/초성으로 검색합니다. lawd_cd가 없으면 전국을 검색합니다."""
+    try:
+        return apt_catalog.get_catalog(APT_LIST_FILE).search(query, lawd_cd=lawd_cd, limit=limit)
+    except Exception as e:
+        print(f"Apt search failed: {e}")
+        return []
+
+def run_concurrently(tasks: List[Callable[[], object]], max_workers: int = 8) -> List[object]:
+    """작업들을 스레드 풀에서 동시에 실행하고 결과를 순서대로 반환합니다. (실패한 작업은 None)
+
+    작업 스레드에는 스크립트 컨텍스트를 전달하지 않으므로 작업 안에서 화면 요소를 그리지 않아야 합니다.
+    (st.cache_data 함수는 컨텍스트 없이도 동작하며, cache_registry.cache_data는 스피너를 끈 상태가 기본)
+    """
+    if not tasks:
+        return []
+
+    def run(task):
+        try:
+            return task()
+        except Exception as e:
+            logger.warning("Concurrent task failed: %s", e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        return list(executor.map(run, tasks))